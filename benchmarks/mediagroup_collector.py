@@ -0,0 +1,120 @@
+"""
+Microbenchmark of MediaGroupCollector: task churn and flush latency
+(time from the last item of an album to on_ready; full 10-item albums are not debounced).
+
+Compares the current collector (one timer task over a deadline heap) with the previous
+design (a task per album item, cancelled by the next item). Downloads and conversion to
+core.Message are stubbed out, so only the collector's own overhead is measured.
+
+Run: python3 -m benchmarks.mediagroup_collector [albums] [items_per_album]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+from unittest.mock import patch
+
+from src.app.bot.mediagroup_collector import MediaGroupCollector
+
+TIMEOUT = 0.05
+
+
+class TaskPerItemCollector:
+  """
+  The previous collector: every item cancels the group's flush task and creates a new one.
+  """
+  def __init__(self, timeout: float, on_ready: Callable):
+    self._groups: Dict[str, List] = {}
+    self._tasks: Dict[str, asyncio.Task] = {}
+    self._timeout = timeout
+    self._on_ready = on_ready
+
+  async def add(self, msg) -> None:
+    gid = msg.media_group_id
+    self._groups.setdefault(gid, []).append(msg)
+    if gid in self._tasks:
+      self._tasks[gid].cancel()
+    self._tasks[gid] = asyncio.create_task(self._flush_later(gid))
+
+  async def _flush_later(self, gid: str) -> None:
+    try:
+      await asyncio.sleep(self._timeout)
+    except asyncio.CancelledError:
+      return
+    msgs = self._groups.pop(gid, [])
+    self._tasks.pop(gid, None)
+    self._on_ready(await convert(msgs))
+
+  async def flush_all(self) -> int:
+    return 0
+
+
+async def convert(msgs: List, files: List | None = None) -> SimpleNamespace:
+  return SimpleNamespace(items=len(msgs), last_added=msgs[-1].added_at)
+
+
+def files_from_tg(msg, limit) -> List:
+  return []
+
+
+async def run(collector_cls, albums: int, items: int) -> Dict[str, float]:
+  loop = asyncio.get_running_loop()
+  created = 0
+  default_factory = loop.get_task_factory()
+
+  def counting_factory(loop, coro, **kwargs):
+    nonlocal created
+    created += 1
+    if default_factory:
+      return default_factory(loop, coro, **kwargs)
+    return asyncio.Task(coro, loop=loop, **kwargs)
+
+  latencies: List[float] = []
+  all_ready = asyncio.Event()
+
+  def on_ready(core_msg) -> None:
+    latencies.append(time.perf_counter() - core_msg.last_added)
+    if len(latencies) == albums:
+      all_ready.set()
+
+  collector = collector_cls(timeout=TIMEOUT, on_ready=on_ready)
+  loop.set_task_factory(counting_factory)
+  started = time.perf_counter()
+  try:
+    # albums arrive interleaved, as Telegram delivers them under load
+    for _ in range(items):
+      for album in range(albums):
+        msg = SimpleNamespace(media_group_id=f"album-{album}", added_at=time.perf_counter())
+        await collector.add(msg)
+      await asyncio.sleep(0)
+    await all_ready.wait()
+  finally:
+    loop.set_task_factory(default_factory)
+  elapsed = time.perf_counter() - started
+  await collector.flush_all()
+
+  latencies.sort()
+  return {
+    "tasks_created": created,
+    "flush_latency_avg_ms": statistics.mean(latencies) * 1000,
+    "flush_latency_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    "total_s": elapsed,
+  }
+
+
+async def main(albums: int, items: int) -> None:
+  print(f"{albums} albums x {items} items, timeout {TIMEOUT * 1000:.0f} ms")
+  with patch("src.app.bot.mediagroup_collector.MessageHandler.from_media_group", convert), \
+       patch("src.app.bot.mediagroup_collector.MessageHandler.files_from_tg", files_from_tg):
+    for name, cls in (("task per item", TaskPerItemCollector), ("timer heap", MediaGroupCollector)):
+      result = await run(cls, albums, items)
+      print(f"  {name:14}" + "  ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+  albums = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+  items = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+  asyncio.run(main(albums, items))
@@ -0,0 +1,119 @@
+"""
+Benchmark of cold riddle loading: the database and RIDDLES_DIR against the riddle bundle.
+
+Creates a SQLite database and riddle files in a temporary STORAGE_ROOT, builds the bundle
+with src.bundle_riddles, then loads the RiddleSnapshot in a fresh process per path and
+reports the load time and the growth of the process' RSS, right after loading and after
+every file content has been touched once (as the first sends of all riddles would).
+RSS is read from /proc, so the memory columns need Linux.
+
+Run: python3 -m benchmarks.riddle_bundle [riddles] [files_per_riddle] [file_kb]
+"""
+
+import asyncio
+import importlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCHEMA = (
+  "CREATE TABLE riddle (id INTEGER PRIMARY KEY, answer TEXT, type TEXT)",
+  "CREATE TABLE riddle_message (id INTEGER PRIMARY KEY, riddle_id INTEGER, text TEXT)",
+  "CREATE TABLE riddle_file (id INTEGER PRIMARY KEY, message_id INTEGER, filename TEXT)",
+)
+
+
+def rss_kb() -> int | None:
+  try:
+    with open("/proc/self/status") as f:
+      for line in f:
+        if line.startswith("VmRSS:"):
+          return int(line.split()[1])
+  except OSError:
+    pass
+  return None
+
+
+def fill(root: Path, riddles: int, files: int, file_kb: int) -> None:
+  conn = sqlite3.connect(root / "riddles.db")
+  for statement in SCHEMA:
+    conn.execute(statement)
+  for riddle_id in range(1, riddles + 1):
+    conn.execute("INSERT INTO riddle VALUES (?, ?, 'db')", (riddle_id, str(riddle_id)))
+    conn.execute("INSERT INTO riddle_message VALUES (?, ?, 'text')", (riddle_id, riddle_id))
+    folder = root / "riddles" / str(riddle_id)
+    folder.mkdir(parents=True)
+    for n in range(files):
+      (folder / f"{n}.jpg").write_bytes(os.urandom(file_kb * 1024))
+      conn.execute("INSERT INTO riddle_file (message_id, filename) VALUES (?, ?)", (riddle_id, f"{n}.jpg"))
+  conn.commit()
+  conn.close()
+
+
+async def load(riddles: int, bundle: Path | None) -> None:
+  # runs in the child process; core goes first, like in the app (db and core import each other)
+  importlib.import_module("src.app.core")
+  from src.app.db.db_conn import DB
+  from src.app.db.riddle_snapshot import RiddleSnapshot
+
+  before = rss_kb()
+  started = time.perf_counter()
+  snapshot = await RiddleSnapshot.load(stage_count=riddles, bundle=bundle)
+  elapsed = time.perf_counter() - started
+  loaded = rss_kb()
+
+  touched = 0
+  for riddle in snapshot.riddles.values():
+    for message in riddle.messages:
+      for file in message.files:
+        touched += sum(file.filedata.view()[::4096])
+  await DB.close()
+  print(json.dumps({
+    "load_ms": elapsed * 1000,
+    "rss_load_kb": loaded - before if before is not None else None,
+    "rss_touched_kb": rss_kb() - before if before is not None else None,
+  }))
+
+
+def run_child(env, *args) -> str:
+  return subprocess.run(
+    [sys.executable, "-m", *args], env=env, check=True, stdout=subprocess.PIPE, text=True,
+  ).stdout
+
+
+def main(riddles: int, files: int, file_kb: int) -> None:
+  with tempfile.TemporaryDirectory() as tmp:
+    root = Path(tmp)
+    fill(root, riddles, files, file_kb)
+    env = {
+      **os.environ,
+      "STORAGE_ROOT": str(root),
+      "DATABASE_URL": f"sqlite:///{root / 'riddles.db'}",
+      "ADMIN_CHAT": os.getenv("ADMIN_CHAT", "0"),
+      "ADMIN": os.getenv("ADMIN", "1"),
+    }
+    bundle = root / "riddles.bundle"
+    run_child(env, "src.bundle_riddles", str(bundle))
+
+    print(f"{riddles} riddles x {files} files x {file_kb} KB, bundle {bundle.stat().st_size // 1024} KB")
+    for name, args in (("database", []), ("bundle", [str(bundle)])):
+      result = json.loads(run_child(env, "benchmarks.riddle_bundle", "--child", str(riddles), *args))
+      print(
+        f"  {name:9} load_ms={result['load_ms']:.2f}  "
+        f"rss_after_load_kb={result['rss_load_kb']}  rss_after_touch_kb={result['rss_touched_kb']}"
+      )
+
+
+if __name__ == "__main__":
+  if sys.argv[1:2] == ["--child"]:
+    asyncio.run(load(int(sys.argv[2]), Path(sys.argv[3]) if len(sys.argv) > 3 else None))
+  else:
+    riddles = int(sys.argv[1]) if len(sys.argv) > 1 else 17
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    file_kb = int(sys.argv[3]) if len(sys.argv) > 3 else 512
+    main(riddles, files, file_kb)
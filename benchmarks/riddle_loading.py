@@ -0,0 +1,88 @@
+"""
+Benchmark of loading the riddle set: database queries and time.
+
+Compares the previous per-riddle loading (riddle row, then its messages, then the files
+of every message: 2 + messages queries per riddle) with the batched RiddleQuery.get_many
+(three queries in total). Runs against an in-memory SQLite database; riddle files are
+not read from disk, so only the database part is measured.
+
+Run: python3 -m benchmarks.riddle_loading [riddles] [messages_per_riddle] [files_per_message]
+"""
+
+import asyncio
+import sys
+import time
+from unittest.mock import patch
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.app.core import FileExtension, FileType
+from src.app.db.db_conn import DB
+from src.app.db.queries import RiddleQuery, RiddleMessageQuery
+
+SCHEMA = (
+  "CREATE TABLE riddle (id INTEGER PRIMARY KEY, answer TEXT, type TEXT)",
+  "CREATE TABLE riddle_message (id INTEGER PRIMARY KEY, riddle_id INTEGER, text TEXT)",
+  "CREATE TABLE riddle_file (id INTEGER PRIMARY KEY, message_id INTEGER, filename TEXT)",
+)
+
+
+async def fill(engine, riddles: int, messages: int, files: int) -> None:
+  async with engine.begin() as conn:
+    for statement in SCHEMA:
+      await conn.execute(text(statement))
+    message_id = 0
+    for riddle_id in range(1, riddles + 1):
+      await conn.execute(text("INSERT INTO riddle VALUES (:id, :answer, 'db')"), {"id": riddle_id, "answer": str(riddle_id)})
+      for _ in range(messages):
+        message_id += 1
+        await conn.execute(text("INSERT INTO riddle_message (id, riddle_id, text) VALUES (:id, :riddle, 'text')"), {"id": message_id, "riddle": riddle_id})
+        for n in range(files):
+          await conn.execute(text("INSERT INTO riddle_file (message_id, filename) VALUES (:id, :name)"), {"id": message_id, "name": f"{n}.jpg"})
+
+
+def fake_download(riddle_id: int, filename: str) -> FileExtension:
+  return FileExtension(type=FileType.PHOTO, creator_id=0, filename=filename)
+
+
+async def per_riddle(riddles: int) -> None:
+  # the loading path before batching: RiddleQuery.get for every stage
+  for riddle_id in range(1, riddles + 1):
+    rows = await DB.select(table=RiddleQuery.table_name, where={"id": riddle_id})
+    RiddleQuery.parse(rows[0], await RiddleMessageQuery.get_by_riddle(riddle_id))
+
+
+async def batched(riddles: int) -> None:
+  await RiddleQuery.get_many()
+
+
+async def main(riddles: int, messages: int, files: int) -> None:
+  engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+  await fill(engine, riddles, messages, files)
+  queries = 0
+
+  def count(*args) -> None:
+    nonlocal queries
+    queries += 1
+
+  event.listen(engine.sync_engine, "before_cursor_execute", count)
+  factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+  print(f"{riddles} riddles x {messages} messages x {files} files")
+  with patch("src.app.db.db_conn.SessionFactory", factory), \
+       patch("src.app.storage.download_riddle_file", fake_download):
+    for name, load in (("per riddle", per_riddle), ("batched", batched)):
+      queries = 0
+      started = time.perf_counter()
+      await load(riddles)
+      elapsed = time.perf_counter() - started
+      print(f"  {name:11} queries={queries}  total_ms={elapsed * 1000:.2f}")
+  await engine.dispose()
+
+
+if __name__ == "__main__":
+  riddles = int(sys.argv[1]) if len(sys.argv) > 1 else 17
+  messages = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+  files = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+  asyncio.run(main(riddles, messages, files))
@@ -7,10 +7,12 @@ from .handlers import tg_router
 from .router import Router
 from .message_handler import MessageHandler
 from .sender import send_messages
+from .send_scheduler import SendPriority
 
 __all__ = [
   "tg_router",
   "send_messages",
+  "SendPriority",
   "Router",
   "MessageHandler"
 ]
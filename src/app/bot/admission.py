@@ -0,0 +1,152 @@
+"""
+Admission control for incoming updates.
+
+Counts updates which are being routed (in flight) and sheds load when there are too many:
+- above the high watermark low-priority updates (a repeated /riddle, an answer identical
+  to one sent moments ago) are dropped until the count falls back to the low watermark;
+  users who are registering are never dropped, since registration asks to repeat the password;
+- at the hard limit normal updates get a short "busy, retry" reply instead of being routed;
+- admin updates and verification traffic (callbacks, photos and videos, and any message
+  of a team whose current riddle is a verification one) are always admitted.
+"""
+
+from __future__ import annotations
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+from ..core import Message
+from ...config import ADMIN
+
+import logging
+logger = logging.getLogger(__name__)
+
+BUSY_TEXT = "Бот сейчас перегружен, повторите попытку через минуту."
+
+
+class Priority(IntEnum):
+  LOW = 0
+  NORMAL = 1
+  CRITICAL = 2
+
+
+class AdmissionController:
+  """
+  Bounded in-flight counter with high/low watermarks (hysteresis) in front of routing.
+  `duplicate_window` is how long (in seconds) an identical message of the same user
+  is considered a repeat. `is_registered` tells whether a user has finished registration;
+  repeats of the others are not dropped. Without it every user counts as registered.
+  `awaits_verification` tells whether a user's team is on a verification riddle, whose
+  text answers are verification traffic too. Both are asked only for a message which
+  would be shed otherwise.
+  """
+
+  def __init__(
+    self,
+    high_watermark: int,
+    low_watermark: int,
+    max_in_flight: int,
+    duplicate_window: float,
+    is_registered: Callable[[int], Awaitable[bool]] | None = None,
+    awaits_verification: Callable[[int], Awaitable[bool]] | None = None,
+  ):
+    if not 0 <= low_watermark <= high_watermark <= max_in_flight:
+      raise ValueError("Admission limits must satisfy low <= high <= max")
+    self._high = high_watermark
+    self._low = low_watermark
+    self._max = max_in_flight
+    self._duplicate_window = duplicate_window
+    self._is_registered = is_registered
+    self._awaits_verification = awaits_verification
+    self._in_flight = 0
+    self._peak = 0
+    self._shedding = False
+    self._last_seen: Dict[Hashable, float] = {}
+    self._admitted = 0
+    self._dropped = 0
+    self._busy = 0
+
+  def classify(self, msg: Message) -> Priority:
+    """
+    Priority of the message. Also remembers it for the duplicate check.
+    """
+    if msg.user_id in ADMIN or msg.files or msg.background_info.get("type"):
+      return Priority.CRITICAL
+
+    now = time.monotonic()
+    key = (msg.user_id, msg.text.strip().lower())
+    last = self._last_seen.get(key)
+    self._last_seen[key] = now
+    if len(self._last_seen) > 10 * self._max:
+      self._forget(now)
+    if last is not None and now - last < self._duplicate_window:
+      return Priority.LOW
+    return Priority.NORMAL
+
+  def _forget(self, now: float) -> None:
+    self._last_seen = {
+      key: seen for key, seen in self._last_seen.items()
+      if now - seen < self._duplicate_window
+    }
+
+  async def submit(
+    self,
+    msg: Message,
+    route: Callable[[Message], Awaitable[List[Message]]],
+  ) -> List[Message]:
+    """
+    Routes the message if it is admitted. Returns the routing result,
+    a "busy" reply or nothing (when the message is dropped).
+    """
+    priority = self.classify(msg)
+    over_limit = self._in_flight >= self._max
+    droppable = priority == Priority.LOW and self._shedding
+    if priority != Priority.CRITICAL and (over_limit or droppable) and not await self._is_verification(msg):
+      if over_limit:
+        self._busy += 1
+        return [Message(_text=BUSY_TEXT, _recipient_id=msg.user_id)]
+      if await self._may_drop(msg):
+        self._dropped += 1
+        logger.info("Dropped a repeated message of user %s under load", msg.user_id)
+        return []
+
+    self._enter()
+    try:
+      return await route(msg)
+    finally:
+      self._leave()
+
+  async def _is_verification(self, msg: Message) -> bool:
+    # a text answer to a verification riddle carries nothing which classify() could see
+    return self._awaits_verification is not None and await self._awaits_verification(msg.user_id)
+
+  async def _may_drop(self, msg: Message) -> bool:
+    # registration repeats its password on purpose, dropping it would leave the user stuck
+    return self._is_registered is None or await self._is_registered(msg.user_id)
+
+  def _enter(self) -> None:
+    self._admitted += 1
+    self._in_flight += 1
+    self._peak = max(self._peak, self._in_flight)
+    if not self._shedding and self._in_flight >= self._high:
+      self._shedding = True
+      logger.warning("%s updates in flight, shedding low-priority traffic", self._in_flight)
+
+  def _leave(self) -> None:
+    self._in_flight -= 1
+    if self._shedding and self._in_flight <= self._low:
+      self._shedding = False
+      logger.info("Load is back to %s updates in flight, shedding stopped", self._in_flight)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Current load and how many updates were admitted, dropped or answered with "busy".
+    """
+    return {
+      "in_flight": self._in_flight,
+      "peak_in_flight": self._peak,
+      "shedding": self._shedding,
+      "admitted": self._admitted,
+      "shed_dropped": self._dropped,
+      "shed_busy": self._busy,
+    }
@@ -0,0 +1,259 @@
+"""
+Broadcasts: one admin message delivered to every team or every member.
+
+Recipients are read from the database page by page (keyset pagination), so a broadcast
+never loads the whole table. Each page goes through the outbound queue with BULK priority,
+which keeps Telegram rate limits and lets replies to players overtake the broadcast.
+Attachments are sent by the file_ids of the admin's message, nothing is uploaded again.
+
+Progress is saved after every page into BROADCASTS_DIR/<id>.json; broadcasts which were
+interrupted by a restart are resumed after the last finished page.
+Throughput and ETA are reported to ADMIN_CHAT every `report_interval` seconds.
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+from uuid import uuid4
+
+from ..core import Message, FileExtension, FileType
+from ..db import TeamRepo, MemberRepo
+from ..storage.paths import BROADCASTS_DIR
+from .send_scheduler import SendPriority
+from .sender import send_messages, send_scheduler, create_untracked_task
+from ...config import ADMIN_CHAT, BROADCAST_PAGE_SIZE, BROADCAST_REPORT_INTERVAL
+
+import logging
+logger = logging.getLogger(__name__)
+
+AUDIENCES = ("teams", "members")
+# ordering key of /broadcast commands: under the supervisor they all land in one worker,
+# the only one which runs and resumes broadcasts
+ORDERING_KEY = ("broadcast",)
+USAGE_TEXT = (
+  "Usage: /broadcast teams|members <text>\n"
+  "Attach files to the command message to broadcast them too."
+)
+
+
+@dataclass
+class BroadcastState:
+  """
+  Persistent progress of a broadcast. `cursor` is the ID of the last team or member
+  whose page is finished; attachments are kept as FileExtension fields with file_ids.
+  """
+  id: str
+  audience: str
+  text: str
+  files: List[Dict[str, Any]] = field(default_factory=list)
+  cursor: int = 0
+  total: int = 0
+  sent: int = 0
+  failed: int = 0
+  started_at: float = field(default_factory=time.time)
+  finished: bool = False
+
+
+class Broadcaster:
+  """
+  Runs broadcasts in background tasks. `submit` queues one message with BULK priority
+  and returns a future telling whether it was sent (see SendScheduler.submit);
+  `report` queues a progress message to admins.
+  """
+
+  def __init__(
+    self,
+    directory: Path,
+    page_size: int,
+    report_interval: float,
+    submit: Callable[[Message, Any], Awaitable[bool]],
+    report: Callable[[Message, Any], Awaitable[None]],
+  ):
+    self._directory = Path(directory)
+    self._page_size = page_size
+    self._report_interval = report_interval
+    self._submit = submit
+    self._report = report
+    self._tasks: Set[asyncio.Task] = set()
+    self._active: Dict[str, BroadcastState] = {}
+    self._finished = 0
+    self._stopping = False
+
+  async def start(self, msg: Message, bot: Any) -> Message:
+    """
+    Starts a broadcast of the admin's /broadcast message (text after the audience, attachments).
+    Returns the reply to admins.
+    """
+    parts = msg.text.split(maxsplit=2)
+    audience = parts[1].lower() if len(parts) > 1 else ""
+    if audience not in AUDIENCES or (len(parts) < 3 and not msg.files):
+      return Message(_text=USAGE_TEXT, _recipient_id=ADMIN_CHAT)
+
+    repo = TeamRepo if audience == "teams" else MemberRepo
+    state = BroadcastState(
+      id=uuid4().hex[:8],
+      audience=audience,
+      text=parts[2] if len(parts) > 2 else "",
+      files=[self._pack_file(file) for file in msg.files],
+      total=await repo.count(),
+    )
+    await self._save(state)
+    self._spawn(state, bot)
+    return Message(
+      _text=f"Broadcast {state.id} started: {state.total} {audience}.",
+      _recipient_id=ADMIN_CHAT,
+    )
+
+  async def resume(self, bot: Any) -> int:
+    """
+    Restarts broadcasts which were interrupted. Returns their number.
+    """
+    if not self._directory.exists():
+      return 0
+    resumed = 0
+    for path in sorted(self._directory.glob("*.json")):
+      state = BroadcastState(**json.loads(path.read_text(encoding="utf-8")))
+      if state.finished or state.id in self._active:
+        continue
+      logger.info("Resuming broadcast %s after id %s", state.id, state.cursor)
+      self._spawn(state, bot)
+      resumed += 1
+    return resumed
+
+  def _spawn(self, state: BroadcastState, bot: Any) -> None:
+    self._active[state.id] = state
+    # a broadcast's pages are not replies to the /broadcast update which started it
+    task = create_untracked_task(self._run(state, bot), name=f"broadcast-{state.id}")
+    self._tasks.add(task)
+    task.add_done_callback(self._tasks.discard)
+
+  @staticmethod
+  def _pack_file(file: FileExtension) -> Dict[str, Any]:
+    return {
+      "type": file.type.value,
+      "filename": file.filename,
+      "file_id": file.file_id,
+      "additional_data": file.additional_data,
+    }
+
+  @staticmethod
+  def _unpack_file(data: Dict[str, Any]) -> FileExtension:
+    return FileExtension(
+      type=FileType(data["type"]),
+      creator_id=None,
+      filename=data["filename"],
+      file_id=data["file_id"],
+      additional_data=data["additional_data"],
+    )
+
+  async def _recipients(self, audience: str, after_id: int) -> List[Tuple[int, int | None]]:
+    """
+    Next page as (cursor id, chat id) pairs: teams are messaged via their current member.
+    """
+    if audience == "teams":
+      teams = await TeamRepo.get_page(after_id, self._page_size)
+      return [(team.id, team.cur_member_id) for team in teams]
+    members = await MemberRepo.get_page(after_id, self._page_size)
+    return [(member.id, member.id) for member in members]
+
+  async def _run(self, state: BroadcastState, bot: Any) -> None:
+    files = [self._unpack_file(data) for data in state.files]
+    started = time.monotonic()
+    done_before = state.sent + state.failed
+    last_report = started
+    try:
+      while True:
+        if self._stopping:
+          return
+        page = await self._recipients(state.audience, state.cursor)
+        if not page:
+          break
+        chats = [chat for _, chat in page if chat is not None]
+        results = await asyncio.gather(*(
+          self._submit(Message(_text=state.text, _recipient_id=chat, _files=files), bot)
+          for chat in chats
+        ))
+        state.sent += sum(results)
+        state.failed += len(results) - sum(results)
+        state.cursor = page[-1][0]
+        await self._save(state)
+
+        now = time.monotonic()
+        if now - last_report >= self._report_interval:
+          last_report = now
+          await self._report(self._progress(state, now - started, done_before), bot)
+
+      state.finished = True
+      await self._save(state)
+      self._finished += 1
+      await self._report(self._progress(state, time.monotonic() - started, done_before), bot)
+    except Exception:
+      logger.exception("Broadcast %s failed after id %s", state.id, state.cursor)
+    finally:
+      self._active.pop(state.id, None)
+
+  @staticmethod
+  def _progress(state: BroadcastState, elapsed: float, done_before: int) -> Message:
+    done = state.sent + state.failed
+    rate = (done - done_before) / elapsed if elapsed > 0 else 0.0
+    if state.finished:
+      status = "finished"
+    elif rate > 0:
+      status = f"ETA {max(0, state.total - done) / rate:.0f}s"
+    else:
+      status = "ETA unknown"
+    text = (
+      f"📣 Broadcast {state.id}: {done}/{state.total} {state.audience}, "
+      f"{state.failed} failed, {rate:.1f} msg/s, {status}"
+    )
+    return Message(_text=text, _recipient_id=ADMIN_CHAT)
+
+  async def _save(self, state: BroadcastState) -> None:
+    await asyncio.to_thread(self._write, state)
+
+  def _write(self, state: BroadcastState) -> None:
+    self._directory.mkdir(parents=True, exist_ok=True)
+    path = self._directory / f"{state.id}.json"
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(asdict(state), ensure_ascii=False), encoding="utf-8")
+    # renamed into place: a crash never leaves half-written progress behind
+    os.replace(tmp_path, path)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Running and finished broadcasts and the progress of the running ones.
+    """
+    return {
+      "active": len(self._active),
+      "finished": self._finished,
+      "pending_recipients": sum(
+        max(0, state.total - state.sent - state.failed) for state in self._active.values()
+      ),
+    }
+
+  async def close(self, timeout: float | None = None) -> None:
+    """
+    Stops running broadcasts after their current page (waiting at most `timeout` seconds,
+    then cancelling them). Their progress is saved, they are resumed on the next start.
+    """
+    self._stopping = True
+    tasks = set(self._tasks)
+    if tasks:
+      await asyncio.wait(tasks, timeout=timeout)
+    for task in tasks:
+      task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+broadcaster = Broadcaster(
+  directory=BROADCASTS_DIR,
+  page_size=BROADCAST_PAGE_SIZE,
+  report_interval=BROADCAST_REPORT_INTERVAL,
+  submit=lambda message, bot: send_scheduler.submit(message, bot, SendPriority.BULK),
+  report=send_messages,
+)
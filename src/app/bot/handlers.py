@@ -1,28 +1,129 @@
 import time
 import asyncio
+from typing import Awaitable, List, Set
 from aiogram import Router as TgRouter
 from aiogram.types import Message as TgMessage
 import logging
 
-from .message_handler import MessageHandler
+from .message_handler import MessageHandler, archiver
 from .router import Router
-from .sender import send_messages
+from .route_pool import RoutePool
+from .team_scheduler import TeamScheduler
+from .admission import AdmissionController
+from .sender import send_messages, track_sends, limiter, send_scheduler
+from .broadcast import broadcaster
+from .riddle_reloader import riddle_reloader
 from .mediagroup_collector import MediaGroupCollector
 from ..core import Message
+from ..db import MemberRepo, TeamRepo, RiddleRepo
+from ..storage import BlobStore, file_ids, riddle_assets
+from ..utils import Metrics
+from ...config import (
+  ROUTE_DISPATCH_MODE,
+  ROUTE_POOL_SIZE,
+  TEAM_MAILBOX_IDLE_TIMEOUT,
+  ADMISSION_HIGH_WATERMARK,
+  ADMISSION_LOW_WATERMARK,
+  ADMISSION_MAX_IN_FLIGHT,
+  ADMISSION_DUPLICATE_WINDOW,
+  MEDIA_GROUP_TIMEOUT,
+  MEDIA_GROUP_MIN_TIMEOUT,
+  MEDIA_GROUP_MAX_TIMEOUT,
+)
 
 tg_router = TgRouter()
 logger = logging.getLogger(__name__)
 
+route_pool = RoutePool(size=ROUTE_POOL_SIZE, route=Router.route)
+Metrics.register("route_pool", route_pool.stats)
+
+
+async def dispatch(core_msg: Message) -> List[Message]:
+  """
+  Routes the message according to ROUTE_DISPATCH_MODE:
+  either right away or through the bounded pool of routing workers.
+  """
+  if ROUTE_DISPATCH_MODE == "pool":
+    return await route_pool.submit(core_msg)
+  return await Router.route(core_msg)
+
+
+team_scheduler = TeamScheduler(
+  route=dispatch,
+  key=Router.ordering_key,
+  idle_timeout=TEAM_MAILBOX_IDLE_TIMEOUT,
+)
+Metrics.register("team_scheduler", team_scheduler.stats)
+
+async def is_registered(user_id: int) -> bool:
+  return await MemberRepo.get(user_id) is not None
+
+
+async def awaits_verification(user_id: int) -> bool:
+  # the same check as Router._route_player makes before handing a message to verification
+  member = await MemberRepo.get(user_id)
+  team = await TeamRepo.get(member.team_id) if member else None
+  riddle = await RiddleRepo.get(team.cur_stage) if team else None
+  return riddle is not None and riddle.verification_type()
+
+
+admission = AdmissionController(
+  high_watermark=ADMISSION_HIGH_WATERMARK,
+  low_watermark=ADMISSION_LOW_WATERMARK,
+  max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+  duplicate_window=ADMISSION_DUPLICATE_WINDOW,
+  is_registered=is_registered,
+  awaits_verification=awaits_verification,
+)
+Metrics.register("admission", admission.stats)
+
+
+async def route(core_msg: Message) -> List[Message]:
+  """
+  Routes the message in its team's order (see TeamScheduler)
+  unless it is shed by admission control.
+  """
+  return await admission.submit(core_msg, team_scheduler.submit)
+
 
 async def handle_ready_message(core_msg: Message):
-  response = Router.route(core_msg)
-  await send_messages(response, core_msg.bot)
+  # returns once the replies are sent: the album's items are done then (see MediaGroupCollector)
+  with track_sends() as sends:
+    response = await route(core_msg)
+    await send_messages(response, core_msg.bot)
+  if sends:
+    # not gather: cancelling this task at the shutdown deadline must not cancel the sends
+    await asyncio.wait(sends)
+
+
+background_tasks: Set[asyncio.Task] = set()
+
+
+def run_in_background(coro: Awaitable) -> asyncio.Task:
+  """
+  Runs the coroutine as a task which graceful shutdown waits for (see main.Lifecycle).
+  """
+  task = asyncio.ensure_future(coro)
+  background_tasks.add(task)
+  task.add_done_callback(background_tasks.discard)
+  return task
 
 
 collector = MediaGroupCollector(
-  timeout=0.25,
-  on_ready=lambda m: asyncio.ensure_future(handle_ready_message(m)),
+  timeout=MEDIA_GROUP_TIMEOUT,
+  on_ready=lambda m: run_in_background(handle_ready_message(m)),
+  min_timeout=MEDIA_GROUP_MIN_TIMEOUT,
+  max_timeout=MEDIA_GROUP_MAX_TIMEOUT,
 )
+Metrics.register("media_groups", collector.stats)
+Metrics.register("archive", archiver.stats)
+Metrics.register("blobs", BlobStore.stats)
+Metrics.register("file_ids", file_ids.stats)
+Metrics.register("riddle_assets", riddle_assets.stats)
+Metrics.register("send_limits", limiter.stats)
+Metrics.register("send_queue", send_scheduler.stats)
+Metrics.register("broadcasts", broadcaster.stats)
+Metrics.register("riddles", riddle_reloader.stats)
 
 @tg_router.message()
 async def handle_message(msg: TgMessage) -> None:
@@ -35,7 +136,7 @@ async def handle_message(msg: TgMessage) -> None:
   core_msg = await collector.add(msg)
 
   if core_msg:
-    response = Router.route(core_msg)
+    response = await route(core_msg)
     await send_messages(response, msg.bot)
 
 @tg_router.callback_query()
@@ -45,7 +146,7 @@ async def handle_callback(callback_query: TgMessage) -> None:
   """
   core_msg = await MessageHandler.from_tg(callback_query)
   if core_msg:
-    response = Router.route(core_msg)
+    response = await route(core_msg)
     await send_messages(response, callback_query.bot)
 
   await callback_query.answer()
@@ -1,49 +1,233 @@
-import time
+import heapq
 import asyncio
-from collections import defaultdict
-from typing import Dict, List, Callable
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Callable, Set, Tuple
 from aiogram.types import Message as TgMessage
 
 from .message_handler import MessageHandler
-from ..core import Message
+from .sender import track_future, create_untracked_task
+from ..core import Message, FileExtension
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Telegram albums have at most 10 items: a full group is flushed right away
+MAX_ALBUM_ITEMS = 10
+# inter-arrival gaps the adaptive timeout is computed from
+GAP_WINDOW = 512
+# gaps needed before the timeout starts to adapt
+MIN_GAP_SAMPLES = 20
+# the percentile is recomputed every this many gaps
+GAP_UPDATE_EVERY = 8
+# headroom over the p99 gap, so the slowest albums are not split by design
+GAP_MARGIN = 1.5
+# flushed group ids remembered to detect albums split by a too short timeout
+RECENT_GROUPS = 1000
 
 
 class MediaGroupCollector:
   """
   Collects Telegram media groups and converts them into a single core.Message.
+  A group is flushed `timeout` seconds after its last item arrived,
+  or right away once it has MAX_ALBUM_ITEMS items.
+
+  The timeout adapts to how fast Telegram delivers albums: it is the rolling p99
+  of gaps between items of one album times GAP_MARGIN, kept within [min_timeout, max_timeout]
+  (by default both equal `timeout`, i.e. the timeout is fixed).
+  Each item's attachments are referenced (and their archival started) as soon as
+  the item arrives, so at flush the message is only assembled.
+
+  Deadlines of all groups live in one heap served by a single timer task,
+  so an album costs a few heap pushes instead of a task (and a cancellation) per item.
+  Outdated heap entries (the group got a new item) are skipped when popped.
+  Groups which are due at the same time are flushed together in one batch.
+
+  `on_ready` may return the task handling the assembled message: every item of the group
+  is tracked (see track_future) until that task is done, so a supervisor worker acknowledges
+  album items only once the album is handled, not when it is buffered.
   """
   def __init__(
     self,
     timeout: float,
-    on_ready: Callable[[Message], None],
+    on_ready: Callable[[Message], asyncio.Future | None],
+    min_timeout: float | None = None,
+    max_timeout: float | None = None,
   ):
-    self._groups: Dict[str, List[TgMessage]] = defaultdict(list)
-    self._tasks: Dict[str, asyncio.Task] = {}
+    self._groups: Dict[str, List[TgMessage]] = {}
+    self._files: Dict[str, List[FileExtension]] = {}
+    self._handled: Dict[str, List[asyncio.Future]] = {}
+    self._deadlines: Dict[str, float] = {}
+    self._heap: List[Tuple[float, str]] = []
     self._timeout = timeout
+    self._min_timeout = timeout if min_timeout is None else min_timeout
+    self._max_timeout = timeout if max_timeout is None else max_timeout
     self._on_ready = on_ready
+    self._gaps: Deque[float] = deque(maxlen=GAP_WINDOW)
+    self._gap_p99: float | None = None
+    self._gap_samples = 0
+    self._started: Dict[str, float] = {}
+    self._last_arrival: Dict[str, float] = {}
+    self._recent: OrderedDict[str, None] = OrderedDict()
+    self._flushed = 0
+    self._flushed_full = 0
+    self._split = 0
+    self._latency_total = 0.0
+    self._latency_max = 0.0
+    self._timer: asyncio.Task | None = None
+    self._wakeup: asyncio.Event | None = None
+    self._flushing: Set[asyncio.Task] = set()
 
   async def add(self, msg: TgMessage) -> Message | None:
     if msg.media_group_id is None:
       return await MessageHandler.from_tg(msg)
 
     gid = msg.media_group_id
-    self._groups[gid].append(msg)
+    now = asyncio.get_running_loop().time()
+    msgs = self._groups.get(gid)
+    if msgs is None:
+      if gid in self._recent:
+        self._split += 1
+        logger.warning("Media group %s arrived after it was flushed", gid)
+      msgs = self._groups[gid] = []
+      self._started[gid] = now
+    else:
+      self._observe_gap(now - self._last_arrival[gid])
+    self._last_arrival[gid] = now
 
-    if gid in self._tasks:
-      self._tasks[gid].cancel()
-
-    self._tasks[gid] = asyncio.create_task(self._flush_later(gid))
+    msgs.append(msg)
+    self._files.setdefault(gid, []).extend(MessageHandler.files_from_tg(msg))
+    handled = asyncio.get_running_loop().create_future()
+    self._handled.setdefault(gid, []).append(handled)
+    track_future(handled)
+    if len(msgs) >= MAX_ALBUM_ITEMS:
+      self._schedule(gid, now)
+    else:
+      self._schedule(gid, now + self._timeout)
     return None
 
-  async def _flush_later(self, gid: str):
-    try:
-      await asyncio.sleep(self._timeout)
-    except asyncio.CancelledError:
+  def _observe_gap(self, gap: float) -> None:
+    self._gaps.append(gap)
+    # counted apart from the window, whose length stops growing once it is full
+    self._gap_samples += 1
+    # sorting the window on every item is wasteful, the percentile moves slowly anyway
+    if len(self._gaps) < MIN_GAP_SAMPLES or self._gap_samples % GAP_UPDATE_EVERY:
       return
+    gaps = sorted(self._gaps)
+    self._gap_p99 = gaps[min(len(gaps) - 1, int(len(gaps) * 0.99))]
+    self._timeout = min(self._max_timeout, max(self._min_timeout, self._gap_p99 * GAP_MARGIN))
+
+  def _schedule(self, gid: str, deadline: float) -> None:
+    self._deadlines[gid] = deadline
+    heapq.heappush(self._heap, (deadline, gid))
+
+    if self._timer is None or self._timer.done():
+      self._wakeup = asyncio.Event()
+      # outlives the update which started it, and so do the flushes it starts
+      self._timer = create_untracked_task(self._run_timer(), name="mediagroup-timer")
+    elif self._heap[0] == (deadline, gid):
+      # the new deadline is the earliest one: the timer may be sleeping for longer
+      self._wakeup.set()
+
+  def _pop_due(self, now: float) -> List[str]:
+    due = []
+    while self._heap and self._heap[0][0] <= now:
+      deadline, gid = heapq.heappop(self._heap)
+      if self._deadlines.get(gid) == deadline:
+        del self._deadlines[gid]
+        due.append(gid)
+    return due
 
+  async def _run_timer(self) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+      due = self._pop_due(loop.time())
+      if due:
+        task = asyncio.create_task(self._flush_batch(due))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+      self._wakeup.clear()
+      timeout = self._heap[0][0] - loop.time() if self._heap else None
+      try:
+        await asyncio.wait_for(self._wakeup.wait(), timeout)
+      except asyncio.TimeoutError:
+        pass
+
+  async def _flush_batch(self, gids: List[str]) -> None:
+    results = await asyncio.gather(*(self._flush(gid) for gid in gids), return_exceptions=True)
+    for gid, result in zip(gids, results):
+      if isinstance(result, Exception):
+        logger.error("Failed to flush media group %s", gid, exc_info=result)
+
+  async def _flush(self, gid: str):
     msgs = self._groups.pop(gid, [])
-    self._tasks.pop(gid, None)
+    files = self._files.pop(gid, [])
+    handled = self._handled.pop(gid, [])
+    started = self._started.pop(gid, None)
+    self._last_arrival.pop(gid, None)
+    if not msgs:
+      self._resolve(handled)
+      return
+
+    self._remember(gid)
+    ready = None
+    try:
+      core_msg = await MessageHandler.from_media_group(msgs, files)
+      ready = self._on_ready(core_msg)
+    finally:
+      # a group which failed to assemble counts as handled, like a failing update
+      if ready is None:
+        self._resolve(handled)
+      else:
+        ready.add_done_callback(lambda _: self._resolve(handled))
+
+    latency = asyncio.get_running_loop().time() - started
+    self._flushed += 1
+    self._flushed_full += len(msgs) >= MAX_ALBUM_ITEMS
+    self._latency_total += latency
+    self._latency_max = max(self._latency_max, latency)
+
+  @staticmethod
+  def _resolve(handled: List[asyncio.Future]) -> None:
+    for future in handled:
+      if not future.done():
+        future.set_result(None)
+
+  def _remember(self, gid: str) -> None:
+    self._recent[gid] = None
+    if len(self._recent) > RECENT_GROUPS:
+      self._recent.popitem(last=False)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Current timeout, observed gap p99, flushed/split albums
+    and album latency (first item to on_ready) in milliseconds.
+    """
+    return {
+      "timeout_ms": round(self._timeout * 1000, 1),
+      "gap_p99_ms": round(self._gap_p99 * 1000, 1) if self._gap_p99 is not None else None,
+      "pending_groups": len(self._groups),
+      "flushed": self._flushed,
+      "flushed_full": self._flushed_full,
+      "split_albums": self._split,
+      "latency_avg_ms": round(self._latency_total / self._flushed * 1000, 1) if self._flushed else 0.0,
+      "latency_max_ms": round(self._latency_max * 1000, 1),
+    }
 
-    if msgs:
-      core_msg = await MessageHandler.from_media_group(msgs)
-      self._on_ready(core_msg)
+  async def flush_all(self) -> int:
+    """
+    Flushes every pending group right away without waiting for its timeout
+    and waits for groups which are already being converted.
+    Used on shutdown; also stops the timer (it is restarted by the next add).
+    Returns the number of flushed groups.
+    """
+    if self._timer is not None:
+      self._timer.cancel()
+      self._timer = None
+    gids = list(self._groups)
+    self._deadlines.clear()
+    self._heap.clear()
+    await self._flush_batch(gids)
+    if self._flushing:
+      await asyncio.gather(*self._flushing, return_exceptions=True)
+    return len(gids)
@@ -1,15 +1,28 @@
-import io
 from aiogram import types
-from typing import List
+from typing import List, Tuple
 from uuid import uuid4
-from ..storage import upload_file, FILETYPE_TO_EXTENSION
+from ..storage import Archiver, FILETYPE_TO_EXTENSION
 from aiogram.types import Message as TgMessage
 from ..core import Message, FileExtension, FileType
-from ...config import AUTO_UPLOAD, ADMIN
+from ...config import (
+  AUTO_UPLOAD,
+  ADMIN,
+  ARCHIVE_WORKERS,
+  ARCHIVE_RETRIES,
+  ARCHIVE_RETRY_DELAY,
+  FILE_SPOOL_MAX_MEMORY,
+)
 
 import logging
 logger = logging.getLogger(__name__)
 
+archiver = Archiver(
+  workers=ARCHIVE_WORKERS,
+  retries=ARCHIVE_RETRIES,
+  retry_delay=ARCHIVE_RETRY_DELAY,
+  spool_max_memory=FILE_SPOOL_MAX_MEMORY,
+)
+
 
 class MessageHandler:
 
@@ -24,8 +37,12 @@ class MessageHandler:
     return message
 
   @staticmethod
-  async def from_media_group(msgs: List[TgMessage]) -> Message:
-    return await MessageHandler._build_message(msgs)
+  async def from_media_group(msgs: List[TgMessage], files: List[FileExtension] | None = None) -> Message:
+    """
+    Builds one message out of an album. `files` are the album's attachments
+    if they were already collected (see MediaGroupCollector).
+    """
+    return await MessageHandler._build_message(msgs, files)
   
   @staticmethod
   def _make_filename(filetype: FileType, original: str | None = None) -> str:
@@ -34,11 +51,6 @@ class MessageHandler:
     ext = FILETYPE_TO_EXTENSION.get(filetype, ".bin")
     return f"{uuid4().hex}{ext}"
   
-  @staticmethod
-  async def _maybe_upload(file: FileExtension) -> None:
-    if AUTO_UPLOAD and file.creator_id not in ADMIN:
-      await upload_file(file)
-  
   @staticmethod
   async def _build_callback_message(callback: TgMessage) -> Message:
     message = Message(
@@ -62,117 +74,78 @@ class MessageHandler:
     return f"user_{msg.from_user.id}"
 
   @staticmethod
-  async def _build_message(msgs: List[TgMessage]) -> Message:
-    files: List[FileExtension] = []
+  def _attachments(msg: TgMessage) -> List[Tuple[FileType, str, str, str | None, str]]:
+    """
+    (type, file_id, file_unique_id, original filename, additional data)
+    of every attachment of the message.
+    """
+    attachments = []
+
+    # ---- PHOTO ----
+    if msg.photo:
+      largest = max(msg.photo, key=lambda p: p.file_size or 0)
+      attachments.append((FileType.PHOTO, largest.file_id, largest.file_unique_id, None, ""))
+
+    # ---- VIDEO ----
+    if msg.video:
+      attachments.append((FileType.VIDEO, msg.video.file_id, msg.video.file_unique_id, msg.video.file_name, ""))
+
+    # ---- AUDIO + VOICE ----
+    if msg.audio or msg.voice:
+      audio = msg.audio or msg.voice
+      # sent back with the method matching the original kind
+      kind = "audio" if msg.audio else "voice"
+      attachments.append((FileType.AUDIO, audio.file_id, audio.file_unique_id, getattr(audio, "file_name", None), kind))
+
+    # ---- VIDEO_NOTE ----
+    if msg.video_note:
+      attachments.append((FileType.VIDEO_NOTE, msg.video_note.file_id, msg.video_note.file_unique_id, None, ""))
+
+    # ---- DOCUMENT ----
+    if msg.document:
+      attachments.append((FileType.DOCUMENT, msg.document.file_id, msg.document.file_unique_id, msg.document.file_name, ""))
+
+    # ---- STICKER ----
+    if msg.sticker:
+      attachments.append((FileType.STICKER, msg.sticker.file_id, msg.sticker.file_unique_id, None, msg.sticker.emoji or ""))
+
+    return attachments
+
+  @staticmethod
+  def _needs_archive(file: FileExtension) -> bool:
+    return AUTO_UPLOAD and file.creator_id not in ADMIN
+
+  @staticmethod
+  def files_from_tg(msg: TgMessage) -> List[FileExtension]:
+    """
+    Attachments of a single Telegram message as references to the files Telegram already hosts
+    (file_id, no bytes): they are sent on by file_id. With AUTO_UPLOAD they are queued
+    for archival, which downloads and stores them in the background (see storage.Archiver).
+    """
+    user_id = msg.from_user.id if msg.from_user else None
+    files = []
+    for filetype, file_id, file_unique_id, original, additional_data in MessageHandler._attachments(msg):
+      file = FileExtension(
+        type=filetype,
+        creator_id=user_id,
+        filename=MessageHandler._make_filename(filetype, original),
+        file_id=file_id,
+        file_unique_id=file_unique_id,
+        additional_data=additional_data,
+      )
+      if MessageHandler._needs_archive(file):
+        archiver.submit(file, msg.bot)
+      files.append(file)
+    return files
 
+  @staticmethod
+  async def _build_message(msgs: List[TgMessage], files: List[FileExtension] | None = None) -> Message:
     base = msgs[0]
     user_id = base.from_user.id if base.from_user else None
     tg_nickname = MessageHandler._get_tg_nickname(base)
 
-    for msg in msgs:
-
-      # ---- PHOTO ----
-      if msg.photo:
-        largest = max(msg.photo, key=lambda p: p.file_size or 0)
-        # downloading the file
-        downloaded = await msg.bot.download(largest.file_id)
-        file_bytes = downloaded.read()
-        downloaded.close()
-        
-        file = FileExtension(
-          type=FileType.PHOTO,
-          filedata=io.BytesIO(file_bytes),
-          creator_id=user_id,
-          filename=MessageHandler._make_filename(FileType.PHOTO),
-        )
-        await MessageHandler._maybe_upload(file)
-        files.append(file)
-
-      # ---- VIDEO ----
-      if msg.video:
-        downloaded = await msg.bot.download(msg.video.file_id)
-        file_bytes = downloaded.read()
-        downloaded.close()
-        
-        file = FileExtension(
-          type=FileType.VIDEO,
-          filedata=io.BytesIO(file_bytes),
-          creator_id=user_id,
-          filename=MessageHandler._make_filename(
-            FileType.VIDEO,
-            msg.video.file_name,
-          ),
-        )
-        await MessageHandler._maybe_upload(file)
-        files.append(file)
-
-      # ---- AUDIO + VOICE ----
-      if msg.audio or msg.voice:
-        audio = msg.audio or msg.voice
-        downloaded = await msg.bot.download(audio.file_id)
-        file_bytes = downloaded.read()
-        downloaded.close()
-        
-        file = FileExtension(
-          type=FileType.AUDIO,
-          filedata=io.BytesIO(file_bytes),
-          creator_id=user_id,
-          filename=MessageHandler._make_filename(
-            FileType.AUDIO,
-            getattr(audio, "file_name", None),
-          ),
-        )
-        await MessageHandler._maybe_upload(file)
-        files.append(file)
-
-      # ---- VIDEO_NOTE ----
-      if msg.video_note:
-        downloaded = await msg.bot.download(msg.video_note.file_id)
-        file_bytes = downloaded.read()
-        downloaded.close()
-        
-        file = FileExtension(
-          type=FileType.VIDEO_NOTE,
-          filedata=io.BytesIO(file_bytes),
-          creator_id=user_id,
-          filename=MessageHandler._make_filename(FileType.VIDEO_NOTE),
-        )
-        await MessageHandler._maybe_upload(file)
-        files.append(file)
-
-      # ---- DOCUMENT ----
-      if msg.document:
-        downloaded = await msg.bot.download(msg.document.file_id)
-        file_bytes = downloaded.read()
-        downloaded.close()
-        
-        file = FileExtension(
-          type=FileType.DOCUMENT,
-          filedata=io.BytesIO(file_bytes),
-          creator_id=user_id,
-          filename=MessageHandler._make_filename(
-            FileType.DOCUMENT,
-            msg.document.file_name,
-          ),
-        )
-        await MessageHandler._maybe_upload(file)
-        files.append(file)
-
-      # ---- STICKER ----
-      if msg.sticker:
-        downloaded = await msg.bot.download(msg.sticker.file_id)
-        file_bytes = downloaded.read()
-        downloaded.close()
-        
-        file = FileExtension(
-          type=FileType.STICKER,
-          filedata=io.BytesIO(file_bytes),
-          creator_id=user_id,
-          filename=MessageHandler._make_filename(FileType.STICKER),
-          additional_data=msg.sticker.emoji or "",
-        )
-        await MessageHandler._maybe_upload(file)
-        files.append(file)
+    if files is None:
+      files = [file for msg in msgs for file in MessageHandler.files_from_tg(msg)]
 
     return Message(
       _user_id=user_id,
@@ -0,0 +1,174 @@
+"""
+Outbound rate limiting of Telegram API calls.
+
+Telegram allows a bot about 30 messages per second overall, about one per second
+to a private chat and 20 per minute to a group. Every send takes a token from the
+global bucket and from its chat's bucket; when a bucket is empty the send waits
+instead of running into a 429. A 429 (TelegramRetryAfter) that happens anyway
+pauses the chat for `retry_after` seconds and the send is repeated.
+"""
+
+from __future__ import annotations
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.exceptions import TelegramRetryAfter
+
+import logging
+logger = logging.getLogger(__name__)
+
+# per-chat buckets kept before full (idle) ones are dropped
+MAX_CHAT_BUCKETS = 10000
+
+
+class TokenBucket:
+  """
+  `rate` tokens per second, at most `capacity` stored.
+  Tokens are taken in advance: the balance may go negative,
+  and reserve() returns how long the caller has to wait for its token.
+  Waiters are thereby served in the order they reserved.
+  """
+
+  def __init__(self, rate: float, capacity: float):
+    self.rate = rate
+    self.capacity = capacity
+    self._tokens = capacity
+    self._updated = time.monotonic()
+
+  def _refill(self, now: float) -> None:
+    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+    self._updated = now
+
+  def reserve(self) -> float:
+    now = time.monotonic()
+    self._refill(now)
+    self._tokens -= 1
+    return max(0.0, -self._tokens / self.rate)
+
+  def pause(self, seconds: float) -> None:
+    """
+    Gives no tokens for the next `seconds`.
+    """
+    self._refill(time.monotonic())
+    self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+  def full(self) -> bool:
+    self._refill(time.monotonic())
+    return self._tokens >= self.capacity
+
+
+class RateLimiter:
+  """
+  Global, per-chat and per-group token buckets in front of Telegram calls.
+  Chats with negative ids are groups and get the group limit.
+  A call failing with TelegramRetryAfter is repeated up to `max_retries` times.
+  """
+
+  def __init__(
+    self,
+    global_rate: float,
+    chat_rate: float,
+    chat_burst: int,
+    group_rate_per_minute: float,
+    max_retries: int,
+  ):
+    self._global = TokenBucket(global_rate, global_rate)
+    self._chat_rate = chat_rate
+    self._chat_burst = chat_burst
+    self._group_rate = group_rate_per_minute / 60
+    self._group_burst = group_rate_per_minute
+    self._max_retries = max_retries
+    self._chats: Dict[int, TokenBucket] = {}
+    self._backlog = 0
+    self._peak_backlog = 0
+    self._sent = 0
+    self._throttled = 0
+    self._retry_after = 0
+    self._wait_total = 0.0
+    self._wait_max = 0.0
+
+  def share(self, processes: int) -> None:
+    """
+    Leaves this process 1/`processes` of the global and the group limits, for processes
+    sending for the same bot (supervisor workers): Telegram counts all of them together.
+    Private chats keep their limit, each player's chat is served by one worker.
+    """
+    self._global = TokenBucket(self._global.rate / processes, max(1.0, self._global.capacity / processes))
+    self._group_rate /= processes
+    self._group_burst = max(1.0, self._group_burst / processes)
+    self._chats = {id: bucket for id, bucket in self._chats.items() if id >= 0}
+
+  def _bucket(self, chat_id: int) -> TokenBucket:
+    bucket = self._chats.get(chat_id)
+    if bucket is None:
+      if len(self._chats) >= MAX_CHAT_BUCKETS:
+        self._chats = {id: b for id, b in self._chats.items() if not b.full()}
+      if chat_id < 0:
+        bucket = TokenBucket(self._group_rate, self._group_burst)
+      else:
+        bucket = TokenBucket(self._chat_rate, self._chat_burst)
+      self._chats[chat_id] = bucket
+    return bucket
+
+  async def _acquire(self, chat_id: int) -> None:
+    started = time.monotonic()
+    # the chat's turn first, so a throttled chat doesn't hold global tokens
+    delay = self._bucket(chat_id).reserve()
+    if delay:
+      await asyncio.sleep(delay)
+    delay = self._global.reserve()
+    if delay:
+      await asyncio.sleep(delay)
+
+    waited = time.monotonic() - started
+    if waited > 0.001:
+      self._throttled += 1
+    self._wait_total += waited
+    self._wait_max = max(self._wait_max, waited)
+
+  async def run(self, chat_id: int, call: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Makes the Telegram call `call()` to `chat_id` within the limits.
+    """
+    self._backlog += 1
+    self._peak_backlog = max(self._peak_backlog, self._backlog)
+    try:
+      attempt = 0
+      while True:
+        await self._acquire(chat_id)
+        try:
+          result = await call()
+        except TelegramRetryAfter as e:
+          attempt += 1
+          self._retry_after += 1
+          if attempt > self._max_retries:
+            raise
+          logger.warning("Flood control for chat %s, retrying in %s s", chat_id, e.retry_after)
+          self._bucket(chat_id).pause(e.retry_after)
+          continue
+        self._sent += 1
+        return result
+    finally:
+      self._backlog -= 1
+
+  @property
+  def backlog(self) -> int:
+    """
+    Sends which are waiting for a token (or being made) right now.
+    """
+    return self._backlog
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Backlog, sent and throttled calls, 429s and the time spent waiting for tokens.
+    """
+    return {
+      "backlog": self._backlog,
+      "peak_backlog": self._peak_backlog,
+      "sent": self._sent,
+      "throttled": self._throttled,
+      "retry_after": self._retry_after,
+      "wait_avg_ms": round(self._wait_total / self._sent * 1000, 2) if self._sent else 0.0,
+      "wait_max_ms": round(self._wait_max * 1000, 2),
+    }
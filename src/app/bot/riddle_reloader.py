@@ -0,0 +1,171 @@
+"""
+Hot reload of riddles.
+
+/reload_riddles (or a change under RIDDLES_DIR, or of the riddle bundle with RIDDLE_BUNDLE,
+if watching is on) rebuilds the riddle set
+from the database and the riddle files in a background task, so updates keep being handled
+meanwhile: riddle files are read in a thread first, then the snapshot is loaded and swapped
+(see RiddleRepo.reload). Messages already queued keep the riddles they were built from.
+Admins get the list of stages which changed.
+"""
+
+from __future__ import annotations
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from ..core import Message
+from ..db import RiddleRepo
+from ..storage import riddle_assets
+from ..storage.paths import RIDDLES_DIR, RIDDLE_BUNDLE_PATH
+from .sender import send_messages
+from ...config import ADMIN_CHAT, RIDDLES_WATCH_INTERVAL, RIDDLE_BUNDLE
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class RiddleReloader:
+  """
+  Runs at most one reload at a time; `report` queues the summary to admins.
+  With `watch_interval` > 0, watch() polls `watched` (`directory` by default; a directory
+  or a single file) every that many seconds and reloads when a file appears, disappears
+  or changes its size or mtime.
+  Supervisor workers turn `command_enabled` off: the command would reload only
+  the worker which got it, while the others kept serving the old riddles.
+  """
+
+  def __init__(
+    self,
+    directory: Path,
+    watch_interval: float,
+    report: Callable[[Message, Any], Awaitable[None]],
+    watched: Path | None = None,
+  ):
+    self._directory = Path(directory)
+    self._watched = Path(watched) if watched is not None else self._directory
+    self._watch_interval = watch_interval
+    self._report = report
+    self._task: asyncio.Task | None = None
+    self._watcher: asyncio.Task | None = None
+    self._reloads = 0
+    self._failed = 0
+    self._last_duration = 0.0
+    self.command_enabled = True
+
+  async def request(self, bot: Any) -> Message:
+    """
+    Starts a reload unless one is running. Returns the reply to admins.
+    """
+    if not self.command_enabled:
+      return Message(
+        _text=(
+          "/reload_riddles is not available in multi-process mode, "
+          "restart the bot or set RIDDLES_WATCH_INTERVAL to reload on file changes."
+        ),
+        _recipient_id=ADMIN_CHAT,
+      )
+    if self.running:
+      return Message(_text="Riddle reload is already running.", _recipient_id=ADMIN_CHAT)
+    self._start(bot)
+    return Message(_text="Riddle reload started.", _recipient_id=ADMIN_CHAT)
+
+  @property
+  def running(self) -> bool:
+    return self._task is not None and not self._task.done()
+
+  def _start(self, bot: Any) -> asyncio.Task:
+    self._task = asyncio.create_task(self._reload(bot), name="riddle-reload")
+    return self._task
+
+  async def _reload(self, bot: Any) -> None:
+    started = time.monotonic()
+    try:
+      if not RIDDLE_BUNDLE:
+        # files are read here, off the event loop, so loading the snapshot only stats them
+        await asyncio.to_thread(riddle_assets.load_dir, self._directory)
+      old, new = await RiddleRepo.reload()
+    except Exception as e:
+      self._failed += 1
+      logger.exception("Riddle reload failed")
+      await self._report(Message(_text=f"Riddle reload failed, riddles are unchanged: {e}", _recipient_id=ADMIN_CHAT), bot)
+      return
+
+    self._reloads += 1
+    self._last_duration = time.monotonic() - started
+    diff = old.diff(new) if old else {"added": sorted(new.riddles), "removed": [], "changed": []}
+    logger.info("Riddles reloaded (version %s): %s", new.version, diff)
+    await self._report(Message(_text=self._summary(new.version, diff), _recipient_id=ADMIN_CHAT), bot)
+
+  def _summary(self, version: int, diff: Dict[str, List[int]]) -> str:
+    lines = [f"🔄 Riddles reloaded (version {version}) in {self._last_duration:.1f}s."]
+    for kind in ("changed", "added", "removed"):
+      if diff[kind]:
+        lines.append(f"{kind.capitalize()} stages: {', '.join(map(str, diff[kind]))}")
+    if len(lines) == 1:
+      lines.append("Nothing changed.")
+    return "\n".join(lines)
+
+  def _scan(self) -> Tuple[Tuple[str, int, int], ...]:
+    files = []
+    paths = self._watched.rglob("*") if self._watched.is_dir() else [self._watched]
+    for path in paths:
+      if path.is_file():
+        stat = path.stat()
+        files.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(files))
+
+  def watch(self, bot: Any) -> None:
+    """
+    Starts watching the riddle files if a watch interval is set.
+    """
+    if self._watch_interval > 0 and self._watcher is None:
+      self._watcher = asyncio.create_task(self._watch(bot), name="riddle-watch")
+
+  async def _watch(self, bot: Any) -> None:
+    seen = await asyncio.to_thread(self._scan)
+    while True:
+      await asyncio.sleep(self._watch_interval)
+      try:
+        current = await asyncio.to_thread(self._scan)
+      except OSError:
+        # a file vanished between listing and stat; look again next time
+        continue
+      if current != seen and not self.running:
+        seen = current
+        logger.info("Riddle files changed, reloading")
+        await self._start(bot)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Version of the live riddle set, finished and failed reloads.
+    """
+    snapshot = RiddleRepo.snapshot
+    return {
+      "version": snapshot.version if snapshot else None,
+      "running": self.running,
+      "reloads": self._reloads,
+      "failed": self._failed,
+      "last_duration_s": round(self._last_duration, 3),
+    }
+
+  async def close(self) -> None:
+    """
+    Stops watching and cancels a running reload; the live riddles stay as they are.
+    """
+    tasks = [task for task in (self._watcher, self._task) if task is not None]
+    for task in tasks:
+      task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    self._watcher = self._task = None
+
+
+riddle_reloader = RiddleReloader(
+  # resolved like the paths download_riddle_file asks the asset store for
+  directory=RIDDLES_DIR.resolve(),
+  watch_interval=RIDDLES_WATCH_INTERVAL,
+  report=send_messages,
+  # the bundle is rebuilt and renamed into place as a whole, its files are not read
+  watched=RIDDLE_BUNDLE_PATH if RIDDLE_BUNDLE else None,
+)
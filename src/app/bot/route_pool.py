@@ -0,0 +1,114 @@
+"""
+Bounded pool of routing workers.
+
+Routing is DB-bound: every message goes through MemberRepo/TeamRepo/RiddleRepo.
+RoutePool lets at most `size` messages be routed at once; the rest wait in a queue,
+so a burst of updates can't exhaust the database connection pool while the event loop
+keeps accepting updates and flushing media groups.
+"""
+
+from __future__ import annotations
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from ..core import Message
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class RoutePool:
+  """
+  Fixed-size pool of worker tasks which take messages from a FIFO queue and route them.
+  Workers are started lazily on the first submit, because they need a running event loop.
+  Exposes queue depth and wait time (time between submit and start of routing) via stats().
+  """
+
+  def __init__(
+    self,
+    size: int,
+    route: Callable[[Message], Awaitable[List[Message]]],
+  ):
+    if size < 1:
+      raise ValueError("RoutePool size must be positive")
+    self._size = size
+    self._route = route
+    self._queue: asyncio.Queue[Tuple[Message, asyncio.Future, float]] | None = None
+    self._workers: List[asyncio.Task] = []
+    self._busy = 0
+    self._routed = 0
+    self._failed = 0
+    self._wait_total = 0.0
+    self._wait_max = 0.0
+
+  @property
+  def size(self) -> int:
+    return self._size
+
+  async def submit(self, msg: Message) -> List[Message]:
+    """
+    Queues the message and waits until one of the workers routes it.
+    Exceptions raised by routing are re-raised here.
+    """
+    self._ensure_started()
+    future = asyncio.get_running_loop().create_future()
+    await self._queue.put((msg, future, time.monotonic()))
+    return await future
+
+  def _ensure_started(self) -> None:
+    if self._workers:
+      return
+    self._queue = asyncio.Queue()
+    self._workers = [
+      asyncio.create_task(self._worker(), name=f"route-worker-{i}")
+      for i in range(self._size)
+    ]
+
+  async def _worker(self) -> None:
+    while True:
+      msg, future, queued_at = await self._queue.get()
+      if future.cancelled():
+        self._queue.task_done()
+        continue
+      wait = time.monotonic() - queued_at
+      self._wait_total += wait
+      self._wait_max = max(self._wait_max, wait)
+      self._busy += 1
+      try:
+        result = await self._route(msg)
+        if not future.cancelled():
+          future.set_result(result)
+        self._routed += 1
+      except Exception as exc:
+        self._failed += 1
+        if not future.cancelled():
+          future.set_exception(exc)
+      finally:
+        self._busy -= 1
+        self._queue.task_done()
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Current numbers for sizing the pool:
+    queue depth, busy workers, routed/failed counters and wait times in milliseconds.
+    """
+    handled = self._routed + self._failed
+    return {
+      "size": self._size,
+      "busy": self._busy,
+      "queue_depth": self._queue.qsize() if self._queue else 0,
+      "routed": self._routed,
+      "failed": self._failed,
+      "wait_avg_ms": round(self._wait_total / handled * 1000, 2) if handled else 0.0,
+      "wait_max_ms": round(self._wait_max * 1000, 2),
+    }
+
+  async def close(self) -> None:
+    """
+    Stops all workers. Messages still in the queue are not routed.
+    """
+    for worker in self._workers:
+      worker.cancel()
+    await asyncio.gather(*self._workers, return_exceptions=True)
+    self._workers = []
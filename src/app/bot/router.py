@@ -1,9 +1,11 @@
-from typing import List
+from typing import Hashable, List
 from ..core import Message
 from ..db import MemberRepo, TeamRepo, RiddleRepo
 from ..services import RegistrationService, VerificationService
 from ..core import QuestEngine
 from ..core import AdminService
+from .broadcast import broadcaster, ORDERING_KEY as BROADCAST_KEY
+from .riddle_reloader import riddle_reloader
 from ...config import ADMIN, ADMIN_CHAT
 import logging
 logger = logging.getLogger(__name__)
@@ -14,7 +16,7 @@ class Router:
   """
 
   @classmethod
-  def route(cls, msg: Message) -> List[Message]:
+  async def route(cls, msg: Message) -> List[Message]:
     """
     Routes messages to appropriate services depending on context.
     """
@@ -22,15 +24,15 @@ class Router:
 
     # 1. Admin commands
     if cls._is_admin(user_id):
-      reply = cls._route_admin(msg)
+      reply = await cls._route_admin(msg)
 
     # 2. Registration
-    elif MemberRepo.get(user_id) is None:
-      reply = RegistrationService.handle_input(msg)
+    elif await MemberRepo.get(user_id) is None:
+      reply = await RegistrationService.handle_input(msg)
 
     # 3. Regular player
     else:
-      reply = cls._route_player(msg)
+      reply = await cls._route_player(msg)
 
     if isinstance(reply, Message):
       reply = [reply]
@@ -39,6 +41,33 @@ class Router:
         message.recipient_id = user_id if user_id not in ADMIN else ADMIN_CHAT
     return reply
 
+  @classmethod
+  async def ordering_key(cls, msg: Message) -> Hashable:
+    """
+    Returns the key whose updates must be routed strictly in order.
+    Updates which may change a team (answers, admin verdicts and feedback) are keyed
+    by the team, everything else (registration, other admin commands) by the user.
+    Broadcast commands share one key, so one supervisor worker runs all broadcasts.
+    """
+    user_id = msg.user_id
+    if cls._is_admin(user_id):
+      if msg.text.lower().startswith("/broadcast"):
+        return BROADCAST_KEY
+      team_id = msg.background_info.get("team_id")
+      if team_id is not None:
+        return ("team", int(team_id))
+      reply_text = msg.background_info.get("reply_text")
+      if reply_text:
+        team = await TeamRepo.get_by_name(VerificationService.team_name_from_reply(reply_text))
+        if team is not None:
+          return ("team", team.id)
+      return ("user", user_id)
+
+    member = await MemberRepo.get(user_id)
+    if member is None:
+      return ("user", user_id)
+    return ("team", member.team_id)
+
   @staticmethod
   def _is_admin(user_id: int) -> bool:
     """
@@ -47,7 +76,7 @@ class Router:
     return user_id in ADMIN
 
   @classmethod
-  def _route_admin(cls, msg: Message) -> Message | List[Message]:
+  async def _route_admin(cls, msg: Message) -> Message | List[Message]:
     """
     Routes admin messages to appropriate services.
     """
@@ -55,20 +84,29 @@ class Router:
 
     # TODO: put admin commands somewhere out of code
     if text.split("@")[0] == "/info_all":
-      return AdminService.get_all_teams_info()
+      return await AdminService.get_all_teams_info()
 
     if text.startswith("/info "):
       team_name = text.split(" ")[1]
-      return AdminService.get_team_info(team_name)
+      return await AdminService.get_team_info(team_name)
 
     if text.split("@")[0] == "/scoring_system":
       return AdminService.get_scoring_system()
     
     if text.split("@")[0] == "/help":
       return AdminService.get_help()
+
+    if text.split("@")[0] == "/stats":
+      return AdminService.get_stats()
+
+    if text.startswith("/broadcast"):
+      return await broadcaster.start(msg, msg.bot)
+
+    if text.split("@")[0] == "/reload_riddles":
+      return await riddle_reloader.request(msg.bot)
     
     if msg.background_info.get("reply_text", None) or msg.background_info.get("type", None) == "verification_verdict":
-      return VerificationService.handle_input(msg)
+      return await VerificationService.handle_input(msg)
 
     return Message(
       _user_id=msg.user_id,
@@ -76,22 +114,22 @@ class Router:
     )
 
   @classmethod
-  def _route_player(cls, msg: Message) -> Message | List[Message]:
+  async def _route_player(cls, msg: Message) -> Message | List[Message]:
     """
     Routes player messages to appropriate services.
     """
     logger.info("DEBUG ROUTER: Routing player message from user_id=%s", msg.user_id)
     text = msg.text.lower()
-    user = MemberRepo.get(msg.user_id)
+    user = await MemberRepo.get(msg.user_id)
     team_id = user.team_id
-    team = TeamRepo.get(team_id)
+    team = await TeamRepo.get(team_id)
     if team.cur_member_id != msg.user_id and msg.user_id not in ADMIN:
       team.cur_member_id = msg.user_id
-      TeamRepo.update(team, event="member switched")
+      await TeamRepo.update(team, event="member switched")
     if text == "/riddle":
-      return QuestEngine.get_riddle(team_id)
-    riddle = RiddleRepo.get(team.cur_stage)
+      return await QuestEngine.get_riddle(team_id)
+    riddle = await RiddleRepo.get(team.cur_stage)
     if riddle.verification_type():
-      return VerificationService.handle_input(msg)
+      return await VerificationService.handle_input(msg)
     # otherwise - handling answer
-    return QuestEngine.check_answer(team_id, msg)
+    return await QuestEngine.check_answer(team_id, msg)
@@ -0,0 +1,165 @@
+"""
+Prioritized outbound queue.
+
+Every chat has its own FIFO of messages, so messages to one chat go out in order,
+while a fixed pool of workers serves different chats at the same time: a slow upload
+to one player holds up only that player's later messages.
+Chats whose next message is more important are served first:
+admin traffic (verification prompts), then replies to players, then bulk messages.
+"""
+
+from __future__ import annotations
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Set, Tuple
+
+from ..core import Message
+from ..utils import Histogram
+
+import logging
+logger = logging.getLogger(__name__)
+
+# bounds of the queue depth (messages) and send latency (milliseconds) histograms
+DEPTH_BOUNDS = (1, 10, 100, 1000, 10000)
+LATENCY_BOUNDS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class SendPriority(IntEnum):
+  BULK = 0
+  REPLY = 1
+  ADMIN = 2
+
+
+@dataclass
+class SendJob:
+  """
+  A message waiting to be sent with the bot which sends it.
+  `done` gets True once the message is sent, False if sending failed.
+  """
+  message: Message
+  bot: Any
+  priority: SendPriority
+  queued_at: float
+  done: asyncio.Future
+
+
+class SendScheduler:
+  """
+  Per-chat queues served by `workers` tasks in the order of their head message's priority
+  (and of arrival within one priority). A chat is served by one worker at a time.
+  Workers are started lazily on the first submit, because they need a running event loop.
+  `send` delivers one message; its failures are logged and don't stop the chat's queue.
+  """
+
+  def __init__(self, send: Callable[[Message, Any], Awaitable[Any]], workers: int):
+    if workers < 1:
+      raise ValueError("SendScheduler needs at least one worker")
+    self._send = send
+    self._size = workers
+    self._chats: Dict[Hashable, Deque[SendJob]] = {}
+    self._active: Set[Hashable] = set()
+    self._ready: asyncio.PriorityQueue[Tuple[int, int, Hashable]] | None = None
+    self._workers: List[asyncio.Task] = []
+    self._seq = 0
+    self._depth = 0
+    self._peak_depth = 0
+    self._sent = 0
+    self._failed = 0
+    self._depth_hist = Histogram("depth", DEPTH_BOUNDS)
+    self._latency_hist = Histogram("latency_ms", LATENCY_BOUNDS_MS)
+
+  def submit(self, message: Message, bot: Any, priority: SendPriority) -> asyncio.Future:
+    """
+    Queues the message for its recipient and returns right away.
+    The returned future tells whether the message was sent; awaiting it is optional.
+    """
+    self._ensure_started()
+    chat = message.recipient_id
+    queue = self._chats.setdefault(chat, deque())
+    done = asyncio.get_running_loop().create_future()
+    queue.append(SendJob(message=message, bot=bot, priority=priority, queued_at=time.monotonic(), done=done))
+    self._depth += 1
+    self._peak_depth = max(self._peak_depth, self._depth)
+    self._depth_hist.observe(self._depth)
+    if len(queue) == 1 and chat not in self._active:
+      self._make_ready(chat)
+    return done
+
+  def _make_ready(self, chat: Hashable) -> None:
+    self._seq += 1
+    self._ready.put_nowait((-self._chats[chat][0].priority, self._seq, chat))
+
+  def _ensure_started(self) -> None:
+    if self._workers:
+      return
+    self._ready = asyncio.PriorityQueue()
+    self._workers = [
+      asyncio.create_task(self._worker(), name=f"send-worker-{i}")
+      for i in range(self._size)
+    ]
+
+  async def _worker(self) -> None:
+    while True:
+      _, _, chat = await self._ready.get()
+      queue = self._chats[chat]
+      job = queue.popleft()
+      self._active.add(chat)
+      sent = False
+      try:
+        await self._send(job.message, job.bot)
+        sent = True
+        self._sent += 1
+      except Exception:
+        self._failed += 1
+        logger.exception("Failed to send a message to %s", chat)
+      finally:
+        if not job.done.done():
+          job.done.set_result(sent)
+        self._active.discard(chat)
+        self._depth -= 1
+        self._latency_hist.observe((time.monotonic() - job.queued_at) * 1000)
+        # re-queued before task_done(), so join() can't return while the chat has messages
+        if queue:
+          self._make_ready(chat)
+        else:
+          del self._chats[chat]
+        self._ready.task_done()
+
+  async def join(self) -> None:
+    """
+    Waits until every queued message is sent (or has failed).
+    """
+    if self._ready is not None:
+      await self._ready.join()
+
+  @property
+  def depth(self) -> int:
+    return self._depth
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Queue depth, sent/failed counters and histograms of the depth seen by new messages
+    and of the latency from submit until the message is sent.
+    """
+    return {
+      "workers": self._size,
+      "depth": self._depth,
+      "peak_depth": self._peak_depth,
+      "chats": len(self._chats),
+      "sent": self._sent,
+      "failed": self._failed,
+      **self._depth_hist.as_dict(),
+      **self._latency_hist.as_dict(),
+    }
+
+  async def close(self) -> None:
+    """
+    Stops all workers. Messages still in the queues are not sent.
+    """
+    for worker in self._workers:
+      worker.cancel()
+    await asyncio.gather(*self._workers, return_exceptions=True)
+    self._workers = []
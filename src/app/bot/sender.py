@@ -1,88 +1,295 @@
+import asyncio
+import io
 import logging
-from typing import List
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import replace
+from typing import Any, AsyncGenerator, Awaitable, Callable, Iterator, List
 from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import (
   InputMediaPhoto,
   InputMediaVideo,
   InputMediaDocument,
-  BufferedInputFile
+  BufferedInputFile,
+  FSInputFile,
+  InputFile,
+)
+from aiogram.types import Message as TgMessage
+from ..core import Message, FileType, FileExtension
+from ..storage import file_ids, RiddleAsset
+from .rate_limiter import RateLimiter
+from .send_scheduler import SendScheduler, SendPriority
+from ...config import (
+  ADMIN,
+  ADMIN_CHAT,
+  SEND_GLOBAL_RATE,
+  SEND_CHAT_RATE,
+  SEND_CHAT_BURST,
+  SEND_GROUP_RATE_PER_MINUTE,
+  SEND_MAX_RETRIES,
+  SEND_WORKERS,
 )
-from ..core import Message, FileType
 logger = logging.getLogger(__name__)
 
+limiter = RateLimiter(
+  global_rate=SEND_GLOBAL_RATE,
+  chat_rate=SEND_CHAT_RATE,
+  chat_burst=SEND_CHAT_BURST,
+  group_rate_per_minute=SEND_GROUP_RATE_PER_MINUTE,
+  max_retries=SEND_MAX_RETRIES,
+)
+
+
+class SharedBufferInputFile(InputFile):
+  """
+  Upload straight from a read-only view of an in-memory buffer:
+  every send streams chunks of the same memory instead of copying the whole file.
+  """
+
+  def __init__(self, buffer: memoryview, filename: str):
+    super().__init__(filename=filename)
+    self.buffer = buffer
+
+  async def read(self, bot: Bot) -> AsyncGenerator[memoryview, None]:
+    for start in range(0, len(self.buffer), self.chunk_size):
+      yield self.buffer[start:start + self.chunk_size]
+
+
+def _input_file(file: FileExtension) -> str | InputFile:
+  """
+  Files Telegram already hosts are sent by file_id, the others are uploaded:
+  files on disk are streamed from their path, in-memory data (riddle assets included)
+  from a shared view of it.
+  Only other file-like objects are read into bytes.
+  """
+  if file.file_id:
+    return file.file_id
+
+  data = file.filedata
+  if isinstance(data, RiddleAsset):
+    if data.in_memory:
+      return SharedBufferInputFile(data.view(), filename=file.filename)
+    return FSInputFile(data.path, filename=file.filename)
+  if isinstance(data, io.BufferedReader) and isinstance(data.name, str) and os.path.isfile(data.name):
+    return FSInputFile(data.name, filename=file.filename)
+  if isinstance(data, io.BytesIO):
+    return SharedBufferInputFile(data.getbuffer().toreadonly(), filename=file.filename)
+
+  data.seek(0)
+  return BufferedInputFile(data.read(), filename=file.filename)
+
+
+def _sent_file_id(sent: TgMessage) -> str | None:
+  """
+  file_id Telegram assigned to the attachment of a sent message.
+  """
+  if sent.photo:
+    return sent.photo[-1].file_id
+  for kind in ("video", "document", "audio", "voice", "video_note", "sticker"):
+    attachment = getattr(sent, kind, None)
+    if attachment is not None:
+      return attachment.file_id
+  return None
+
+
+# parts of the TelegramBadRequest messages which mean that a file_id is no longer valid
+STALE_FILE_ID_ERRORS = (
+  "wrong file identifier",
+  "wrong remote file identifier",
+  "file reference expired",
+  "file_reference_expired",
+)
+
+
+def _is_stale_file_id(error: TelegramBadRequest) -> bool:
+  message = error.message.lower()
+  return any(part in message for part in STALE_FILE_ID_ERRORS)
+
+
+def _with_cached_file_id(file: FileExtension) -> FileExtension:
+  """
+  Riddle files (those with a cache_key) get the file_id cached right now:
+  riddles are loaded once, so the id can't be stored in them.
+  """
+  if not file.cache_key:
+    return file
+  return replace(file, file_id=file_ids.get(file.cache_key))
+
+
+async def _send_files(
+  files: List[FileExtension],
+  send: Callable[[List[FileExtension]], Awaitable[TgMessage | List[TgMessage]]],
+) -> Any:
+  """
+  Sends the files with `send`, riddle files by their cached file_ids,
+  and remembers file_ids of uploaded riddle files.
+  If Telegram refuses a cached file_id as invalid, it is dropped from the cache
+  and the files are sent once more, uploaded; other errors are raised as they are.
+  """
+  files = [_with_cached_file_id(file) for file in files]
+  try:
+    sent = await send(files)
+  except TelegramBadRequest as e:
+    if not _is_stale_file_id(e) or not any(file.cache_key and file.file_id for file in files):
+      raise
+    for file in files:
+      if file.cache_key and file.file_id:
+        # another send may have stored a fresh id meanwhile, only the refused one goes
+        file_ids.invalidate(file.cache_key, file.file_id)
+    files = [replace(file, file_id=None) if file.cache_key else file for file in files]
+    sent = await send(files)
+
+  for file, sent_msg in zip(files, sent if isinstance(sent, list) else [sent]):
+    if file.cache_key and not file.file_id:
+      file_id = _sent_file_id(sent_msg)
+      if file_id:
+        file_ids.put(file.cache_key, file_id)
+  return sent
+
+
+MEDIA_GROUP_TYPES = {
+  FileType.PHOTO: InputMediaPhoto,
+  FileType.VIDEO: InputMediaVideo,
+  FileType.DOCUMENT: InputMediaDocument,
+}
+
 
-async def send_messages(messages: Message | List[Message], bot):
+async def _send_single(tg_bot, chat_id: int, file: FileExtension, caption: str | None) -> TgMessage | None:
   """
-  Sends core.Message via Telegram bot.
+  Sends a file which can't be a part of a media group.
+  """
+  input_file = _input_file(file)
+
+  if file.type == FileType.AUDIO and file.additional_data == "audio":
+    call = lambda: tg_bot.send_audio(chat_id=chat_id, audio=input_file, caption=caption)
+  elif file.type == FileType.AUDIO:
+    call = lambda: tg_bot.send_voice(chat_id=chat_id, voice=input_file, caption=caption)
+  elif file.type == FileType.VIDEO_NOTE:
+    call = lambda: tg_bot.send_video_note(chat_id=chat_id, video_note=input_file)
+  elif file.type == FileType.STICKER:
+    call = lambda: tg_bot.send_sticker(chat_id=chat_id, sticker=input_file)
+  else:
+    return None
+  return await limiter.run(chat_id, call)
+
+
+def _priority(message: Message) -> SendPriority:
+  """
+  Messages to admins (verification prompts, admin replies) go first, then replies to players.
+  """
+  if message.recipient_id == ADMIN_CHAT or message.recipient_id in ADMIN:
+    return SendPriority.ADMIN
+  return SendPriority.REPLY
+
+
+# futures of the sends queued inside track_sends()
+_tracked_sends: ContextVar[List[asyncio.Future] | None] = ContextVar("tracked_sends", default=None)
+
+
+@contextmanager
+def track_sends() -> Iterator[List[asyncio.Future]]:
+  """
+  Collects the futures (see SendScheduler.submit) of all messages queued inside the block,
+  by tasks started in it too, so the caller can wait until they are sent.
+  """
+  futures: List[asyncio.Future] = []
+  token = _tracked_sends.set(futures)
+  try:
+    yield futures
+  finally:
+    _tracked_sends.reset(token)
+
+
+def track_future(future: asyncio.Future) -> None:
+  """
+  Makes the enclosing track_sends() (if any) wait for the future as well,
+  for work which finishes after the block (albums are sent once their group is flushed).
+  """
+  tracked = _tracked_sends.get()
+  if tracked is not None:
+    tracked.append(future)
+
+
+def create_untracked_task(coro: Awaitable, name: str | None = None) -> asyncio.Task:
+  """
+  Starts a task outside of track_sends(), for long-lived tasks (timers, broadcasts)
+  started while handling an update: their sends don't belong to that update.
+  """
+  context = copy_context()
+  context.run(_tracked_sends.set, None)
+  # the task copies the context it is created in
+  return context.run(asyncio.create_task, coro, name=name)
+
+
+async def send_messages(
+  messages: Message | List[Message],
+  bot,
+  priority: SendPriority | None = None,
+) -> None:
+  """
+  Queues core.Message(s) for sending via Telegram bot (see SendScheduler) and returns right away.
+  Without an explicit priority it is derived from the recipient.
   """
   if isinstance(messages, Message):
     messages = [messages]
 
   for message in messages:
     if message.recipient_id is None:
-      return
-
-    # TODO: work out what to do using TGMember
-    tg_bot = message.bot or bot
-
-    # ---------- MEDIA ----------
-    if message.files:
-      media = []
-      caption_used = False
-
-      for idx, file in enumerate(message.files):
-        caption = None
-        if not caption_used and message.text:
-          caption = message.text
-          caption_used = True
-
-        file.filedata.seek(0)  # BufferedReader
-        file_bytes = file.filedata.read()
-        input_file = BufferedInputFile(file_bytes, filename=file.filename)
-
-        # ---- MEDIA GROUP ALLOWED ----
-        if file.type == FileType.PHOTO:
-          media.append(InputMediaPhoto(media=input_file, caption=caption))
-
-        elif file.type == FileType.VIDEO:
-          media.append(InputMediaVideo(media=input_file, caption=caption))
-
-        elif file.type == FileType.DOCUMENT:
-          media.append(InputMediaDocument(media=input_file, caption=caption))
-
-        # ---- SEPARATE SEND ----
-        elif file.type == FileType.AUDIO:
-          await tg_bot.send_voice(
-            chat_id=message.recipient_id,
-            voice=input_file,
-            caption=caption,
-          )
-
-        elif file.type == FileType.VIDEO_NOTE:
-          await tg_bot.send_video_note(
-            chat_id=message.recipient_id,
-            video_note=input_file,
-          )
-
-        elif file.type == FileType.STICKER:
-          await tg_bot.send_sticker(
-            chat_id=message.recipient_id,
-            sticker=input_file,
-          )
-
-      if media:
-        await tg_bot.send_media_group(
+      continue
+    done = send_scheduler.submit(message, message.bot or bot, priority if priority is not None else _priority(message))
+    track_future(done)
+
+
+async def deliver(message: Message, tg_bot) -> None:
+  """
+  Sends one core.Message via Telegram bot, within the rate limits.
+  """
+  # ---------- MEDIA ----------
+  if message.files:
+    grouped = []
+    caption_used = False
+
+    for idx, file in enumerate(message.files):
+      caption = None
+      if not caption_used and message.text:
+        caption = message.text
+        caption_used = True
+
+      # ---- MEDIA GROUP ALLOWED ----
+      if file.type in MEDIA_GROUP_TYPES:
+        grouped.append((file, caption))
+        continue
+
+      # ---- SEPARATE SEND ----
+      await _send_files([file], lambda files, caption=caption: _send_single(
+        tg_bot, message.recipient_id, files[0], caption,
+      ))
+
+    if grouped:
+      captions = [caption for _, caption in grouped]
+      await _send_files([file for file, _ in grouped], lambda files: limiter.run(
+        message.recipient_id,
+        lambda: tg_bot.send_media_group(
           chat_id=message.recipient_id,
-          media=media,
-        )
+          media=[
+            MEDIA_GROUP_TYPES[file.type](media=_input_file(file), caption=caption)
+            for file, caption in zip(files, captions)
+          ],
+        ),
+      ))
 
-      continue
+    return
+
+  # ---------- TEXT ----------
+  await limiter.run(message.recipient_id, lambda: tg_bot.send_message(
+    chat_id=message.recipient_id,
+    text=message.text,
+    reply_markup=message.reply_markup,
+  ))
+
+  logger.info(f"[SEND] → {message.recipient_id}: {message.text}")
 
-    # ---------- TEXT ----------
-    await tg_bot.send_message(
-      chat_id=message.recipient_id,
-      text=message.text,
-      reply_markup=message.reply_markup,
-    )
 
-    logger.info(f"[SEND] → {message.recipient_id}: {message.text}")
+send_scheduler = SendScheduler(send=deliver, workers=SEND_WORKERS)
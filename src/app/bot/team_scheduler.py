@@ -0,0 +1,104 @@
+"""
+Per-team ordered processing of updates.
+
+Every team gets its own mailbox: a FIFO queue drained by a single task, so updates of one
+team are routed strictly one after another (no double-advance on simultaneous answers),
+while different teams are routed in parallel. Mailboxes which stay idle for a while are
+dropped together with their tasks.
+"""
+
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+from ..core import Message
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Mailbox:
+  """
+  Queue of pending updates of one team and the task which drains it.
+  """
+  queue: asyncio.Queue[Tuple[Message, asyncio.Future]] = field(default_factory=asyncio.Queue)
+  task: asyncio.Task | None = None
+
+
+class TeamScheduler:
+  """
+  Routes messages through per-key mailboxes (actor-style).
+  `key` maps a message to its ordering key (see Router.ordering_key),
+  `route` does the actual routing.
+  """
+
+  def __init__(
+    self,
+    route: Callable[[Message], Awaitable[List[Message]]],
+    key: Callable[[Message], Awaitable[Hashable]],
+    idle_timeout: float,
+  ):
+    self._route = route
+    self._key = key
+    self._idle_timeout = idle_timeout
+    self._mailboxes: Dict[Hashable, Mailbox] = {}
+    self._collected = 0
+
+  async def submit(self, msg: Message) -> List[Message]:
+    """
+    Puts the message into its team's mailbox and waits for the routing result.
+    """
+    key = await self._key(msg)
+    mailbox = self._mailboxes.get(key)
+    if mailbox is None:
+      mailbox = Mailbox()
+      mailbox.task = asyncio.create_task(self._drain(key, mailbox), name=f"mailbox-{key}")
+      self._mailboxes[key] = mailbox
+
+    future = asyncio.get_running_loop().create_future()
+    mailbox.queue.put_nowait((msg, future))
+    return await future
+
+  async def _drain(self, key: Hashable, mailbox: Mailbox) -> None:
+    while True:
+      try:
+        msg, future = await asyncio.wait_for(mailbox.queue.get(), self._idle_timeout)
+      except asyncio.TimeoutError:
+        # nothing can be enqueued between the timeout and this check (single thread, no await)
+        if mailbox.queue.empty():
+          self._mailboxes.pop(key, None)
+          self._collected += 1
+          return
+        continue
+
+      if future.cancelled():
+        continue
+      try:
+        result = await self._route(msg)
+        if not future.cancelled():
+          future.set_result(result)
+      except Exception as exc:
+        if not future.cancelled():
+          future.set_exception(exc)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Number of live mailboxes, the longest backlog and how many idle mailboxes were collected.
+    """
+    return {
+      "mailboxes": len(self._mailboxes),
+      "max_backlog": max((m.queue.qsize() for m in self._mailboxes.values()), default=0),
+      "collected": self._collected,
+    }
+
+  async def close(self) -> None:
+    """
+    Stops all mailbox tasks. Pending updates are not routed.
+    """
+    tasks = [m.task for m in self._mailboxes.values() if m.task]
+    for task in tasks:
+      task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    self._mailboxes.clear()
@@ -0,0 +1,148 @@
+"""
+Webhook runtime mode.
+
+Telegram pushes updates to an aiohttp server instead of the bot long-polling them.
+Every request is checked against the secret token (required, so nobody else
+can post updates to the public endpoint) and answered with 200 right away;
+the update itself is processed in the background, at most WEBHOOK_MAX_CONCURRENCY at once.
+"""
+
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, List
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from ..utils import Metrics
+from ...config import (
+  WEBHOOK_URL,
+  WEBHOOK_PATH,
+  WEBHOOK_SECRET,
+  WEBHOOK_HOST,
+  WEBHOOK_PORT,
+  WEBHOOK_MAX_CONCURRENCY,
+)
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+  """
+  Webhook request handler which answers Telegram immediately and limits
+  how many updates are processed concurrently in the background.
+  """
+
+  def __init__(
+    self,
+    dispatcher: Dispatcher,
+    bot: Bot,
+    max_concurrency: int,
+    secret_token: str | None = None,
+    **data: Any,
+  ):
+    super().__init__(
+      dispatcher=dispatcher,
+      bot=bot,
+      handle_in_background=True,
+      secret_token=secret_token,
+      **data,
+    )
+    self._semaphore = asyncio.Semaphore(max_concurrency)
+    self._received = 0
+    self._processing = 0
+
+  async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+    self._received += 1
+    async with self._semaphore:
+      self._processing += 1
+      try:
+        await super()._background_feed_update(bot, update)
+      finally:
+        self._processing -= 1
+
+  async def wait_pending(self) -> None:
+    """
+    Waits until all updates which were already accepted are processed,
+    including those still waiting for a slot. Cancelling it cancels them.
+    """
+    while pending := list(self._background_feed_update_tasks):
+      await asyncio.gather(*pending, return_exceptions=True)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Accepted updates and how many of them are being processed or waiting for a slot.
+    """
+    pending = len(self._background_feed_update_tasks)
+    return {
+      "received": self._received,
+      "processing": self._processing,
+      "waiting": pending - self._processing,
+    }
+
+
+WEBHOOK_HANDLER_KEY = web.AppKey("webhook_handler", BoundedRequestHandler)
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot) -> web.Application:
+  """
+  Creates the aiohttp application which serves Telegram updates on WEBHOOK_PATH.
+  """
+  app = web.Application()
+  handler = BoundedRequestHandler(
+    dispatcher=dp,
+    bot=bot,
+    max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+    secret_token=WEBHOOK_SECRET,
+  )
+  handler.register(app, path=WEBHOOK_PATH)
+  setup_application(app, dp, bot=bot)
+  app[WEBHOOK_HANDLER_KEY] = handler
+  Metrics.register("webhook", handler.stats)
+  return app
+
+
+async def run_webhook(
+  dp: Dispatcher,
+  bot: Bot,
+  allowed_updates: List[str] | None = None,
+  stop: asyncio.Event | None = None,
+  pending_timeout: float | None = None,
+) -> None:
+  """
+  Registers the webhook in Telegram and serves updates until the stop event is set
+  (or until cancelled). Telegram was answered for every accepted update already, so they
+  are all processed before the server (and with it the bot session) is closed; the ones
+  not done within `pending_timeout` seconds are cancelled.
+  By default asks Telegram only for update types the dispatcher has handlers for.
+  """
+  if not WEBHOOK_URL:
+    raise RuntimeError("WEBHOOK_URL is not set in .env")
+  if not WEBHOOK_SECRET:
+    raise RuntimeError("WEBHOOK_SECRET is not set in .env")
+
+  app = build_webhook_app(dp, bot)
+  runner = web.AppRunner(app)
+  await runner.setup()
+  site = web.TCPSite(runner, host=WEBHOOK_HOST, port=WEBHOOK_PORT)
+  await site.start()
+
+  await bot.set_webhook(
+    url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+    secret_token=WEBHOOK_SECRET,
+    allowed_updates=allowed_updates or dp.resolve_used_update_types(),
+  )
+  logger.info("Webhook server is listening on %s:%s%s", WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH)
+
+  try:
+    await (stop or asyncio.Event()).wait()
+  finally:
+    await site.stop()
+    handler = app[WEBHOOK_HANDLER_KEY]
+    try:
+      await asyncio.wait_for(handler.wait_pending(), pending_timeout)
+    except asyncio.TimeoutError:
+      logger.warning("Webhook updates were not processed within %ss and are cancelled", pending_timeout)
+    await runner.cleanup()
@@ -8,6 +8,7 @@ RiddleRepo) and formats Message objects that can be sent to admins.
 from __future__ import annotations
 from .basic_classes import Message
 from ..db import TeamRepo, MemberRepo
+from ..utils import Metrics
 from ...config import ADMIN_CHAT
 from ..exceptions import TeamNotFound
 
@@ -19,15 +20,15 @@ class AdminService:
   """
 
   @staticmethod
-  def get_team_info(team_name: str) -> Message:
+  async def get_team_info(team_name: str) -> Message:
     """
     Get detailed info about a specific team.
     Raises TeamNotFound if the team does not exist."""
-    team = TeamRepo.get_by_name(team_name)
+    team = await TeamRepo.get_by_name(team_name)
     if not team:
       raise TeamNotFound(f"Team {team_name} not found")
 
-    members = MemberRepo.get_by_team(team.id)
+    members = await MemberRepo.get_by_team(team.id)
     print(members)
     member_names = [m.tg_nickname for m in members]
     text = (
@@ -42,14 +43,14 @@ class AdminService:
     return reply
 
   @staticmethod
-  def get_all_teams_info() -> Message:
+  async def get_all_teams_info() -> Message:
     """
     Get brief info about all registered teams.
     Sorted by:
     1. Score (DESC - highest first)
     2. Time of arrival (ASC - earliest first)
     """
-    teams = TeamRepo.get_all()
+    teams = await TeamRepo.get_all()
     if not teams or len(teams) == 0:
       reply = Message(_text="No teams registered yet.")
       reply.recipient_id = ADMIN_CHAT
@@ -121,8 +122,29 @@ class AdminService:
       "/help - returns admin manual with all existing commands;\n"
       "/info [team_name] - returns all data about the chosen team;\n"
       "/info_all - gets general data anout all team sorted by score;\n"
-      "/scoring_system - gets info about the scoring system."
+      "/scoring_system - gets info about the scoring system;\n"
+      "/broadcast teams|members [text] - sends the text and attached files to every team or member;\n"
+      "/reload_riddles - reloads riddles from the database and storage without a restart (single-process mode only);\n"
+      "/stats - returns runtime statistics (queues, workers etc.)."
     )
     reply = Message(_text=text)
     reply.recipient_id = ADMIN_CHAT
     return reply
+
+  @staticmethod
+  def get_stats() -> Message:
+    """
+    Returns runtime statistics of all registered components (see utils.Metrics).
+    """
+    snapshot = Metrics.snapshot()
+    if not snapshot:
+      text = "No statistics available yet."
+    else:
+      blocks = []
+      for name, values in snapshot.items():
+        lines = [f"{key}: {value}" for key, value in values.items()]
+        blocks.append(f"{name}\n" + "\n".join(lines))
+      text = "📊 Stats:<pre>" + "\n\n".join(blocks) + "</pre>"
+    reply = Message(_text=text)
+    reply.recipient_id = ADMIN_CHAT
+    return reply
@@ -28,12 +28,18 @@ class FileType(str, Enum):
 class FileExtension:
   """
   Represents a file attached to a riddle or message.
+  Holds either the file's data or, for files Telegram already hosts,
+  just its file_id (file_unique_id identifies the same file across bots).
+  Riddle files carry a cache_key under which their file_id is remembered after upload.
   """
 
   type: FileType
   creator_id: int
   filename: str | None = None
   filedata: Any | None = None
+  file_id: str | None = None
+  file_unique_id: str | None = None
+  cache_key: str | None = None
   team_id: int | None = None
   creation_time: int = field(
     default_factory=lambda: datetime.now(timezone(timedelta(hours=3)))
@@ -115,6 +121,13 @@ class Riddle:
   files: List[List[FileExtension]] = field(default_factory=list)
   type: str = "db"
 
+  def message_copies(self) -> List[Message]:
+    """
+    Copies of the riddle's messages, ready to be addressed to a recipient:
+    the riddle itself is shared by all teams and must not be changed.
+    """
+    return [message.copy() for message in self.messages]
+
   def verification_type(self):
     if self.type == "verification":
       return True
@@ -21,31 +21,31 @@ class QuestEngine:
   everything to other services.
   """
   @staticmethod
-  def get_riddle(team_id: int) -> List[Message]:
+  async def get_riddle(team_id: int) -> List[Message]:
     """
     Return current riddle for team by reading its stage and fetching riddle.
     """
-    team = TeamRepo.get(team_id)
+    team = await TeamRepo.get(team_id)
     if team is None:
       logger.exception("Error while checking answer: team %s not found", team_id)
       raise TeamError(f"Team {team_id} not found")
-    riddle = RiddleRepo.get(team.cur_stage)
+    riddle = await RiddleRepo.get(team.cur_stage)
     if riddle is None:
       logger.exception("Error while checking answer: riddle %s not found", team.cur_stage)
       raise RiddleError(f"Riddle for stage {team.cur_stage} not found")
-    return riddle.messages
+    return riddle.message_copies()
 
   @staticmethod
-  def check_answer(team_id: int, message: Message) -> Message | List[Message]:
+  async def check_answer(team_id: int, message: Message) -> Message | List[Message]:
     """
     Checks if the provided answer is correct
     """
-    team = TeamRepo.get(team_id)
+    team = await TeamRepo.get(team_id)
     if team is None:
       logger.exception("Error while checking answer: team %s not found", team_id)
       raise TeamError(f"Team {team_id} not found")
 
-    riddle = RiddleRepo.get(team.cur_stage)
+    riddle = await RiddleRepo.get(team.cur_stage)
     if riddle is None:
       logger.exception("Error while checking answer: riddle %s not found", team.cur_stage)
       raise RiddleError(f"Riddle for stage {team.cur_stage} not found")
@@ -57,21 +57,21 @@ class QuestEngine:
       raise AnswerError("Failed to validate answer")
 
     if correct:
-      return QuestEngine.correct_answer_pipeline(team)
+      return await QuestEngine.correct_answer_pipeline(team)
       
     # if the answer is incorrect
     return QuestEngine.wrong_answer_pipeline(team)
   
   @staticmethod
-  def correct_answer_pipeline(team: Team) -> List[Message]:
+  async def correct_answer_pipeline(team: Team) -> List[Message]:
     team.next_stage()
-    TeamRepo.update(team, event="correct answer")
+    await TeamRepo.update(team, event="correct answer")
     reply1 = Message(
       _text="Ответ верный! Переходим на следующий этап."
     )
     reply1.recipient_id = team.cur_member_id
-    new_riddle = RiddleRepo.get(team.cur_stage)
-    reply2 = new_riddle.messages
+    new_riddle = await RiddleRepo.get(team.cur_stage)
+    reply2 = new_riddle.message_copies()
     for message in reply2:
       message.recipient_id = team.cur_member_id
     reply = [reply1] + reply2
@@ -1,53 +1,74 @@
 from __future__ import annotations
 
 import logging
-from contextlib import contextmanager
-from typing import Any, Dict, List, Generator
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, AsyncGenerator
 from ...config import DATABASE_URL
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(
-  DATABASE_URL,
+# plain driver names mapped to their asyncio counterparts
+ASYNC_DRIVERS = {
+  "sqlite": "sqlite+aiosqlite",
+  "postgresql": "postgresql+asyncpg",
+  "postgres": "postgresql+asyncpg",
+}
+
+
+def async_url(url: str) -> str:
+  """
+  Turns a plain database URL (e.g. sqlite:///data/quest.db) into the one
+  with an asyncio driver, so old .env files keep working.
+  URLs which already name a driver are returned unchanged.
+  """
+  scheme, sep, rest = url.partition("://")
+  if not sep or "+" in scheme:
+    return url
+  return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+engine = create_async_engine(
+  async_url(DATABASE_URL),
   pool_pre_ping=True,
 )
 
-SessionFactory = sessionmaker(bind=engine)
+SessionFactory = async_sessionmaker(bind=engine, expire_on_commit=False)
 
 
 class DB:
   """
   Low-level DB access layer.
   Provides atomic operations via context-managed sessions.
+  All operations are coroutines, so a slow query never blocks the event loop.
   """
 
   @staticmethod
-  @contextmanager
-  def session() -> Generator[Session, None, None]:
+  @asynccontextmanager
+  async def session() -> AsyncGenerator[AsyncSession, None]:
     """
-    Context manager for a database session.
+    Async context manager for a database session.
     Commits the session if no exceptions occur, otherwise rolls back.
     """
     session = SessionFactory()
     try:
       yield session
-      session.commit()
+      await session.commit()
     except Exception:
-      session.rollback()
+      await session.rollback()
       raise
     finally:
-      session.close()
+      await session.close()
 
   @staticmethod
-  def select(*, table: str, where: Dict[str, Any] | None = None,
-             columns: str = "*") -> List[Dict[str, Any]]:
+  async def select(*, table: str, where: Dict[str, Any] | None = None,
+                   columns: str = "*") -> List[Dict[str, Any]]:
     """
     Makes a SELECT query to the database via SQLAlchemy
     """
-    with DB.session() as session:
+    async with DB.session() as session:
       sql = f"SELECT {columns} FROM {table}"
       params: Dict[str, Any] = {}
 
@@ -60,33 +81,84 @@ class DB:
 
       logger.debug(f"SQL SELECT: {sql} | params={params}")
 
-      result = session.execute(text(sql), params)
+      result = await session.execute(text(sql), params)
+      return [dict(row._mapping) for row in result]
+
+  @staticmethod
+  async def select_in(*, table: str, column: str, values: List[Any],
+                      columns: str = "*") -> List[Dict[str, Any]]:
+    """
+    Makes a SELECT of all rows whose `column` is one of `values` (WHERE column IN (...)),
+    so rows of many parents are fetched in one query.
+    """
+    if not values:
+      return []
+    async with DB.session() as session:
+      sql = f"SELECT {columns} FROM {table} WHERE {column} IN :values"
+      params = {"values": list(values)}
+
+      logger.debug(f"SQL SELECT: {sql} | params={params}")
+
+      statement = text(sql).bindparams(bindparam("values", expanding=True))
+      result = await session.execute(statement, params)
       return [dict(row._mapping) for row in result]
 
   @staticmethod
-  def insert(*, table: str, values: Dict[str, Any]) -> int:
+  async def select_page(*, table: str, after_id: int, limit: int,
+                        columns: str = "*") -> List[Dict[str, Any]]:
+    """
+    Makes a keyset-paginated SELECT: up to `limit` rows with id > after_id, ordered by id.
+    Unlike OFFSET, every page costs the same however far into the table it is.
+    """
+    async with DB.session() as session:
+      sql = f"SELECT {columns} FROM {table} WHERE id > :after_id ORDER BY id LIMIT :limit"
+      params = {"after_id": after_id, "limit": limit}
+
+      logger.debug(f"SQL SELECT: {sql} | params={params}")
+
+      result = await session.execute(text(sql), params)
+      return [dict(row._mapping) for row in result]
+
+  @staticmethod
+  async def count(*, table: str) -> int:
+    """
+    Counts rows of the table.
+    """
+    async with DB.session() as session:
+      result = await session.execute(text(f"SELECT COUNT(*) FROM {table}"))
+      return result.scalar_one()
+
+  @staticmethod
+  async def insert(*, table: str, values: Dict[str, Any]) -> int:
     """
     Makes an INSERT query to the database via SQLAlchemy
     """
-    with DB.session() as session:
+    async with DB.session() as session:
       columns = ", ".join(values.keys())
       placeholders = ", ".join(f":{k}" for k in values.keys())
       sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) RETURNING id"
 
       logger.debug(f"SQL INSERT: {sql} | values={values}")
-      result = session.execute(text(sql), values)
+      result = await session.execute(text(sql), values)
       return result.scalar_one()
 
   @staticmethod
-  def update(*, table: str, id: int, values: Dict[str, Any]) -> None:
+  async def update(*, table: str, id: int, values: Dict[str, Any]) -> None:
     """
     Makes an UPDATE query to the database via SQLAlchemy
     """
-    with DB.session() as session:
+    async with DB.session() as session:
       assignments = ", ".join(f"{k} = :{k}" for k in values.keys())
       params = dict(values)
       params["id"] = id
       sql = f"UPDATE {table} SET {assignments} WHERE id = :id"
 
       logger.debug(f"SQL UPDATE: {sql} | values={params}")
-      session.execute(text(sql), params)
+      await session.execute(text(sql), params)
+
+  @staticmethod
+  async def close() -> None:
+    """
+    Closes all pooled connections of the engine.
+    """
+    await engine.dispose()
@@ -29,31 +29,46 @@ class Query(ABC, Generic[T]):
   table_name = ""
 
   @classmethod
-  def get(cls, id: int) -> T | None:
+  async def get(cls, id: int) -> T | None:
     """
     Gets an object via its ID.
     This implementation will be shared by all child classes.
     """
-    rows = DB.select(table=cls.table_name, where={"id": id})
+    rows = await DB.select(table=cls.table_name, where={"id": id})
     if not rows:
       return None
     return cls.parse(rows[0])
   
   @classmethod
-  def insert(cls, t: T) -> int:
+  async def get_page(cls, after_id: int, limit: int) -> List[T]:
+    """
+    Gets up to `limit` objects with IDs greater than after_id, ordered by ID.
+    """
+    rows = await DB.select_page(table=cls.table_name, after_id=after_id, limit=limit)
+    return [cls.parse(row) for row in rows]
+
+  @classmethod
+  async def count(cls) -> int:
+    """
+    Number of objects in the table.
+    """
+    return await DB.count(table=cls.table_name)
+
+  @classmethod
+  async def insert(cls, t: T) -> int:
     """
     Strict INSERT. Returns the new ID.
     """
     data = cls.pack(t)
-    return DB.insert(table=cls.table_name, values=data)
+    return await DB.insert(table=cls.table_name, values=data)
   
   @classmethod
-  def update(cls, id: int, t: T) -> None:
+  async def update(cls, id: int, t: T) -> None:
     """
     Strict UPDATE.
     """
     data = cls.pack(t)
-    DB.update(table=cls.table_name, id=id, values=data)
+    await DB.update(table=cls.table_name, id=id, values=data)
     return
 
   @classmethod
@@ -84,11 +99,11 @@ class TeamQuery(Query[Team]):
   table_name = TEAM_TABLE_NAME
 
   @classmethod
-  def get_all(cls) -> List[Team]:
+  async def get_all(cls) -> List[Team]:
     """
     Gets all teams from the database.
     """
-    rows = DB.select(table=cls.table_name)
+    rows = await DB.select(table=cls.table_name)
     teams = []
     for row in rows:
       try:
@@ -152,11 +167,11 @@ class TeamQuery(Query[Team]):
     }
   
   @classmethod
-  def get_by_name(cls, name: str) -> List[Team]:
+  async def get_by_name(cls, name: str) -> List[Team]:
     """
     Gets a team by its name.
     """
-    rows = DB.select(
+    rows = await DB.select(
       table=cls.table_name,
       where={"name": name}
     )
@@ -233,8 +248,8 @@ class RiddleFileQuery(Query[FileExtension]):
     }
 
   @classmethod
-  def get_by_message(cls, message_id: int, riddle_id: int) -> List[FileExtension]:
-    rows = DB.select(
+  async def get_by_message(cls, message_id: int, riddle_id: int) -> List[FileExtension]:
+    rows = await DB.select(
       table=cls.table_name,
       where={"message_id": message_id}
     )
@@ -249,20 +264,17 @@ class RiddleMessageQuery(Query[Message]):
   table_name = RIDDLE_MESSAGE_TABLE_NAME
 
   @classmethod
-  def parse(cls, raw_data: Dict[str, Any]) -> Message:
+  def parse(cls, raw_data: Dict[str, Any], files: List[FileExtension] | None = None) -> Message:
     # redundant functionality, works incorrectly, shall never be used!!
-    message_id = raw_data["id"]
-    files = RiddleFileQuery.get_by_message(message_id, -1)
-
     return Message(
       _text=raw_data["text"],
-      _files=files
+      _files=files or []
     )
   
   @classmethod
-  def parse_with_riddle_id(cls, raw_data: Dict[str, Any], riddle_id: int) -> Message:
+  async def parse_with_riddle_id(cls, raw_data: Dict[str, Any], riddle_id: int) -> Message:
     message_id = raw_data["id"]
-    files = RiddleFileQuery.get_by_message(message_id, riddle_id)
+    files = await RiddleFileQuery.get_by_message(message_id, riddle_id)
 
     return Message(
       _text=raw_data["text"],
@@ -278,12 +290,12 @@ class RiddleMessageQuery(Query[Message]):
     }
 
   @classmethod
-  def get_by_riddle(cls, riddle_id: int) -> List[Message]:
-    rows = DB.select(
+  async def get_by_riddle(cls, riddle_id: int) -> List[Message]:
+    rows = await DB.select(
       table=cls.table_name,
       where={"riddle_id": riddle_id}
     )
-    return [cls.parse_with_riddle_id(row, riddle_id) for row in rows]
+    return [await cls.parse_with_riddle_id(row, riddle_id) for row in rows]
 
 
 class RiddleQuery(Query[Riddle]):
@@ -295,16 +307,60 @@ class RiddleQuery(Query[Riddle]):
   table_name = RIDDLE_TABLE_NAME
 
   @classmethod
-  def parse(cls, raw_data: Dict[str, Any]) -> Riddle:
+  async def get(cls, id: int) -> Riddle | None:
+    """
+    Gets a riddle via its ID together with all its messages and files.
+    """
+    riddles = await cls.get_many([id])
+    return riddles[0] if riddles else None
+
+  @classmethod
+  async def get_many(cls, ids: List[int] | None = None) -> List[Riddle]:
     """
-    Parses a raw database row (dict) into a Riddle object.
+    Gets riddles (all of them if `ids` is None) together with their messages and files
+    in three queries, however many riddles and messages there are:
+    riddle rows, then riddle_message rows of all of them, then riddle_file rows of all messages.
     """
-    riddle_id = raw_data["id"]
-    messages = RiddleMessageQuery.get_by_riddle(riddle_id)
+    if ids is None:
+      rows = await DB.select(table=cls.table_name)
+    else:
+      rows = await DB.select_in(table=cls.table_name, column="id", values=ids)
+    if not rows:
+      return []
+
+    message_rows = await DB.select_in(
+      table=RiddleMessageQuery.table_name,
+      column="riddle_id",
+      values=[row["id"] for row in rows],
+    )
+    file_rows = await DB.select_in(
+      table=RiddleFileQuery.table_name,
+      column="message_id",
+      values=[row["id"] for row in message_rows],
+    )
+
+    riddle_of_message = {row["id"]: row["riddle_id"] for row in message_rows}
+    files: Dict[int, List[FileExtension]] = {}
+    for row in file_rows:
+      riddle_id = riddle_of_message[row["message_id"]]
+      files.setdefault(row["message_id"], []).append(RiddleFileQuery.parse_with_riddle_id(row, riddle_id))
+
+    messages: Dict[int, List[Message]] = {}
+    for row in message_rows:
+      messages.setdefault(row["riddle_id"], []).append(
+        Message(_text=row["text"], _files=files.get(row["id"], []))
+      )
+
+    return [cls.parse(row, messages.get(row["id"], [])) for row in rows]
 
+  @classmethod
+  def parse(cls, raw_data: Dict[str, Any], messages: List[Message] | None = None) -> Riddle:
+    """
+    Parses a raw database row (dict) and already loaded messages into a Riddle object.
+    """
     return Riddle(
-      id=riddle_id,
-      messages=messages,
+      id=raw_data["id"],
+      messages=messages or [],
       answer=raw_data["answer"],
       type=raw_data["type"]
     )
@@ -8,13 +8,16 @@ Child classes specify the type parameter via Generic[T] and provide cache and qu
 
 from __future__ import annotations
 from abc import ABC
-from typing import TypeVar, Generic, Optional, List
+from pathlib import Path
+from typing import TypeVar, Generic, Optional, List, Tuple
 import logging
 
 from ..core import Team, Member, Riddle
 from .cache import TeamCache, MemberCache, RiddleCache
 from .queries import TeamQuery, MemberQuery, RiddleQuery
+from .riddle_snapshot import RiddleSnapshot
 from .db_conn import DB
+from ...config import STAGE_COUNT, RIDDLE_BUNDLE
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +41,7 @@ class Repo(ABC, Generic[T]):
   query = None
 
   @classmethod
-  def get(cls, id: int) -> Optional[T]:
+  async def get(cls, id: int) -> Optional[T]:
     """
     Gets an object by its ID.
     First checks cache, then queries database if not found, then stores in cache.
@@ -51,7 +54,7 @@ class Repo(ABC, Generic[T]):
     
     # Not in cache, query database
     logger.debug(f"Cache miss for {cls.__name__}.get({id}), querying database")
-    obj = cls.query.get(id)
+    obj = await cls.query.get(id)
     
     if obj is not None:
       # Store in cache for future access
@@ -63,13 +66,28 @@ class Repo(ABC, Generic[T]):
     return obj
 
   @classmethod
-  def insert(cls, obj: T) -> int:
+  async def get_page(cls, after_id: int, limit: int) -> List[T]:
+    """
+    Gets a page of objects ordered by ID, straight from the database.
+    Meant for scans over all objects (e.g. broadcasts), so the results are not cached.
+    """
+    return await cls.query.get_page(after_id, limit)
+
+  @classmethod
+  async def count(cls) -> int:
+    """
+    Number of objects in the database.
+    """
+    return await cls.query.count()
+
+  @classmethod
+  async def insert(cls, obj: T) -> int:
     """
     Inserts a new object.
     Returns the new ID.
     Updates the object's ID if it was None (for Teams).
     """
-    new_id = cls.query.insert(obj)
+    new_id = await cls.query.insert(obj)
     
     if hasattr(obj, "_id"): 
       try:
@@ -82,7 +100,7 @@ class Repo(ABC, Generic[T]):
     return new_id
   
   @classmethod
-  def update(cls, obj: T) -> None:
+  async def update(cls, obj: T) -> None:
     """
     ONLY UPDATES an existing object.
     Object MUST have an ID.
@@ -91,7 +109,7 @@ class Repo(ABC, Generic[T]):
       logger.error(f"Cannot update object without ID: {obj}")
       raise ValueError("Cannot update object without ID")
 
-    cls.query.update(obj.id, obj)
+    await cls.query.update(obj.id, obj)
     cls.cache.put(obj)
     logger.debug(f"Updated and cached {cls.__name__} object with id={obj.id}")
     return
@@ -107,23 +125,23 @@ class TeamRepo(Repo[Team]):
   query = TeamQuery
 
   @classmethod
-  def get_by_member(cls, member_id: int) -> Optional[Team]:
+  async def get_by_member(cls, member_id: int) -> Optional[Team]:
     """
     Gets a team by member ID.
     """
     # MemberRepo is defined in this same file, so no import needed
-    member = MemberRepo.get(member_id)
+    member = await MemberRepo.get(member_id)
     if member is None:
       return None
 
-    return cls.get(member.team_id)
+    return await cls.get(member.team_id)
 
   @classmethod
-  def get_by_name(cls, name: str) -> Optional[Team]:
+  async def get_by_name(cls, name: str) -> Optional[Team]:
     """
     Gets a team by its name.
     """
-    rows = cls.query.get_by_name(name)
+    rows = await cls.query.get_by_name(name)
     if not rows:
       return None
     team = rows[0]
@@ -131,16 +149,16 @@ class TeamRepo(Repo[Team]):
     return team
 
   @classmethod
-  def get_all(cls) -> List[Team]:
+  async def get_all(cls) -> List[Team]:
     """
     Gets all teams from the database as Team objects.
     """
-    teams = cls.query.get_all()
+    teams = await cls.query.get_all()
     teams.sort(key=lambda team: team.score, reverse=True)
     return teams
 
   @classmethod
-  def update(cls, team: Team, event: str) -> None:
+  async def update(cls, team: Team, event: str) -> None:
     """
     Updates a team in the database and cache.
     """
@@ -149,12 +167,12 @@ class TeamRepo(Repo[Team]):
       logger.warning(f"Incorrect update event for TeamRepo ({event}).")
       return
 
-    team_db = cls.get(team.id)
+    team_db = await cls.get(team.id)
     if team_db is None:
       logger.warning(f"No team with id {team.id} found in TeamRepo.")
       return
 
-    super().update(team)
+    await super().update(team)
     logger.debug(f"Updated and cached Team object with id={team.id}, event: {event}")
 
 
@@ -168,8 +186,8 @@ class MemberRepo(Repo[Member]):
   query = MemberQuery
 
   @classmethod
-  def get_by_team(cls, team_id: int) -> List[Member]:
-    rows = DB.select(table=cls.query.table_name, where={"team_id": team_id})
+  async def get_by_team(cls, team_id: int) -> List[Member]:
+    rows = await DB.select(table=cls.query.table_name, where={"team_id": team_id})
     return [cls.query.parse(row) for row in rows]
 
 
@@ -177,7 +195,49 @@ class RiddleRepo(Repo[Riddle]):
   """
   Repository for Riddle objects.
   Inherits all methods from Repo with Riddle, RiddleCache, and RiddleQuery types.
+  After preload() riddles are served from the in-memory snapshot only.
   """
 
   cache = RiddleCache
   query = RiddleQuery
+  snapshot: RiddleSnapshot | None = None
+
+  @classmethod
+  async def preload(cls) -> RiddleSnapshot:
+    """
+    Loads all riddles into the snapshot. Fails (RiddleError) if any stage has no riddle.
+    """
+    cls.snapshot = await RiddleSnapshot.load(STAGE_COUNT, bundle=cls._bundle())
+    return cls.snapshot
+
+  @staticmethod
+  def _bundle() -> Path | None:
+    """
+    Path of the riddle bundle if riddles are loaded from it (RIDDLE_BUNDLE), else None.
+    """
+    if not RIDDLE_BUNDLE:
+      return None
+    from ..storage.paths import RIDDLE_BUNDLE_PATH
+    return RIDDLE_BUNDLE_PATH
+
+  @classmethod
+  async def reload(cls) -> Tuple[RiddleSnapshot | None, RiddleSnapshot]:
+    """
+    Loads a new snapshot and swaps it in with a single assignment, so readers get either
+    the old or the new riddle set; riddles already handed out keep their old version.
+    If loading fails (RiddleError), the current snapshot stays. Returns (old, new).
+    """
+    old = cls.snapshot
+    new = await RiddleSnapshot.load(STAGE_COUNT, version=old.version + 1 if old else 1, bundle=cls._bundle())
+    cls.snapshot = new
+    return old, new
+
+  @classmethod
+  async def get(cls, id: int) -> Optional[Riddle]:
+    """
+    Gets a riddle by its ID (stage): a dict lookup once the snapshot is loaded,
+    otherwise through the cache and the database.
+    """
+    if cls.snapshot is not None:
+      return cls.snapshot.get(id)
+    return await super().get(id)
@@ -0,0 +1,92 @@
+"""
+Read-only in-memory set of all riddles.
+
+There are only STAGE_COUNT riddles and they don't change during the quest, so they are
+loaded once at startup (messages and file metadata included) instead of being fetched
+lazily by the first team reaching each stage. RiddleRepo then serves them without the DB.
+A reload builds a new snapshot and replaces the old one as a whole (see RiddleRepo.reload).
+Riddles come either from the database or from a packed bundle file (see RiddleBundle).
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Tuple
+
+from ..core import Riddle, FileExtension
+from ..utils import Timer
+from ..exceptions import RiddleError
+from .queries import RiddleQuery
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RiddleSnapshot:
+  """
+  Riddles indexed by stage (a riddle's ID is its stage).
+  The mapping is read-only; riddles themselves are shared by all teams,
+  so their messages must be copied before being addressed (see Riddle.message_copies).
+  """
+  riddles: Mapping[int, Riddle]
+  loaded_at: datetime
+  version: int = 1
+
+  def get(self, stage: int) -> Riddle | None:
+    return self.riddles.get(stage)
+
+  def __len__(self) -> int:
+    return len(self.riddles)
+
+  def diff(self, other: RiddleSnapshot) -> Dict[str, List[int]]:
+    """
+    Stages whose riddle appeared, disappeared or changed (answer, type, texts or file contents)
+    in `other` compared to this snapshot.
+    """
+    return {
+      "added": sorted(other.riddles.keys() - self.riddles.keys()),
+      "removed": sorted(self.riddles.keys() - other.riddles.keys()),
+      "changed": sorted(
+        stage for stage in self.riddles.keys() & other.riddles.keys()
+        if _fingerprint(self.riddles[stage]) != _fingerprint(other.riddles[stage])
+      ),
+    }
+
+  @classmethod
+  async def load(cls, stage_count: int, version: int = 1, bundle: Path | None = None) -> RiddleSnapshot:
+    """
+    Loads every riddle from the database, or from the riddle bundle at `bundle`.
+    Raises RiddleError if any of the stages 1..stage_count has no riddle.
+    """
+    if bundle is not None:
+      from ..storage import RiddleBundle
+      loaded = RiddleBundle.open(bundle).riddles()
+    else:
+      loaded = await RiddleQuery.get_many()
+    riddles = {riddle.id: riddle for riddle in loaded}
+
+    missing = [stage for stage in range(1, stage_count + 1) if stage not in riddles]
+    if missing:
+      raise RiddleError(f"No riddles for stages {missing}")
+
+    logger.info("Loaded %s riddles (version %s)", len(riddles), version)
+    return cls(riddles=MappingProxyType(riddles), loaded_at=Timer.now(), version=version)
+
+
+def _file_fingerprint(file: FileExtension) -> Tuple[Any, ...]:
+  # riddle files carry a RiddleAsset, so an edited file changes its sha256
+  return (file.filename, file.type, getattr(file.filedata, "sha256", None))
+
+
+def _fingerprint(riddle: Riddle) -> Tuple[Any, ...]:
+  return (
+    riddle.answer,
+    riddle.type,
+    tuple(
+      (message.text, tuple(_file_fingerprint(file) for file in message.files))
+      for message in riddle.messages
+    ),
+  )
@@ -41,11 +41,11 @@ class RegistrationService:
   _contexts: dict[int, RegistrationContext] = {}
 
   @classmethod
-  def _start(cls, user_id: int, tg_nickname: str) -> Message | List[Message]:
+  async def _start(cls, user_id: int, tg_nickname: str) -> Message | List[Message]:
     """
     Initiates registration for a user.
     """
-    if MemberRepo.get(user_id):
+    if await MemberRepo.get(user_id):
       return Message(_text="Вы уже зарегистрированы!")
 
     ctx = RegistrationContext(
@@ -82,7 +82,7 @@ class RegistrationService:
     return id in cls._contexts
 
   @classmethod
-  def handle_input(cls, msg: Message) -> Message:
+  async def handle_input(cls, msg: Message) -> Message:
     """
     Handles user input according to current registration step.
     """
@@ -93,7 +93,7 @@ class RegistrationService:
 
     if ctx is None:
       tg_nickname = msg.background_info.get("tg_nickname")
-      return cls._start(user_id, tg_nickname)
+      return await cls._start(user_id, tg_nickname)
 
     if ctx.step == RegistrationStep.ASK_NAME:
       return cls._handle_name(ctx, text)
@@ -102,16 +102,16 @@ class RegistrationService:
       return cls._handle_role(ctx, text)
 
     if ctx.step == RegistrationStep.ASK_TEAM_NAME:
-      return cls._handle_team_name(ctx, text)
+      return await cls._handle_team_name(ctx, text)
 
     if ctx.step == RegistrationStep.CONFIRM_TEAM_NAME:
       return cls._handle_team_name_confirm(ctx, text)
 
     if ctx.step == RegistrationStep.ASK_PASSWORD:
-      return cls._handle_password(ctx, text)
+      return await cls._handle_password(ctx, text)
 
     if ctx.step == RegistrationStep.ASK_PASSWORD_REPEAT:
-      return cls._handle_password_repeat(ctx, text)
+      return await cls._handle_password_repeat(ctx, text)
 
     raise RuntimeError(f"Unexpected registration step: {ctx.step}")
 
@@ -179,14 +179,14 @@ class RegistrationService:
     return Message(_text="Введи имя команды:")
 
   @classmethod
-  def _handle_team_name(cls, ctx: RegistrationContext, text: str) -> Message:
+  async def _handle_team_name(cls, ctx: RegistrationContext, text: str) -> Message:
     """
     Handles team name input and validation.
     """
     team_name = text.strip()
 
     if ctx.mode == "join":
-      team = TeamRepo.get_by_name(team_name)
+      team = await TeamRepo.get_by_name(team_name)
       if not team:
         return Message(_text="Команда с таким именем не найдена. Попробуй ещё раз:")
       ctx.team_name = team_name
@@ -194,7 +194,7 @@ class RegistrationService:
       cls._save_context(ctx)
       return Message(_text="Введи пароль:")
 
-    team = TeamRepo.get_by_name(team_name)
+    team = await TeamRepo.get_by_name(team_name)
     if team is not None:
       return Message(_text="К сожалению, это имя уже занято. Попробуй какое-нибудь другое.")
     ctx.team_name = team_name
@@ -221,23 +221,23 @@ class RegistrationService:
     return Message(_text="Введи пароль:")
 
   @classmethod
-  def _handle_password(cls, ctx: RegistrationContext, text: str) -> List[Message]:
+  async def _handle_password(cls, ctx: RegistrationContext, text: str) -> List[Message]:
     """
     Handles password input.
     """
 
     if ctx.mode == "join":
-      team = TeamRepo.get_by_name(ctx.team_name)
+      team = await TeamRepo.get_by_name(ctx.team_name)
 
       if not team.verify_password(text):
         return Message(_text="Неверный пароль. Попробуй ещё раз:")
 
-      cls._create_member(ctx, team)
+      await cls._create_member(ctx, team)
       ctx.step = RegistrationStep.DONE
       cls._contexts.pop(ctx.user_id, None)
       msg1 = Message(_text=f"Ты успешно вошел в команду {ctx.team_name}!")
-      cur_riddle = RiddleRepo.get(team.cur_stage)
-      return [msg1] + cur_riddle.messages
+      cur_riddle = await RiddleRepo.get(team.cur_stage)
+      return [msg1] + cur_riddle.message_copies()
 
     ctx.password_hash = Utils.hash(text)
     ctx.step = RegistrationStep.ASK_PASSWORD_REPEAT
@@ -245,24 +245,24 @@ class RegistrationService:
     return Message(_text="Повтори пароль:")
 
   @classmethod
-  def _handle_password_repeat(cls, ctx: RegistrationContext, text: str) -> List[Message]:
+  async def _handle_password_repeat(cls, ctx: RegistrationContext, text: str) -> List[Message]:
     """
     Handles password confirmation.
     """
     if not Utils.verify_password(text, ctx.password_hash):
       return Message(_text="Пароли не совпадают. Введи пароль ещё раз:")
 
-    team = cls._create_team(ctx)
-    cls._create_member(ctx, team)
+    team = await cls._create_team(ctx)
+    await cls._create_member(ctx, team)
 
     ctx.step = RegistrationStep.DONE
     cls._contexts.pop(ctx.user_id, None)
     msg1 = Message(_text=f"Команда {team.name} успешно зарегистрирована!")
-    cur_riddle = RiddleRepo.get(team.cur_stage)
-    return [msg1] + cur_riddle.messages
+    cur_riddle = await RiddleRepo.get(team.cur_stage)
+    return [msg1] + cur_riddle.message_copies()
 
   @classmethod
-  def _create_team(cls, ctx: RegistrationContext) -> Team:
+  async def _create_team(cls, ctx: RegistrationContext) -> Team:
     """
     Creates a new team in DB and cache.
     """
@@ -272,12 +272,12 @@ class RegistrationService:
       _Team__password_hash=ctx.password_hash,
       _cur_member_id=ctx.user_id
     )
-    team._id = TeamRepo.insert(team)
-    TeamRepo.update(team, event="added id")
+    team._id = await TeamRepo.insert(team)
+    await TeamRepo.update(team, event="added id")
     return team
 
   @classmethod
-  def _create_member(cls, ctx: RegistrationContext, team: Team) -> Member:
+  async def _create_member(cls, ctx: RegistrationContext, team: Team) -> Member:
     """
     Creates new member in DB and cache.
     """
@@ -287,5 +287,5 @@ class RegistrationService:
       name=ctx.player_name,
       team_id=team.id,
     )
-    MemberRepo.insert(member)
+    await MemberRepo.insert(member)
     return member
@@ -69,27 +69,35 @@ class VerificationService:
       ],
     ])
 
+  @staticmethod
+  def team_name_from_reply(reply_text: str) -> str:
+    """
+    Extracts the team name from the feedback prompt the admin replies to
+    ("Ответьте на это сообщение, чтобы отправить фидбек команде <name>.").
+    """
+    return reply_text.split(" ")[-1][:-1]
+
   @classmethod
-  def handle_input(cls, msg: Message) -> Message | List[Message]:
+  async def handle_input(cls, msg: Message) -> Message | List[Message]:
     """
     Handles user input according to current verification step.
     """
     if msg.user_id not in ADMIN:
-      return cls._send_to_admin(msg)
+      return await cls._send_to_admin(msg)
     
     reply_text = msg.background_info.get("reply_text", None)
     if reply_text:
-      team_name = reply_text.split(" ")[-1][:-1]
-      team = TeamRepo.get_by_name(team_name)
+      team_name = cls.team_name_from_reply(reply_text)
+      team = await TeamRepo.get_by_name(team_name)
     else:
-      team = TeamRepo.get(msg.background_info["team_id"])
+      team = await TeamRepo.get(msg.background_info["team_id"])
     ctx = cls._load_context(team.cur_member_id)
 
     if ctx.step == VerificationStep.ASK_ADMIN:
-      return cls._handle_callback(ctx, msg)
+      return await cls._handle_callback(ctx, msg)
 
     if ctx.step == VerificationStep.ASK_FEEDBACK:
-      return cls._handle_feedback(ctx, msg)
+      return await cls._handle_feedback(ctx, msg)
 
     raise RuntimeError(f"Unexpected verification step: {ctx.step}")
 
@@ -112,7 +120,7 @@ class VerificationService:
       return None
 
   @classmethod
-  def _send_to_admin(cls, msg0: Message) -> List[Message]:
+  async def _send_to_admin(cls, msg0: Message) -> List[Message]:
     """
     Forwards team's answer to admin.
     """
@@ -122,7 +130,7 @@ class VerificationService:
       msg=msg0,
     )
     cls._save_context(ctx)
-    team = TeamRepo.get_by_member(msg0.user_id)
+    team = await TeamRepo.get_by_member(msg0.user_id)
     msg1 = msg0.copy()
     msg1.recipient_id = ADMIN_CHAT
 
@@ -135,11 +143,11 @@ class VerificationService:
   
 
   @classmethod
-  def _handle_callback(cls, ctx: VerificationContext, msg: Message) -> Message | List[Message]:
+  async def _handle_callback(cls, ctx: VerificationContext, msg: Message) -> Message | List[Message]:
     verdict_raw, feedback_raw = msg.background_info.get("other")
     team_id = msg.background_info.get("team_id")
 
-    team = TeamRepo.get(team_id)
+    team = await TeamRepo.get(team_id)
 
     if verdict_raw == "yes":
       ctx.verdict = True
@@ -162,12 +170,12 @@ class VerificationService:
     cls._contexts.pop(ctx.user_id, None)
 
     if ctx.verdict:
-      return QuestEngine.correct_answer_pipeline(team)
+      return await QuestEngine.correct_answer_pipeline(team)
     return QuestEngine.wrong_answer_pipeline(team)
     
 
   @classmethod
-  def _handle_feedback(cls, ctx: VerificationContext, msg0: Message) -> List[Message]:
+  async def _handle_feedback(cls, ctx: VerificationContext, msg0: Message) -> List[Message]:
     """
     Handles admin feedback on the team answer.
     """
@@ -179,7 +187,7 @@ class VerificationService:
       _recipient_id=ctx.user_id,
     )
 
-    team = TeamRepo.get_by_member(ctx.user_id)
+    team = await TeamRepo.get_by_member(ctx.user_id)
     verdict = ctx.verdict
 
     cls._contexts.pop(ctx.user_id, None)
@@ -190,5 +198,5 @@ class VerificationService:
     )
 
     if verdict:
-      return [msg_to_team, notify_admin] + QuestEngine.correct_answer_pipeline(team)
+      return [msg_to_team, notify_admin] + await QuestEngine.correct_answer_pipeline(team)
     return [msg_to_team, notify_admin] + QuestEngine.wrong_answer_pipeline(team)
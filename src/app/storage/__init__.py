@@ -5,12 +5,25 @@ Uploads and downloads files.
 
 from .download import download_team_file, download_riddle_file
 from .upload import upload_file
+from .blobs import BlobStore
+from .file_ids import FileIdCache, file_ids
+from .riddle_assets import RiddleAsset, RiddleAssetStore, riddle_assets
+from .riddle_bundle import RiddleBundle
+from .archiver import Archiver
 from .filetypes import EXTENSION_TO_FILETYPE, FILETYPE_TO_EXTENSION
 
 __all__ = [
   "download_team_file",
   "download_riddle_file",
   "upload_file",
+  "BlobStore",
+  "FileIdCache",
+  "file_ids",
+  "RiddleAsset",
+  "RiddleAssetStore",
+  "riddle_assets",
+  "RiddleBundle",
+  "Archiver",
   "EXTENSION_TO_FILETYPE",
   "FILETYPE_TO_EXTENSION"
 ]
@@ -0,0 +1,155 @@
+"""
+Background archival of player files (AUTO_UPLOAD).
+
+Files are put into a queue and stored into team folders by a fixed pool of worker tasks,
+so neither the team lookup nor the disk write (nor the download of a file referenced
+by file_id) delays routing. Failed files are retried with an exponential backoff.
+"""
+
+from __future__ import annotations
+import asyncio
+import tempfile
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from ..core import FileExtension
+from .upload import upload_file
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ArchiveJob:
+  """
+  A file waiting to be archived. `bot` downloads files which have only a file_id.
+  """
+  file: FileExtension
+  bot: Any
+  queued_at: float
+  attempts: int = 0
+
+
+class Archiver:
+  """
+  Persistent pool of archival workers over a FIFO queue.
+  Workers are started lazily on the first submit, because they need a running event loop.
+  Exposes queue depth and lag (time from submit until the file is stored) via stats().
+  """
+
+  def __init__(
+    self,
+    workers: int,
+    retries: int,
+    retry_delay: float,
+    spool_max_memory: int,
+    store: Callable[[FileExtension], Awaitable[Path]] = upload_file,
+  ):
+    if workers < 1:
+      raise ValueError("Archiver needs at least one worker")
+    self._size = workers
+    self._retries = retries
+    self._retry_delay = retry_delay
+    self._spool_max_memory = spool_max_memory
+    self._store = store
+    self._queue: asyncio.Queue[ArchiveJob] | None = None
+    self._workers: List[asyncio.Task] = []
+    self._busy = 0
+    self._archived = 0
+    self._failed = 0
+    self._retried = 0
+    self._lag_total = 0.0
+    self._lag_max = 0.0
+
+  def submit(self, file: FileExtension, bot: Any = None) -> None:
+    """
+    Queues the file for archival and returns right away.
+    """
+    self._ensure_started()
+    self._queue.put_nowait(ArchiveJob(file=file, bot=bot, queued_at=time.monotonic()))
+
+  def _ensure_started(self) -> None:
+    if self._workers:
+      return
+    self._queue = asyncio.Queue()
+    self._workers = [
+      asyncio.create_task(self._worker(), name=f"archive-worker-{i}")
+      for i in range(self._size)
+    ]
+
+  async def _worker(self) -> None:
+    while True:
+      job = await self._queue.get()
+      self._busy += 1
+      try:
+        await self._archive(job)
+      finally:
+        self._busy -= 1
+        self._queue.task_done()
+
+  async def _archive(self, job: ArchiveJob) -> None:
+    while True:
+      try:
+        await self._store_file(job)
+        break
+      except Exception:
+        job.attempts += 1
+        if job.attempts > self._retries:
+          self._failed += 1
+          logger.exception(
+            "Failed to archive %s of user %s after %s attempts",
+            job.file.filename, job.file.creator_id, job.attempts,
+          )
+          return
+        self._retried += 1
+        logger.warning("Archiving %s failed, retrying", job.file.filename, exc_info=True)
+        await asyncio.sleep(self._retry_delay * 2 ** (job.attempts - 1))
+
+    lag = time.monotonic() - job.queued_at
+    self._archived += 1
+    self._lag_total += lag
+    self._lag_max = max(self._lag_max, lag)
+
+  async def _store_file(self, job: ArchiveJob) -> None:
+    file = job.file
+    if file.filedata is not None:
+      await self._store(file)
+      return
+    # streamed in chunks: small files stay in memory, big ones go to a temporary file
+    with tempfile.SpooledTemporaryFile(max_size=self._spool_max_memory) as spool:
+      await job.bot.download(file.file_id, destination=spool)
+      await self._store(replace(file, filedata=spool))
+
+  async def join(self) -> None:
+    """
+    Waits until every queued file is archived (or has finally failed).
+    """
+    if self._queue is not None:
+      await self._queue.join()
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Queue depth, busy workers, archived/failed/retried counters
+    and lag (submit to stored) in milliseconds.
+    """
+    return {
+      "workers": self._size,
+      "busy": self._busy,
+      "queue_depth": self._queue.qsize() if self._queue else 0,
+      "archived": self._archived,
+      "failed": self._failed,
+      "retried": self._retried,
+      "lag_avg_ms": round(self._lag_total / self._archived * 1000, 2) if self._archived else 0.0,
+      "lag_max_ms": round(self._lag_max * 1000, 2),
+    }
+
+  async def close(self) -> None:
+    """
+    Stops all workers. Files still in the queue are not archived.
+    """
+    for worker in self._workers:
+      worker.cancel()
+    await asyncio.gather(*self._workers, return_exceptions=True)
+    self._workers = []
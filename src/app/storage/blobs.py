@@ -0,0 +1,141 @@
+"""
+Content-addressed storage of team files.
+
+Every file is stored once, as a blob named by the SHA-256 of its content
+(BLOBS_DIR/<first 2 hex digits>/<digest>). Each team folder keeps a manifest:
+an append-only JSON-lines file mapping the team's filenames to blobs.
+Data is read once: it is hashed while being written to a temporary file, which then becomes
+the blob or, if the blob already exists (a resent photo), is deleted.
+"""
+
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Tuple
+from uuid import uuid4
+
+from .paths import BLOBS_DIR, team_dir
+
+import logging
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.jsonl"
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+  """
+  Stores blobs and team manifests; keeps counters of written and deduplicated files.
+  """
+
+  _written = 0
+  _deduplicated = 0
+  _bytes_written = 0
+  _bytes_saved = 0
+
+  @staticmethod
+  def blob_path(digest: str) -> Path:
+    return BLOBS_DIR / digest[:2] / digest
+
+  @staticmethod
+  def _rewind(filedata: BinaryIO) -> None:
+    # sources which can't seek (pipes, streams) are read once from where they are
+    seekable = getattr(filedata, "seekable", None)
+    if seekable is None or seekable():
+      filedata.seek(0)
+
+  @classmethod
+  def _store_sync(cls, filedata: BinaryIO) -> Tuple[str, int, bool]:
+    # written under a temporary name and renamed: a blob is either complete or absent
+    BLOBS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = BLOBS_DIR / f".{uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+    cls._rewind(filedata)
+    try:
+      with tmp_path.open("wb") as f:
+        while chunk := filedata.read(CHUNK_SIZE):
+          digest.update(chunk)
+          f.write(chunk)
+          size += len(chunk)
+
+      path = cls.blob_path(digest.hexdigest())
+      written = not path.exists()
+      if written:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, path)
+    finally:
+      tmp_path.unlink(missing_ok=True)
+    cls._rewind(filedata)
+    return digest.hexdigest(), size, written
+
+  @classmethod
+  async def store(cls, filedata: BinaryIO) -> Tuple[str, int, bool]:
+    """
+    Stores the data unless an identical blob exists.
+    Returns (SHA-256 hex digest, size, whether anything was written).
+    Hashing is done in a thread: hashlib releases the GIL on big chunks.
+    """
+    digest, size, written = await asyncio.to_thread(cls._store_sync, filedata)
+    # counted here, on the event loop: concurrent store threads would lose increments
+    if written:
+      cls._written += 1
+      cls._bytes_written += size
+    else:
+      cls._deduplicated += 1
+      cls._bytes_saved += size
+    return digest, size, written
+
+  @staticmethod
+  def _append_sync(path: Path, line: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # one write of one line in append mode: concurrent writers don't interleave
+    with path.open("a", encoding="utf-8") as f:
+      f.write(line)
+
+  @classmethod
+  async def add_to_manifest(cls, team_name: str, entry: Dict[str, Any]) -> None:
+    """
+    Records a team file (must contain "filename" and "sha256") in the team's manifest.
+    """
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    await asyncio.to_thread(cls._append_sync, team_dir(team_name) / MANIFEST_NAME, line)
+
+  @staticmethod
+  def manifest(team_name: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Team's files by filename; the latest entry wins.
+    """
+    path = team_dir(team_name) / MANIFEST_NAME
+    if not path.exists():
+      return {}
+    entries = {}
+    with path.open(encoding="utf-8") as f:
+      for line in f:
+        if line.strip():
+          entry = json.loads(line)
+          entries[entry["filename"]] = entry
+    return entries
+
+  @classmethod
+  def resolve(cls, team_name: str, filename: str) -> Path | None:
+    """
+    Blob holding the team's file, None if the manifest doesn't know it.
+    """
+    entry = cls.manifest(team_name).get(filename)
+    return cls.blob_path(entry["sha256"]) if entry else None
+
+  @classmethod
+  def stats(cls) -> Dict[str, Any]:
+    """
+    Written and deduplicated files and bytes.
+    """
+    return {
+      "written": cls._written,
+      "deduplicated": cls._deduplicated,
+      "bytes_written": cls._bytes_written,
+      "bytes_saved": cls._bytes_saved,
+    }
@@ -6,12 +6,17 @@ from ...config import ADMIN
 from ..core import FileExtension, FileType, Team
 from .paths import ROOT, team_dir, RIDDLES_DIR
 from .filetypes import EXTENSION_TO_FILETYPE
+from .blobs import BlobStore
+from .file_ids import file_ids
+from .riddle_assets import riddle_assets
 from ..exceptions import StorageError
 
 
 def download_team_file(team: Team, filename: str) -> FileExtension:
   """
   Loads a file from the team storage and returns it as FileExtension.
+  Files are looked up in the team's manifest; files archived before
+  the blob store are read from the team folder itself.
   """
   folder = team_dir(team.name).resolve()
 
@@ -19,12 +24,13 @@ def download_team_file(team: Team, filename: str) -> FileExtension:
   if ROOT not in folder.parents and folder != ROOT:
     raise ValueError("Access outside STORAGE_ROOT is forbidden")
 
-  file_path = folder / filename
+  file_path = BlobStore.resolve(team.name, filename) or folder / filename
 
   if not file_path.exists() or not file_path.is_file():
     raise StorageError(f"File not found: {file_path}")
 
-  ext = file_path.suffix.lower()
+  # blobs have no extension, the type comes from the team's filename
+  ext = Path(filename).suffix.lower()
   file_type = EXTENSION_TO_FILETYPE.get(ext, FileType.DOCUMENT)
 
   filedata = file_path.open("rb")
@@ -43,6 +49,8 @@ def download_riddle_file(riddle_id: int, filename: str) -> FileExtension:
   """
   Loads a file with particular name connected to the current riddle.
   Returns an instance of FileExtension.
+  The data is the shared RiddleAsset of the file (read once, not an open handle);
+  the cache_key lets the sender find the file_id of an earlier upload.
   """
   folder = RIDDLES_DIR.resolve()
 
@@ -58,12 +66,14 @@ def download_riddle_file(riddle_id: int, filename: str) -> FileExtension:
   ext = file_path.suffix.lower()
   file_type = EXTENSION_TO_FILETYPE.get(ext, FileType.DOCUMENT)
 
-  filedata = file_path.open("rb")
+  asset = riddle_assets.get(file_path)
+  cache_key = file_ids.key(riddle_id, filename, asset.sha256)
 
   return FileExtension(
     type=file_type,
     creator_id=ADMIN[0],
-    filedata=filedata,
+    filedata=asset,
+    cache_key=cache_key,
     filename=filename,
     creation_time=datetime.now(timezone(timedelta(hours=3))),
     additional_data="riddle",
@@ -0,0 +1,101 @@
+"""
+Persistent cache of Telegram file_ids of riddle files.
+
+A riddle file uploaded once is afterwards sent by the file_id Telegram returned,
+so a stage opening for a hundred teams costs one upload instead of a hundred.
+Keys include the SHA-256 of the file (see RiddleAsset), so an edited riddle file is uploaded again.
+The cache is an append-only JSON-lines file; the latest line of a key wins
+and a null file_id drops a stale entry.
+"""
+
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+from .paths import ROOT
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class FileIdCache:
+  """
+  file_ids by "riddle_id/filename/sha256" keys, loaded from `path` on first use.
+  """
+
+  def __init__(self, path: Path):
+    self.path = Path(path)
+    self._entries: Dict[str, str] | None = None
+    self._hits = 0
+    self._misses = 0
+    self._stored = 0
+    self._stale = 0
+
+  def _load(self) -> Dict[str, str]:
+    if self._entries is None:
+      self._entries = {}
+      if self.path.exists():
+        with self.path.open(encoding="utf-8") as f:
+          for line in f:
+            if not line.strip():
+              continue
+            entry = json.loads(line)
+            if entry["file_id"] is None:
+              self._entries.pop(entry["key"], None)
+            else:
+              self._entries[entry["key"]] = entry["file_id"]
+    return self._entries
+
+  def _append(self, key: str, file_id: str | None) -> None:
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    with self.path.open("a", encoding="utf-8") as f:
+      f.write(json.dumps({"key": key, "file_id": file_id}, ensure_ascii=False) + "\n")
+
+  @staticmethod
+  def key(riddle_id: int, filename: str, sha256: str) -> str:
+    return f"{riddle_id}/{filename}/{sha256}"
+
+  def get(self, key: str) -> str | None:
+    file_id = self._load().get(key)
+    if file_id is None:
+      self._misses += 1
+    else:
+      self._hits += 1
+    return file_id
+
+  def put(self, key: str, file_id: str) -> None:
+    entries = self._load()
+    if entries.get(key) == file_id:
+      return
+    entries[key] = file_id
+    self._stored += 1
+    self._append(key, file_id)
+
+  def invalidate(self, key: str, file_id: str | None = None) -> None:
+    """
+    Drops a file_id Telegram refused; the next send uploads the file again.
+    With `file_id`, the entry is dropped only if it still holds that id.
+    """
+    entries = self._load()
+    if file_id is not None and entries.get(key) != file_id:
+      return
+    if entries.pop(key, None) is not None:
+      self._stale += 1
+      self._append(key, None)
+      logger.warning("Dropped stale file_id of %s", key)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Cached file_ids, hits, misses, stored and invalidated entries.
+    """
+    return {
+      "cached": len(self._load()),
+      "hits": self._hits,
+      "misses": self._misses,
+      "stored": self._stored,
+      "stale": self._stale,
+    }
+
+
+file_ids = FileIdCache(ROOT / "file_ids.jsonl")
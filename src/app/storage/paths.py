@@ -11,6 +11,9 @@ if not STORAGE_ROOT:
 ROOT = Path(STORAGE_ROOT).resolve()
 TEAMS_DIR = ROOT / "teams"
 RIDDLES_DIR = ROOT / "riddles"
+BLOBS_DIR = ROOT / "blobs"
+BROADCASTS_DIR = ROOT / "broadcasts"
+RIDDLE_BUNDLE_PATH = ROOT / "riddles.bundle"
 
 
 def team_dir(team_name: str) -> Path:
@@ -0,0 +1,172 @@
+"""
+Shared in-memory riddle files.
+
+All teams reaching a stage get the same riddle files, so each file is read once
+into an immutable bytes object. Every upload gets its own read-only memoryview of it:
+concurrent sends neither copy the file nor share a file position, and riddles kept
+in memory hold no file descriptors. Files that don't fit into the byte budget
+are not kept and are streamed from disk by every upload instead.
+"""
+
+from __future__ import annotations
+import hashlib
+import io
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, BinaryIO, Dict
+
+from ...config import RIDDLE_ASSETS_MAX_BYTES
+
+import logging
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+FD_DIR = Path("/proc/self/fd")
+
+
+@dataclass(frozen=True)
+class RiddleAsset:
+  """
+  A riddle file as of its size and mtime, with the SHA-256 of its content.
+  `data` is the whole content (bytes, or a read-only view of a riddle bundle),
+  or None if the file is read from `path` on every use.
+  """
+  path: Path
+  size: int
+  mtime_ns: int
+  sha256: str
+  data: bytes | memoryview | None = field(default=None, repr=False)
+
+  @property
+  def in_memory(self) -> bool:
+    return self.data is not None
+
+  def view(self) -> memoryview:
+    """
+    Read-only zero-copy view of the content; only for assets in memory.
+    """
+    if self.data is None:
+      raise ValueError(f"{self.path} is not kept in memory")
+    return memoryview(self.data)
+
+  def open(self) -> BinaryIO:
+    """
+    New reader with its own position, for consumers which need a file object.
+    """
+    if self.data is not None:
+      return io.BytesIO(self.data)
+    return self.path.open("rb")
+
+
+class RiddleAssetStore:
+  """
+  Riddle files by path, loaded on first use and again once their size or mtime changes.
+  Files are kept in memory while the total stays within `max_bytes`.
+  Thread-safe, so files can be loaded ahead in a thread (see load_dir); files are read
+  and hashed outside the lock, so a slow load doesn't hold up gets of other files.
+  """
+
+  def __init__(self, max_bytes: int):
+    self.max_bytes = max_bytes
+    self._assets: Dict[Path, RiddleAsset] = {}
+    self._bytes = 0
+    self._hits = 0
+    self._loads = 0
+    self._lock = threading.Lock()
+
+  def get(self, path: Path) -> RiddleAsset:
+    path = Path(path)
+    with self._lock:
+      stat = path.stat()
+      asset = self._assets.get(path)
+      if asset and (asset.size, asset.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+        self._hits += 1
+        return asset
+      held = len(asset.data) if asset and asset.data is not None else 0
+      keep = self._bytes - held + stat.st_size <= self.max_bytes
+
+    loaded = self._load(path, stat, keep)
+
+    with self._lock:
+      current = self._assets.get(path)
+      if current is not None and current is not asset:
+        # another thread loaded the file meanwhile, from a stat no older than ours
+        return current
+      if current is not None and current.data is not None:
+        self._bytes -= len(current.data)
+      if loaded.data is not None and self._bytes + len(loaded.data) > self.max_bytes:
+        # concurrent loads took the budget meanwhile
+        loaded = replace(loaded, data=None)
+      if loaded.data is not None:
+        self._bytes += len(loaded.data)
+      self._assets[path] = loaded
+      self._loads += 1
+      return loaded
+
+  def load_dir(self, directory: Path) -> int:
+    """
+    Loads (or checks) every file under `directory`, so later get() calls only stat them,
+    and forgets files under it which are gone. Returns the number of files.
+    """
+    directory = Path(directory)
+    paths = [path for path in directory.rglob("*") if path.is_file()]
+    for path in paths:
+      self.get(path)
+
+    present = set(paths)
+    with self._lock:
+      for path in [path for path in self._assets if path.is_relative_to(directory) and path not in present]:
+        asset = self._assets.pop(path)
+        if asset.data is not None:
+          self._bytes -= len(asset.data)
+    return len(paths)
+
+  @staticmethod
+  def _load(path: Path, stat: os.stat_result, keep: bool) -> RiddleAsset:
+    if keep:
+      data = path.read_bytes()
+      return RiddleAsset(
+        path=path,
+        size=len(data),
+        mtime_ns=stat.st_mtime_ns,
+        sha256=hashlib.sha256(data).hexdigest(),
+        data=data,
+      )
+
+    logger.info("%s (%s bytes) exceeds the riddle asset budget, streaming it from disk", path, stat.st_size)
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+      while chunk := f.read(CHUNK_SIZE):
+        digest.update(chunk)
+    return RiddleAsset(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=digest.hexdigest())
+
+  @staticmethod
+  def _open_fds() -> int | None:
+    """
+    File descriptors open in the process, where /proc tells it.
+    """
+    try:
+      return len(os.listdir(FD_DIR))
+    except OSError:
+      return None
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Assets in memory and on disk, bytes held against the budget,
+    hits and loads, and the process' open file descriptors.
+    """
+    in_memory = sum(asset.in_memory for asset in self._assets.values())
+    return {
+      "in_memory": in_memory,
+      "on_disk": len(self._assets) - in_memory,
+      "bytes": self._bytes,
+      "max_bytes": self.max_bytes,
+      "hits": self._hits,
+      "loads": self._loads,
+      "open_fds": self._open_fds(),
+    }
+
+
+riddle_assets = RiddleAssetStore(RIDDLE_ASSETS_MAX_BYTES)
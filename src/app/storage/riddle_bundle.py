@@ -0,0 +1,197 @@
+"""
+Packed riddle bundle: all riddles with their files in a single file.
+
+Layout: a fixed header (magic, format version, index length, SHA-256 of the index),
+the index (JSON: riddles, their messages and files with offsets, sizes and SHA-256
+of the contents), then the file contents back to back, every distinct content once.
+A bundle is opened with one mmap call and riddle files are served as read-only views
+of the mapping: nothing is read at startup, pages come from the OS page cache on first
+send. The content hashes key the file_id cache exactly like files in RIDDLES_DIR do,
+so cached file_ids stay valid when switching to the bundle.
+
+At runtime only the index is checked against its hash. File contents are checked once,
+by `verify()` when the bundle is built; a bundle is renamed into place, never edited.
+
+Built from the database and RIDDLES_DIR by `python3 -m src.bundle_riddles`.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ...config import ADMIN
+from ..core import Riddle, Message, FileExtension, FileType
+from ..exceptions import StorageError
+from .paths import RIDDLES_DIR
+from .file_ids import file_ids
+from .riddle_assets import RiddleAsset
+
+import logging
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BQRB"
+FORMAT_VERSION = 1
+# magic, format version, index length, SHA-256 of the index
+HEADER = struct.Struct("<4sII32s")
+CHUNK_SIZE = 1024 * 1024
+
+
+class RiddleBundle:
+  """
+  An opened bundle. `index` is the parsed index, `data` a read-only view
+  of the file contents following it.
+  """
+
+  def __init__(self, path: Path, index: Dict[str, Any], data: memoryview):
+    self.path = path
+    self.index = index
+    self.data = data
+
+  @classmethod
+  def write(cls, path: Path, riddles: List[Riddle]) -> Dict[str, int]:
+    """
+    Packs the riddles into a bundle at `path`. Their files must carry RiddleAssets
+    (as download_riddle_file returns them). The bundle is written next to `path`
+    and renamed into place, so a running bot never maps a half-written one.
+    Returns the number of riddles, distinct files and bytes of file contents.
+    """
+    assets: Dict[str, RiddleAsset] = {}
+    offsets: Dict[str, int] = {}
+    size = 0
+    index_riddles = []
+    for riddle in sorted(riddles, key=lambda r: r.id):
+      messages = []
+      for message in riddle.messages:
+        files = []
+        for file in message.files:
+          asset = file.filedata
+          if not isinstance(asset, RiddleAsset):
+            raise StorageError(f"Riddle {riddle.id}: {file.filename} has no content to bundle")
+          if asset.sha256 not in offsets:
+            offsets[asset.sha256] = size
+            assets[asset.sha256] = asset
+            size += asset.size
+          files.append({
+            "filename": file.filename,
+            "type": file.type.value,
+            "offset": offsets[asset.sha256],
+            "size": asset.size,
+            "sha256": asset.sha256,
+          })
+        messages.append({"text": message.text, "files": files})
+      index_riddles.append({"id": riddle.id, "answer": riddle.answer, "type": riddle.type, "messages": messages})
+
+    index = json.dumps(
+      {"built_at": datetime.now(timezone.utc).isoformat(), "riddles": index_riddles},
+      ensure_ascii=False,
+    ).encode("utf-8")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("wb") as out:
+      out.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(index), hashlib.sha256(index).digest()))
+      out.write(index)
+      for asset in assets.values():
+        with asset.open() as f:
+          while chunk := f.read(CHUNK_SIZE):
+            out.write(chunk)
+    os.replace(tmp_path, path)
+
+    logger.info("Bundled %s riddles, %s files (%s bytes) into %s", len(index_riddles), len(assets), size, path)
+    return {"riddles": len(index_riddles), "files": len(assets), "bytes": size}
+
+  @classmethod
+  def open(cls, path: Path) -> RiddleBundle:
+    """
+    Maps the bundle and checks its header, index hash and that every file lies within it.
+    File contents are not read; see verify().
+    Raises StorageError if the bundle is missing or corrupted.
+    """
+    path = Path(path)
+    try:
+      with path.open("rb") as f:
+        # the mapping outlives the descriptor, no file stays open
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+      raise StorageError(f"Can't map riddle bundle {path}: {e}") from e
+
+    view = memoryview(mapping)
+    if len(view) < HEADER.size:
+      raise StorageError(f"Riddle bundle {path} is truncated")
+    magic, version, index_size, index_hash = HEADER.unpack_from(view)
+    if magic != MAGIC or version != FORMAT_VERSION:
+      raise StorageError(f"{path} is not a riddle bundle of format {FORMAT_VERSION}")
+
+    index_end = HEADER.size + index_size
+    index_bytes = view[HEADER.size:index_end]
+    if len(index_bytes) != index_size or hashlib.sha256(index_bytes).digest() != index_hash:
+      raise StorageError(f"Index of riddle bundle {path} is corrupted")
+    index = json.loads(bytes(index_bytes))
+
+    data = view[index_end:]
+    for riddle in index["riddles"]:
+      for message in riddle["messages"]:
+        for file in message["files"]:
+          if file["offset"] + file["size"] > len(data):
+            raise StorageError(f"Riddle bundle {path} is truncated")
+    return cls(path, index, data)
+
+  def _content(self, file: Dict[str, Any]) -> memoryview:
+    return self.data[file["offset"]:file["offset"] + file["size"]]
+
+  def riddles(self) -> List[Riddle]:
+    """
+    The bundled riddles. Their files carry RiddleAssets backed by the mapping
+    and the cache_keys of their contents.
+    """
+    riddles = []
+    for riddle in self.index["riddles"]:
+      messages = [
+        Message(_text=message["text"], _files=[self._file(riddle["id"], file) for file in message["files"]])
+        for message in riddle["messages"]
+      ]
+      riddles.append(Riddle(id=riddle["id"], messages=messages, answer=riddle["answer"], type=riddle["type"]))
+    return riddles
+
+  def _file(self, riddle_id: int, file: Dict[str, Any]) -> FileExtension:
+    asset = RiddleAsset(
+      path=RIDDLES_DIR / str(riddle_id) / file["filename"],
+      size=file["size"],
+      mtime_ns=0,
+      sha256=file["sha256"],
+      data=self._content(file),
+    )
+    cache_key = file_ids.key(riddle_id, file["filename"], file["sha256"])
+    return FileExtension(
+      type=FileType(file["type"]),
+      creator_id=ADMIN[0],
+      filedata=asset,
+      cache_key=cache_key,
+      filename=file["filename"],
+      creation_time=datetime.now(timezone(timedelta(hours=3))),
+      additional_data="riddle",
+    )
+
+  def verify(self) -> int:
+    """
+    Checks every file content against its SHA-256 (this reads the whole bundle).
+    Run by src.bundle_riddles after writing, not when the bot opens the bundle.
+    Returns the number of files checked; raises StorageError on a mismatch.
+    """
+    checked = set()
+    for riddle in self.index["riddles"]:
+      for message in riddle["messages"]:
+        for file in message["files"]:
+          if file["sha256"] in checked:
+            continue
+          if hashlib.sha256(self._content(file)).hexdigest() != file["sha256"]:
+            raise StorageError(f"Riddle bundle {self.path}: {file['filename']} of riddle {riddle['id']} is corrupted")
+          checked.add(file["sha256"])
+    return len(checked)
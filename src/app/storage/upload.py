@@ -1,12 +1,14 @@
 from pathlib import Path
 
 from ..core import FileExtension
-from .paths import TEAMS_DIR
-
-import aiofiles
-from pathlib import Path
-
-async def upload_file(file: FileExtension) -> None:
+from .blobs import BlobStore
+
+async def upload_file(file: FileExtension) -> Path:
+  """
+  Stores the file in its creator's team folder: the content goes to the blob store
+  (nothing is written if it is already there) and the team's manifest gets an entry.
+  Returns the path of the blob.
+  """
   if file.creator_id is None:
     raise ValueError("File has no creator_id.")
 
@@ -17,16 +19,17 @@ async def upload_file(file: FileExtension) -> None:
     raise ValueError("File has no data in it.")
 
   from ..db import TeamRepo
-  team = TeamRepo.get_by_member(file.creator_id)
+  team = await TeamRepo.get_by_member(file.creator_id)
   if team is None:
     raise ValueError(f"No team found for user {file.creator_id}")
-  
-  file.filedata.seek(0)
-  save_path: Path = TEAMS_DIR / team.name / file.filename
-  save_path.parent.mkdir(parents=True, exist_ok=True)
-
-  async with aiofiles.open(save_path, 'wb') as f:
-    while chunk := file.filedata.read(8192):
-      await f.write(chunk)
 
-  file.filedata.seek(0)
+  digest, size, _ = await BlobStore.store(file.filedata)
+  await BlobStore.add_to_manifest(team.name, {
+    "filename": file.filename,
+    "sha256": digest,
+    "size": size,
+    "type": file.type.value if file.type else None,
+    "creator_id": file.creator_id,
+    "created": file.creation_time.isoformat() if file.creation_time else None,
+  })
+  return BlobStore.blob_path(digest)
@@ -3,9 +3,11 @@ Helpful utilities for the bot.
 This package exposes common helper functions (time, send_message, @generate_properties decorator etc.)
 """
 
-from .utils import Timer, Utils
+from .utils import Timer, Utils, Metrics, Histogram
 
 __all__ = [
     "Timer",
-    "Utils"
+    "Utils",
+    "Metrics",
+    "Histogram"
 ]
@@ -3,6 +3,8 @@ from __future__ import annotations
 import logging
 import logging
 from datetime import datetime, timezone, timedelta
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Sequence
 import hashlib
 from ...config import START_TIME
 
@@ -70,3 +72,57 @@ class Timer:
   def time_to_int(time: datetime) -> int:
     """Counts how many seconds have passed since the beginning of the quest"""
     return int(time.timestamp() - START_TIME)
+
+
+class Metrics:
+  """
+  Registry of runtime statistics.
+  Long-living components (worker pools, queues, collectors) register a provider
+  which returns a flat dict of their current numbers; admins get all of them via /stats.
+  """
+
+  _providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+  @classmethod
+  def register(cls, name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Registers (or replaces) a statistics provider under the given name."""
+    cls._providers[name] = provider
+
+  @classmethod
+  def unregister(cls, name: str) -> None:
+    """Removes a statistics provider, if it exists."""
+    cls._providers.pop(name, None)
+
+  @classmethod
+  def snapshot(cls) -> Dict[str, Dict[str, Any]]:
+    """
+    Collects current statistics from all providers.
+    A failing provider is logged and skipped, so one broken component can't hide the rest.
+    """
+    result = {}
+    for name, provider in list(cls._providers.items()):
+      try:
+        result[name] = provider()
+      except Exception as exc:
+        logger.error("Failed to collect metrics from %s: %s", name, exc)
+    return result
+
+
+class Histogram:
+  """
+  Counts of observed values by upper bounds, for Metrics providers.
+  as_dict() gives flat "<name>_le_<bound>" keys plus "<name>_inf" for larger values.
+  """
+
+  def __init__(self, name: str, bounds: Sequence[float]):
+    self.name = name
+    self.bounds = sorted(bounds)
+    self.counts = [0] * (len(self.bounds) + 1)
+
+  def observe(self, value: float) -> None:
+    self.counts[bisect_left(self.bounds, value)] += 1
+
+  def as_dict(self) -> Dict[str, int]:
+    result = {f"{self.name}_le_{bound:g}": count for bound, count in zip(self.bounds, self.counts)}
+    result[f"{self.name}_inf"] = self.counts[-1]
+    return result
@@ -0,0 +1,38 @@
+"""
+Builds the riddle bundle (see RiddleBundle) from the database and RIDDLES_DIR.
+
+Run: python3 -m src.bundle_riddles [path]
+The default path is STORAGE_ROOT/riddles.bundle, where the bot looks for it with RIDDLE_BUNDLE=1.
+Rebuild it after editing riddles, then /reload_riddles (or restart) to pick it up.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from .main import setup_logging
+from .app.db.db_conn import DB
+from .app.db.queries import RiddleQuery
+from .app.storage import RiddleBundle
+from .app.storage.paths import RIDDLE_BUNDLE_PATH
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+async def build(path: Path) -> None:
+  """
+  Writes the bundle of all riddles to `path` and checks every file in it.
+  """
+  try:
+    riddles = await RiddleQuery.get_many()
+  finally:
+    await DB.close()
+  stats = await asyncio.to_thread(RiddleBundle.write, path, riddles)
+  checked = await asyncio.to_thread(lambda: RiddleBundle.open(path).verify())
+  logger.info("Riddle bundle %s: %s, %s files verified", path, stats, checked)
+
+
+if __name__ == "__main__":
+  setup_logging()
+  asyncio.run(build(Path(sys.argv[1]) if len(sys.argv) > 1 else RIDDLE_BUNDLE_PATH))
@@ -16,6 +16,43 @@ __all__ = [
     "STORAGE_ROOT",
     "AUTO_UPLOAD",
 
+    "RUN_MODE",
+    "WEBHOOK_URL",
+    "WEBHOOK_SECRET",
+    "WEBHOOK_PATH",
+    "WEBHOOK_HOST",
+    "WEBHOOK_PORT",
+    "WEBHOOK_MAX_CONCURRENCY",
+
+    "ROUTE_DISPATCH_MODE",
+    "ROUTE_POOL_SIZE",
+    "TEAM_MAILBOX_IDLE_TIMEOUT",
+    "ADMISSION_HIGH_WATERMARK",
+    "ADMISSION_LOW_WATERMARK",
+    "ADMISSION_MAX_IN_FLIGHT",
+    "ADMISSION_DUPLICATE_WINDOW",
+    "MEDIA_GROUP_TIMEOUT",
+    "MEDIA_GROUP_MIN_TIMEOUT",
+    "MEDIA_GROUP_MAX_TIMEOUT",
+    "ARCHIVE_WORKERS",
+    "ARCHIVE_RETRIES",
+    "ARCHIVE_RETRY_DELAY",
+    "FILE_SPOOL_MAX_MEMORY",
+    "SEND_GLOBAL_RATE",
+    "SEND_CHAT_RATE",
+    "SEND_CHAT_BURST",
+    "SEND_GROUP_RATE_PER_MINUTE",
+    "SEND_MAX_RETRIES",
+    "SEND_WORKERS",
+    "BROADCAST_PAGE_SIZE",
+    "BROADCAST_REPORT_INTERVAL",
+    "RIDDLE_ASSETS_MAX_BYTES",
+    "RIDDLES_WATCH_INTERVAL",
+    "RIDDLE_BUNDLE",
+    "SHUTDOWN_TIMEOUT",
+    "WORKER_PROCESSES",
+    "WORKER_WATCH_INTERVAL",
+
     "CACHE_SIZE",
     "TEAM_CACHE_SIZE",
     "RIDDLE_CACHE_SIZE",
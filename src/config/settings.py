@@ -26,6 +26,77 @@ RIDDLE_TABLE_NAME: str = "riddle"
 RIDDLE_MESSAGE_TABLE_NAME: str = "riddle_message"
 RIDDLE_FILE_TABLE_NAME: str = "riddle_file"
 
+# Runtime: "polling" or "webhook"
+RUN_MODE: str = os.getenv("RUN_MODE", "polling")
+WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_PATH: str = "/webhook"
+WEBHOOK_HOST: str = "0.0.0.0"
+WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8080"))
+# max updates processed at once in webhook mode
+WEBHOOK_MAX_CONCURRENCY: int = 64
+
+# Routing
+# "inline" routes every update right in its handler;
+# "pool" queues updates for ROUTE_POOL_SIZE routing workers
+ROUTE_DISPATCH_MODE: str = "inline"
+ROUTE_POOL_SIZE: int = 8
+# seconds after which an idle per-team mailbox is dropped
+TEAM_MAILBOX_IDLE_TIMEOUT: float = 30.0
+
+# Admission control: updates being routed at once.
+# Above the high watermark repeated messages are dropped until the load falls to the low one;
+# at the max normal messages get a "busy" reply. Admin and verification traffic always passes.
+ADMISSION_HIGH_WATERMARK: int = 200
+ADMISSION_LOW_WATERMARK: int = 100
+ADMISSION_MAX_IN_FLIGHT: int = 500
+# seconds within which the same text from the same user counts as a repeat
+ADMISSION_DUPLICATE_WINDOW: float = 10.0
+
+# Media groups: seconds to wait for the next album item.
+# Starts at MEDIA_GROUP_TIMEOUT and then follows observed delivery gaps within the bounds
+MEDIA_GROUP_TIMEOUT: float = 0.25
+MEDIA_GROUP_MIN_TIMEOUT: float = 0.1
+MEDIA_GROUP_MAX_TIMEOUT: float = 1.0
+
+# AUTO_UPLOAD archival: background workers storing player files,
+# attempts after the first failure and the first retry delay in seconds (doubled every time)
+ARCHIVE_WORKERS: int = 8
+ARCHIVE_RETRIES: int = 3
+ARCHIVE_RETRY_DELAY: float = 1.0
+# attachments bigger than this (bytes) are downloaded into a temporary file instead of memory
+FILE_SPOOL_MAX_MEMORY: int = 1024 * 1024
+
+# Outbound rate limits (Telegram: ~30 messages/s overall, ~1/s per private chat, 20/min per group).
+# Sends hitting 429 anyway are repeated after retry_after up to SEND_MAX_RETRIES times.
+# In multi-process mode every worker gets 1/WORKER_PROCESSES of the global and the group rate
+SEND_GLOBAL_RATE: float = 30.0
+SEND_CHAT_RATE: float = 1.0
+SEND_CHAT_BURST: int = 3
+SEND_GROUP_RATE_PER_MINUTE: float = 20.0
+SEND_MAX_RETRIES: int = 5
+# workers of the outbound queue: chats served at the same time
+SEND_WORKERS: int = 16
+
+# Broadcasts: recipients read (and progress saved) per page, seconds between progress reports
+BROADCAST_PAGE_SIZE: int = 100
+BROADCAST_REPORT_INTERVAL: float = 30.0
+
+# bytes of riddle files kept in memory for uploads; files beyond it are streamed from disk
+RIDDLE_ASSETS_MAX_BYTES: int = 256 * 1024 * 1024
+# seconds between checks of RIDDLES_DIR (the riddle bundle with RIDDLE_BUNDLE) for changed files (riddles are reloaded then); 0 turns it off
+RIDDLES_WATCH_INTERVAL: float = float(os.getenv("RIDDLES_WATCH_INTERVAL", "0"))
+# load riddles from STORAGE_ROOT/riddles.bundle (python3 -m src.bundle_riddles) instead of the database
+RIDDLE_BUNDLE: bool = os.getenv("RIDDLE_BUNDLE", "0") == "1"
+
+# seconds graceful shutdown waits for updates and sends which are still in progress
+SHUTDOWN_TIMEOUT: float = 20.0
+
+# Multi-process mode (python3 -m src.supervisor)
+WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", "4"))
+# seconds between worker liveness checks
+WORKER_WATCH_INTERVAL: float = 1.0
+
 # Other
 STAGE_COUNT: int = 17
 START_TIME: int = 1701369600
@@ -1,12 +1,28 @@
 import asyncio
+import signal
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Set
 from logging.config import dictConfig
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.types import Update
 
 from .app.bot import tg_router
-from .config import BOT_TOKEN
+from .app.bot.handlers import collector, background_tasks, team_scheduler, route_pool
+from .app.bot.message_handler import archiver
+from .app.bot.sender import send_scheduler
+from .app.bot.broadcast import broadcaster
+from .app.bot.riddle_reloader import riddle_reloader
+from .app.bot.webhook import run_webhook
+from .app.db.db_conn import DB
+from .app.db import RiddleRepo
+from .config import BOT_TOKEN, RUN_MODE, SHUTDOWN_TIMEOUT
+
+import logging
+logger = logging.getLogger(__name__)
 
 
 LOGGING_CONFIG = {
@@ -37,19 +53,184 @@ def setup_logging() -> None:
   dictConfig(LOGGING_CONFIG)
 
 
+def create_bot() -> Bot:
+  """
+  Creates the Telegram bot with the default properties used across the app.
+  """
+  return Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+
+class Lifecycle:
+  """
+  Runs the bot until SIGINT/SIGTERM and then shuts it down gracefully:
+  1. stops intake (long polling or the webhook server, which first processes
+     the updates it has already answered Telegram for, up to the deadline);
+  2. flushes all pending media groups right away;
+  3. waits for updates still being handled, queued sends and queued archival,
+     up to the deadline (broadcasts stop after their current page);
+  4. stops routing, sending and archival workers and closes the bot session and the database pool.
+  Every phase is logged with its duration.
+  """
+
+  def __init__(self, dp: Dispatcher, bot: Bot, deadline: float = SHUTDOWN_TIMEOUT):
+    self._dp = dp
+    self._bot = bot
+    self._deadline = deadline
+    self._stop = asyncio.Event()
+    self._updates: Set[asyncio.Task] = set()
+    dp.update.outer_middleware(self._track_update)
+
+  async def _track_update(
+    self,
+    handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+    event: Update,
+    data: Dict[str, Any],
+  ) -> Any:
+    task = asyncio.current_task()
+    self._updates.add(task)
+    try:
+      return await handler(event, data)
+    finally:
+      self._updates.discard(task)
+
+  def stop(self) -> None:
+    """
+    Requests the shutdown.
+    """
+    self._stop.set()
+
+  async def run(self) -> None:
+    """
+    Receives updates until stopped, then shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    signals = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+      try:
+        loop.add_signal_handler(sig, self.stop)
+        signals.append(sig)
+      except NotImplementedError:
+        # Windows: Ctrl+C cancels the main task, shutdown still runs below
+        pass
+
+    if RUN_MODE == "webhook":
+      # accepted updates are processed before the server closes, within the shutdown deadline
+      intake = asyncio.create_task(
+        run_webhook(self._dp, self._bot, stop=self._stop, pending_timeout=self._deadline)
+      )
+    else:
+      intake = asyncio.create_task(
+        self._dp.start_polling(self._bot, handle_signals=False, close_bot_session=False)
+      )
+    stopped = asyncio.create_task(self._stop.wait())
+    resumed = await broadcaster.resume(self._bot)
+    if resumed:
+      logger.info("Resumed %s interrupted broadcasts", resumed)
+    riddle_reloader.watch(self._bot)
+
+    try:
+      await asyncio.wait({intake, stopped}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+      stopped.cancel()
+      for sig in signals:
+        loop.remove_signal_handler(sig)
+      await self.shutdown(intake)
+    intake.result()
+
+  @contextmanager
+  def _phase(self, name: str):
+    started = time.monotonic()
+    try:
+      yield
+    finally:
+      logger.info("Shutdown: %s took %.3fs", name, time.monotonic() - started)
+
+  async def shutdown(self, intake: asyncio.Task) -> None:
+    started = time.monotonic()
+    logger.info("Shutting down")
+
+    with self._phase("stopping intake"):
+      self._stop.set()
+      if RUN_MODE != "webhook" and not intake.done():
+        try:
+          await self._dp.stop_polling()
+        except RuntimeError:
+          # polling has not started yet
+          intake.cancel()
+      await asyncio.wait({intake})
+
+    await self.drain(started)
+
+  async def drain(self, started: float | None = None) -> None:
+    """
+    Steps 2-4 of the shutdown, for callers which have stopped intake themselves
+    (supervisor workers). The deadline counts from `started` (now by default).
+    """
+    if started is None:
+      started = time.monotonic()
+
+    with self._phase("flushing media groups"):
+      flushed = await collector.flush_all()
+      logger.info("Shutdown: flushed %s media groups", flushed)
+
+    with self._phase("waiting for updates and sends"):
+      await self._drain(started + self._deadline)
+      # broadcasts finish their current page and are resumed after restart
+      await broadcaster.close(max(0.0, started + self._deadline - time.monotonic()))
+      try:
+        await asyncio.wait_for(send_scheduler.join(), max(0.0, started + self._deadline - time.monotonic()))
+      except asyncio.TimeoutError:
+        logger.warning("Shutdown deadline exceeded, %s messages are not sent", send_scheduler.depth)
+
+    with self._phase("waiting for archival"):
+      try:
+        await asyncio.wait_for(archiver.join(), max(0.0, started + self._deadline - time.monotonic()))
+      except asyncio.TimeoutError:
+        logger.warning("Shutdown deadline exceeded, %s files are not archived", archiver.stats()["queue_depth"])
+
+    with self._phase("stopping workers"):
+      await riddle_reloader.close()
+      await team_scheduler.close()
+      await route_pool.close()
+      await send_scheduler.close()
+      await archiver.close()
+
+    with self._phase("closing connections"):
+      await self._bot.session.close()
+      await DB.close()
+
+    logger.info("Shutdown finished in %.3fs", time.monotonic() - started)
+
+  async def _drain(self, deadline: float) -> None:
+    # handled updates may start new background sends, so the set is re-read every round
+    while pending := {t for t in self._updates | background_tasks if not t.done()}:
+      timeout = deadline - time.monotonic()
+      if timeout <= 0:
+        logger.warning("Shutdown deadline exceeded, cancelling %s unfinished tasks", len(pending))
+        for task in pending:
+          task.cancel()
+        await asyncio.wait(pending)
+        return
+      await asyncio.wait(pending, timeout=timeout)
+
+
 async def main() -> None:
   """
   Main entry point of the application.
-  Sets up logging, initializes the bot and dispatcher, and starts polling.
+  Sets up logging, preloads riddles, initializes the bot and dispatcher, and starts receiving updates:
+  via long polling or via webhook server, depending on RUN_MODE.
+  On SIGINT/SIGTERM shuts down gracefully (see Lifecycle).
   """
   setup_logging()
+  # a missing stage stops the start right here, not when the first team reaches it
+  await RiddleRepo.preload()
 
-  bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+  bot = create_bot()
   dp = Dispatcher()
 
   dp.include_router(tg_router)
 
-  await dp.start_polling(bot)
+  await Lifecycle(dp, bot).run()
 
 
 if __name__ == "__main__":
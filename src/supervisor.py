@@ -0,0 +1,312 @@
+"""
+Multi-process entry point of the application.
+
+The supervisor receives every update once (long polling or webhook, see RUN_MODE) and shards
+it to one of WORKER_PROCESSES worker processes by a stable hash of the update's team (or of the
+user while they are not registered; see Router.ordering_key). All updates of one team always
+land in the same worker, so per-worker TeamCache/MemberCache and the services' contexts stay
+coherent without any cross-process invalidation. Telegram's global and group send limits
+count all workers together, so each worker sends at 1/WORKER_PROCESSES of them.
+
+Every update is kept by the supervisor until its worker acknowledges it. If a worker dies,
+it is restarted and all its unacknowledged updates are replayed in their original order
+(at-least-once delivery).
+
+Run: python3 -m src.supervisor
+"""
+
+from __future__ import annotations
+import asyncio
+import multiprocessing as mp
+import queue
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import Update
+
+from .main import setup_logging, create_bot, Lifecycle
+from .app.bot import tg_router, Router, MessageHandler
+from .app.bot.webhook import run_webhook
+from .app.bot.sender import track_sends, limiter
+from .app.bot.broadcast import broadcaster, ORDERING_KEY as BROADCAST_KEY
+from .app.bot.riddle_reloader import riddle_reloader
+from .app.core import Message
+from .app.db.db_conn import DB
+from .app.db import RiddleRepo
+from .config import RUN_MODE, WORKER_PROCESSES, WORKER_WATCH_INTERVAL
+
+import logging
+logger = logging.getLogger(__name__)
+
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+
+def shard_index(key: Hashable, shards: int) -> int:
+  """
+  Stable (across processes and restarts) shard number for the key.
+  Python's hash() is salted per process, so crc32 of the key's repr is used instead.
+  """
+  return zlib.crc32(repr(key).encode()) % shards
+
+
+async def update_shard_key(update: Update) -> Hashable:
+  """
+  Returns the ordering key of a raw update without downloading any attachments.
+  """
+  if update.callback_query:
+    msg = await MessageHandler.from_tg(update.callback_query)
+  elif update.message and update.message.from_user:
+    tg_msg = update.message
+    background_info = {}
+    if tg_msg.reply_to_message:
+      background_info["reply_text"] = tg_msg.reply_to_message.text
+    msg = Message(
+      _user_id=tg_msg.from_user.id,
+      _text=tg_msg.text or tg_msg.caption or "",
+      _background_info=background_info,
+    )
+  else:
+    return ("update", update.update_id)
+  return await Router.ordering_key(msg)
+
+
+# ---------- WORKER SIDE ----------
+
+def worker_main(index: int, inbox: mp.Queue, outbox: mp.Queue) -> None:
+  """
+  Entry point of a worker process: feeds updates from the inbox into its own dispatcher
+  and acknowledges each of them (by sequence number) via the outbox once it is processed
+  and the replies it queued are sent.
+  A None in the inbox stops the worker after all started updates are done.
+  """
+  setup_logging()
+  asyncio.run(_run_worker(index, inbox, outbox))
+
+
+async def _run_worker(index: int, inbox: mp.Queue, outbox: mp.Queue) -> None:
+  await RiddleRepo.preload()
+  bot = create_bot()
+  dp = Dispatcher()
+  dp.include_router(tg_router)
+  lifecycle = Lifecycle(dp, bot)
+  tasks = set()
+  # every worker has its own riddle snapshot and the command would reach only one of them;
+  # the file watch (RIDDLES_WATCH_INTERVAL) runs in every worker
+  riddle_reloader.command_enabled = False
+  # all workers send for one bot, the global and ADMIN_CHAT (group) limits are split between them
+  limiter.share(WORKER_PROCESSES)
+  riddle_reloader.watch(bot)
+  # /broadcast commands are sharded by one key, so only their worker resumes broadcasts
+  # (resuming them elsewhere too would send them twice); the drain below closes the broadcaster
+  if index == shard_index(BROADCAST_KEY, WORKER_PROCESSES):
+    resumed = await broadcaster.resume(bot)
+    if resumed:
+      logger.info("Worker %s resumed %s interrupted broadcasts", index, resumed)
+  logger.info("Worker %s started", index)
+
+  try:
+    while True:
+      item = await asyncio.to_thread(inbox.get)
+      if item is None:
+        break
+      seq, update = item
+      task = asyncio.create_task(_process_update(dp, bot, seq, update, outbox))
+      tasks.add(task)
+      task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks, return_exceptions=True)
+  finally:
+    # the same drain as a single-process shutdown: media groups, updates, sends, archival
+    await lifecycle.drain()
+    logger.info("Worker %s stopped", index)
+
+
+async def _process_update(dp: Dispatcher, bot, seq: int, update: Dict[str, Any], outbox: mp.Queue) -> None:
+  with track_sends() as sends:
+    try:
+      await dp.feed_raw_update(bot, update)
+    except Exception:
+      # a failing update is acknowledged anyway: replaying it would fail again
+      logger.exception("Failed to process update #%s", seq)
+  # acknowledged once its replies are out (an album item: once its album is handled),
+  # so a worker dying before that replays the update
+  await asyncio.gather(*sends)
+  outbox.put(seq)
+
+
+# ---------- SUPERVISOR SIDE ----------
+
+@dataclass
+class WorkerHandle:
+  """
+  One worker process, its queues and the updates it has not acknowledged yet.
+  """
+  index: int
+  process: Any = None
+  inbox: Any = None
+  outbox: Any = None
+  unacked: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+  restarts: int = 0
+
+
+class Supervisor:
+  """
+  Starts the worker processes, shards updates between them, collects acknowledgements
+  and restarts crashed workers with a replay of their unacknowledged updates.
+  """
+
+  def __init__(
+    self,
+    workers: int,
+    target: Callable[[int, Any, Any], None] = worker_main,
+    context: Any = None,
+    watch_interval: float = WORKER_WATCH_INTERVAL,
+  ):
+    if workers < 1:
+      raise ValueError("Supervisor needs at least one worker")
+    self._ctx = context or mp.get_context("spawn")
+    self._target = target
+    self._watch_interval = watch_interval
+    self._workers = [WorkerHandle(index=i) for i in range(workers)]
+    self._seq = 0
+    self._closing = False
+    self._tasks: List[asyncio.Task] = []
+
+  def start(self) -> None:
+    """
+    Spawns all workers and starts acknowledgement and liveness watchers.
+    Must be called from a running event loop.
+    """
+    for worker in self._workers:
+      self._spawn(worker)
+      self._tasks.append(asyncio.create_task(self._collect_acks(worker)))
+    self._tasks.append(asyncio.create_task(self._watch()))
+
+  def dispatch(self, key: Hashable, update: Dict[str, Any]) -> int:
+    """
+    Sends the update to the worker owning the key. Returns the update's sequence number.
+    """
+    worker = self._workers[shard_index(key, len(self._workers))]
+    self._seq += 1
+    worker.unacked[self._seq] = update
+    worker.inbox.put((self._seq, update))
+    return self._seq
+
+  def _spawn(self, worker: WorkerHandle) -> None:
+    # queues are recreated: a process killed mid-read may leave the old ones locked
+    worker.inbox = self._ctx.Queue()
+    worker.outbox = self._ctx.Queue()
+    worker.process = self._ctx.Process(
+      target=self._target,
+      args=(worker.index, worker.inbox, worker.outbox),
+      name=f"bqbot-worker-{worker.index}",
+      daemon=True,
+    )
+    worker.process.start()
+    for seq in sorted(worker.unacked):
+      worker.inbox.put((seq, worker.unacked[seq]))
+
+  def _ack(self, worker: WorkerHandle, seq: int) -> None:
+    worker.unacked.pop(seq, None)
+
+  async def _collect_acks(self, worker: WorkerHandle) -> None:
+    while True:
+      outbox = worker.outbox
+      try:
+        seq = await asyncio.to_thread(outbox.get, True, self._watch_interval)
+      except queue.Empty:
+        continue
+      self._ack(worker, seq)
+
+  async def _watch(self) -> None:
+    while not self._closing:
+      await asyncio.sleep(self._watch_interval)
+      for worker in self._workers:
+        if self._closing or worker.process.is_alive():
+          continue
+        # acknowledgements the worker managed to send before dying are not replayed
+        try:
+          while True:
+            self._ack(worker, worker.outbox.get_nowait())
+        except queue.Empty:
+          pass
+        worker.restarts += 1
+        logger.error(
+          "Worker %s died (exit code %s), restarting it and replaying %s updates",
+          worker.index, worker.process.exitcode, len(worker.unacked),
+        )
+        self._spawn(worker)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Unacknowledged updates and restarts per worker.
+    """
+    return {
+      f"worker_{w.index}": {"unacked": len(w.unacked), "restarts": w.restarts}
+      for w in self._workers
+    }
+
+  async def close(self, timeout: float = 10.0) -> None:
+    """
+    Lets workers finish the updates they already have and stops them;
+    workers which don't stop within the timeout are terminated.
+    """
+    self._closing = True
+    for worker in self._workers:
+      worker.inbox.put(None)
+    for worker in self._workers:
+      await asyncio.to_thread(worker.process.join, timeout)
+      if worker.process.is_alive():
+        logger.warning("Worker %s did not stop in time, terminating it", worker.index)
+        worker.process.terminate()
+    for task in self._tasks:
+      task.cancel()
+    await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class ShardingMiddleware(BaseMiddleware):
+  """
+  Outer update middleware of the supervisor's dispatcher:
+  hands every update to a worker instead of handling it in this process.
+  """
+
+  def __init__(self, supervisor: Supervisor):
+    self._supervisor = supervisor
+
+  async def __call__(
+    self,
+    handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+    event: Update,
+    data: Dict[str, Any],
+  ) -> Any:
+    key = await update_shard_key(event)
+    self._supervisor.dispatch(key, event.model_dump(mode="json", exclude_none=True))
+    return None
+
+
+async def main() -> None:
+  """
+  Starts the workers and receives updates for them (via long polling or webhook).
+  """
+  setup_logging()
+
+  supervisor = Supervisor(workers=WORKER_PROCESSES)
+  supervisor.start()
+
+  bot = create_bot()
+  dp = Dispatcher()
+  dp.update.outer_middleware(ShardingMiddleware(supervisor))
+
+  try:
+    if RUN_MODE == "webhook":
+      await run_webhook(dp, bot, allowed_updates=ALLOWED_UPDATES)
+    else:
+      await dp.start_polling(bot, allowed_updates=ALLOWED_UPDATES)
+  finally:
+    await supervisor.close()
+    await DB.close()
+
+
+if __name__ == "__main__":
+  asyncio.run(main())
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+
+from src.app.bot.admission import AdmissionController, Priority, BUSY_TEXT
+from src.app.core import Message, FileExtension, FileType
+
+
+@pytest.fixture(autouse=True)
+def admins(monkeypatch):
+  monkeypatch.setattr("src.app.bot.admission.ADMIN", [1])
+
+
+def make_controller(high=2, low=1, max_in_flight=3):
+  return AdmissionController(
+    high_watermark=high,
+    low_watermark=low,
+    max_in_flight=max_in_flight,
+    duplicate_window=60,
+  )
+
+
+def test_classify():
+  controller = make_controller()
+  assert controller.classify(Message(_text="/riddle", _user_id=5)) == Priority.NORMAL
+  assert controller.classify(Message(_text="/riddle", _user_id=5)) == Priority.LOW
+  assert controller.classify(Message(_text="/riddle", _user_id=6)) == Priority.NORMAL
+  assert controller.classify(Message(_text="x", _user_id=1)) == Priority.CRITICAL
+
+  photo = FileExtension(type=FileType.PHOTO, creator_id=5)
+  assert controller.classify(Message(_text="", _user_id=5, _files=[photo])) == Priority.CRITICAL
+
+
+def test_invalid_limits():
+  with pytest.raises(ValueError):
+    make_controller(high=3, low=4, max_in_flight=5)
+
+
+@pytest.mark.asyncio
+async def test_sheds_repeats_above_high_watermark():
+  controller = make_controller()
+  release = asyncio.Event()
+
+  async def slow_route(msg):
+    await release.wait()
+    return [msg]
+
+  # two different answers reach the high watermark
+  tasks = [
+    asyncio.create_task(controller.submit(Message(_text=text, _user_id=5), slow_route))
+    for text in ("a", "b")
+  ]
+  await asyncio.sleep(0)
+  assert controller.stats()["shedding"]
+
+  # a repeated answer is dropped, a new one is still routed
+  assert await controller.submit(Message(_text="a", _user_id=5), slow_route) == []
+  tasks.append(asyncio.create_task(controller.submit(Message(_text="c", _user_id=5), slow_route)))
+  await asyncio.sleep(0)
+
+  # at the hard limit new messages get a busy reply, admins still pass
+  busy = await controller.submit(Message(_text="d", _user_id=5), slow_route)
+  assert busy[0].text == BUSY_TEXT
+  assert busy[0].recipient_id == 5
+  tasks.append(asyncio.create_task(controller.submit(Message(_text="/stats", _user_id=1), slow_route)))
+  await asyncio.sleep(0)
+  assert controller.stats()["in_flight"] == 4
+
+  release.set()
+  await asyncio.gather(*tasks)
+  stats = controller.stats()
+  assert stats["shedding"] is False
+  assert stats["in_flight"] == 0
+  assert stats["peak_in_flight"] == 4
+  assert stats["admitted"] == 4
+  assert stats["shed_dropped"] == 1
+  assert stats["shed_busy"] == 1
+
+
+@pytest.mark.asyncio
+async def test_answers_to_verification_riddles_are_always_admitted():
+  async def awaits_verification(user_id):
+    return user_id == 7
+
+  controller = AdmissionController(
+    high_watermark=1, low_watermark=0, max_in_flight=1, duplicate_window=60,
+    awaits_verification=awaits_verification,
+  )
+  release = asyncio.Event()
+
+  async def slow_route(msg):
+    await release.wait()
+    return [msg]
+
+  blocker = asyncio.create_task(controller.submit(Message(_text="busy", _user_id=5), slow_route))
+  await asyncio.sleep(0)
+
+  # a text answer has neither files nor a callback type, yet it is verification traffic
+  answer = asyncio.create_task(controller.submit(Message(_text="answer", _user_id=7), slow_route))
+  repeat = asyncio.create_task(controller.submit(Message(_text="answer", _user_id=7), slow_route))
+  busy = await controller.submit(Message(_text="answer", _user_id=6), slow_route)
+  assert busy[0].text == BUSY_TEXT
+
+  release.set()
+  assert (await answer)[0].text == (await repeat)[0].text == "answer"
+  await blocker
+  assert controller.stats()["shed_busy"] == 1
+
+
+@pytest.mark.asyncio
+async def test_repeats_of_unregistered_users_are_not_dropped():
+  registered = {5}
+
+  async def is_registered(user_id):
+    return user_id in registered
+
+  controller = AdmissionController(
+    high_watermark=1, low_watermark=0, max_in_flight=10, duplicate_window=60, is_registered=is_registered,
+  )
+  release = asyncio.Event()
+
+  async def slow_route(msg):
+    await release.wait()
+    return [msg]
+
+  blocker = asyncio.create_task(controller.submit(Message(_text="busy", _user_id=1), slow_route))
+  await asyncio.sleep(0)
+  assert controller.stats()["shedding"]
+
+  # registration asks for the password twice
+  controller.classify(Message(_text="secret", _user_id=9))
+  repeat = asyncio.create_task(controller.submit(Message(_text="secret", _user_id=9), slow_route))
+  controller.classify(Message(_text="/riddle", _user_id=5))
+  assert await controller.submit(Message(_text="/riddle", _user_id=5), slow_route) == []
+
+  release.set()
+  assert (await repeat)[0].text == "secret"
+  await blocker
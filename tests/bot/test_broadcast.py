@@ -0,0 +1,109 @@
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from src.app.bot.broadcast import Broadcaster
+from src.app.core import FileExtension, FileType, Message
+
+MEMBERS = [SimpleNamespace(id=i) for i in (10, 20, 30, 40, 50)]
+
+
+async def member_page(after_id, limit):
+  return [m for m in MEMBERS if m.id > after_id][:limit]
+
+
+@pytest.fixture
+def members():
+  with patch("src.app.bot.broadcast.MemberRepo.get_page", side_effect=member_page), \
+       patch("src.app.bot.broadcast.MemberRepo.count", AsyncMock(return_value=len(MEMBERS))):
+    yield
+
+
+def make_broadcaster(tmp_path, submit, report=None, report_interval=0.0):
+  return Broadcaster(
+    directory=tmp_path,
+    page_size=2,
+    report_interval=report_interval,
+    submit=submit,
+    report=report or AsyncMock(),
+  )
+
+
+def command(text, files=None):
+  return Message(_text=text, _user_id=1, _files=files or [])
+
+
+async def wait_finished(broadcaster):
+  while broadcaster.stats()["active"]:
+    await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_every_member_with_file_ids(tmp_path, members):
+  sent = []
+
+  async def submit(message, bot):
+    sent.append((message.recipient_id, message.text, [f.file_id for f in message.files]))
+    return message.recipient_id != 30
+
+  report = AsyncMock()
+  broadcaster = make_broadcaster(tmp_path, submit, report)
+  photo = FileExtension(type=FileType.PHOTO, creator_id=1, filename="a.jpg", file_id="photo-id")
+  reply = await broadcaster.start(command("/broadcast members Старт через час!", [photo]), bot=None)
+  assert "5 members" in reply.text
+
+  await wait_finished(broadcaster)
+
+  assert sent == [(m.id, "Старт через час!", ["photo-id"]) for m in MEMBERS]
+  state = json.loads(next(tmp_path.glob("*.json")).read_text(encoding="utf-8"))
+  assert (state["sent"], state["failed"], state["cursor"], state["finished"]) == (4, 1, 50, True)
+  final = report.await_args_list[-1].args[0]
+  assert "5/5" in final.text and "finished" in final.text
+  assert broadcaster.stats()["finished"] == 1
+
+
+@pytest.mark.asyncio
+async def test_wrong_command_gets_usage(tmp_path, members):
+  broadcaster = make_broadcaster(tmp_path, AsyncMock())
+  reply = await broadcaster.start(command("/broadcast everyone hi"), bot=None)
+  assert reply.text.startswith("Usage")
+  assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_interrupted_broadcast_resumes_after_last_page(tmp_path, members):
+  first_page_done = asyncio.Event()
+  release = asyncio.Event()
+  sent = []
+
+  async def slow_submit(message, bot):
+    sent.append(message.recipient_id)
+    if len(sent) == 2:
+      first_page_done.set()
+    if len(sent) > 2:
+      await release.wait()
+    return True
+
+  broadcaster = make_broadcaster(tmp_path, slow_submit, report_interval=3600)
+  await broadcaster.start(command("/broadcast members hi"), bot=None)
+  await first_page_done.wait()
+  await asyncio.sleep(0.01)
+  await broadcaster.close(timeout=0.01)  # the second page never completes
+
+  state = json.loads(next(tmp_path.glob("*.json")).read_text(encoding="utf-8"))
+  assert (state["cursor"], state["finished"]) == (20, False)
+
+  resent = []
+
+  async def submit(message, bot):
+    resent.append(message.recipient_id)
+    return True
+
+  restarted = make_broadcaster(tmp_path, submit)
+  assert await restarted.resume(bot=None) == 1
+  await wait_finished(restarted)
+
+  assert resent == [30, 40, 50]
+  assert await restarted.resume(bot=None) == 0
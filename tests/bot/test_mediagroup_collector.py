@@ -0,0 +1,193 @@
+import asyncio
+import pytest
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.app.bot import mediagroup_collector
+from src.app.bot.sender import track_sends, track_future
+from src.app.bot.mediagroup_collector import (
+  MediaGroupCollector, MAX_ALBUM_ITEMS, MIN_GAP_SAMPLES, GAP_WINDOW, GAP_UPDATE_EVERY, GAP_MARGIN,
+)
+
+
+def make_tg_msg(gid):
+  msg = MagicMock()
+  msg.media_group_id = gid
+  return msg
+
+
+@contextmanager
+def patch_conversion():
+  with patch('src.app.bot.mediagroup_collector.MessageHandler.files_from_tg', return_value=[]):
+    with patch('src.app.bot.mediagroup_collector.MessageHandler.from_media_group', new_callable=AsyncMock) as mock_convert:
+      yield mock_convert
+
+
+@pytest.mark.asyncio
+async def test_flush_all_flushes_pending_groups_immediately():
+  ready = []
+  collector = MediaGroupCollector(timeout=60, on_ready=ready.append)
+
+  with patch_conversion() as mock_convert:
+    mock_convert.side_effect = lambda msgs, files: len(msgs)
+    assert await collector.add(make_tg_msg("a")) is None
+    await collector.add(make_tg_msg("a"))
+    await collector.add(make_tg_msg("b"))
+
+    assert await collector.flush_all() == 2
+
+  assert sorted(ready) == [1, 2]
+  assert await collector.flush_all() == 0
+
+
+@pytest.mark.asyncio
+async def test_album_items_are_tracked_until_the_album_is_handled():
+  release = asyncio.Event()
+  tasks = []
+
+  async def handle(core_msg):
+    # tracked by whoever started the timer, if the timer kept that update's context
+    track_future(asyncio.get_running_loop().create_future())
+    await release.wait()
+
+  def on_ready(core_msg):
+    tasks.append(asyncio.ensure_future(handle(core_msg)))
+    return tasks[-1]
+
+  collector = MediaGroupCollector(timeout=0.01, on_ready=on_ready)
+  with patch_conversion():
+    with track_sends() as first:
+      await collector.add(make_tg_msg("a"))
+    with track_sends() as second:
+      await collector.add(make_tg_msg("a"))
+
+    await asyncio.sleep(0.05)
+    assert len(tasks) == 1
+    assert len(first) == len(second) == 1
+    assert not first[0].done() and not second[0].done()
+
+    release.set()
+    await tasks[0]
+    await asyncio.sleep(0)
+    assert first[0].done() and second[0].done()
+  await collector.flush_all()
+
+
+@pytest.mark.asyncio
+async def test_group_flushed_once_after_last_item():
+  ready = []
+  collector = MediaGroupCollector(timeout=0.05, on_ready=ready.append)
+
+  with patch_conversion() as mock_convert:
+    mock_convert.side_effect = lambda msgs, files: len(msgs)
+    for _ in range(3):
+      await collector.add(make_tg_msg("a"))
+      await asyncio.sleep(0.02)
+    assert ready == []
+
+    await asyncio.sleep(0.1)
+
+  assert ready == [3]
+  mock_convert.assert_awaited_once()
+  await collector.flush_all()
+
+
+@pytest.mark.asyncio
+async def test_groups_share_one_timer_task():
+  ready = []
+  collector = MediaGroupCollector(timeout=0.02, on_ready=ready.append)
+
+  with patch_conversion() as mock_convert:
+    mock_convert.side_effect = lambda msgs, files: len(msgs)
+    for gid in ("a", "b", "c"):
+      for _ in range(10):
+        await collector.add(make_tg_msg(gid))
+    timers = [t for t in asyncio.all_tasks() if t.get_name() == "mediagroup-timer"]
+    assert len(timers) == 1
+
+    await asyncio.sleep(0.1)
+
+  assert ready == [10, 10, 10]
+  await collector.flush_all()
+
+
+@pytest.mark.asyncio
+async def test_item_files_referenced_on_arrival():
+  ready = []
+  collector = MediaGroupCollector(timeout=0.05, on_ready=ready.append)
+
+  def files_from_tg(msg):
+    return [f"file-{msg.index}"]
+
+  with patch('src.app.bot.mediagroup_collector.MessageHandler.files_from_tg', side_effect=files_from_tg) as mock_files:
+    with patch('src.app.bot.mediagroup_collector.MessageHandler.from_media_group', new_callable=AsyncMock) as mock_convert:
+      mock_convert.side_effect = lambda msgs, files: files
+      for i in range(3):
+        msg = make_tg_msg("a")
+        msg.index = i
+        await collector.add(msg)
+      # every item is handled before the group's timeout
+      assert mock_files.call_count == 3
+
+      await asyncio.sleep(0.1)
+
+  assert ready == [["file-0", "file-1", "file-2"]]
+  await collector.flush_all()
+
+
+@pytest.mark.asyncio
+async def test_full_album_flushed_without_timeout():
+  ready = []
+  collector = MediaGroupCollector(timeout=60, on_ready=ready.append)
+
+  with patch_conversion() as mock_convert:
+    mock_convert.side_effect = lambda msgs, files: len(msgs)
+    for _ in range(MAX_ALBUM_ITEMS):
+      await collector.add(make_tg_msg("a"))
+    await asyncio.sleep(0.02)
+
+  assert ready == [MAX_ALBUM_ITEMS]
+  assert collector.stats()["flushed_full"] == 1
+  await collector.flush_all()
+
+
+def test_timeout_follows_gaps_within_bounds():
+  collector = MediaGroupCollector(timeout=0.25, on_ready=lambda m: None, min_timeout=0.1, max_timeout=1.0)
+
+  for gap in (0.01, 0.5, 5.0):
+    collector._gaps.clear()
+    for _ in range(MIN_GAP_SAMPLES + 4):
+      collector._observe_gap(gap)
+    assert collector._timeout == min(1.0, max(0.1, gap * GAP_MARGIN))
+
+
+def test_full_gap_window_is_not_sorted_on_every_item(monkeypatch):
+  collector = MediaGroupCollector(timeout=0.25, on_ready=lambda m: None, min_timeout=0.1, max_timeout=1.0)
+  for _ in range(GAP_WINDOW):
+    collector._observe_gap(0.1)
+
+  sorts = []
+  monkeypatch.setattr(mediagroup_collector, "sorted", lambda gaps: sorts.append(1) or list(gaps), raising=False)
+  for _ in range(GAP_UPDATE_EVERY * 4):
+    collector._observe_gap(0.1)
+  assert len(sorts) == 4
+
+
+@pytest.mark.asyncio
+async def test_split_album_counted():
+  ready = []
+  collector = MediaGroupCollector(timeout=0.01, on_ready=ready.append)
+
+  with patch_conversion() as mock_convert:
+    mock_convert.side_effect = lambda msgs, files: len(msgs)
+    await collector.add(make_tg_msg("a"))
+    await asyncio.sleep(0.05)
+    await collector.add(make_tg_msg("a"))
+    await asyncio.sleep(0.05)
+
+  stats = collector.stats()
+  assert ready == [1, 1]
+  assert stats["split_albums"] == 1
+  assert stats["flushed"] == 2
+  assert stats["pending_groups"] == 0
+  await collector.flush_all()
@@ -1,8 +1,10 @@
 import pytest
+from unittest.mock import AsyncMock, patch
 from types import SimpleNamespace
 
 from src.app.bot.message_handler import MessageHandler
 from src.app.core import Message
+from src.config import ADMIN
 
 
 def make_tg_message(user_id=1, text="hello"):
@@ -33,3 +35,43 @@ def test_from_tg_whitespace_preserved():
   msg = MessageHandler.from_tg(tg_msg)
 
   assert msg.text == "  test "
+
+
+
+def make_photo_message(index, bot, user_id=7):
+  return SimpleNamespace(
+    from_user=SimpleNamespace(id=user_id, username="player", first_name=None),
+    text=None,
+    caption="album" if index == 0 else None,
+    bot=bot,
+    photo=[SimpleNamespace(file_id=f"photo-{index}", file_unique_id=f"unique-{index}", file_size=100)],
+    video=None, audio=None, voice=None, video_note=None, document=None, sticker=None,
+  )
+
+
+@pytest.mark.asyncio
+async def test_album_referenced_by_file_id_and_queued_for_archival():
+  bot = AsyncMock()
+  msgs = [make_photo_message(i, bot) for i in range(4)]
+
+  with patch('src.app.bot.message_handler.AUTO_UPLOAD', True):
+    with patch('src.app.bot.message_handler.archiver') as mock_archiver:
+      msg = await MessageHandler.from_media_group(msgs)
+
+  # the message is ready before anything is downloaded
+  assert [f.file_id for f in msg.files] == ["photo-0", "photo-1", "photo-2", "photo-3"]
+  assert [f.file_unique_id for f in msg.files] == ["unique-0", "unique-1", "unique-2", "unique-3"]
+  assert all(f.filedata is None for f in msg.files)
+  assert msg.text == "album"
+  bot.download.assert_not_called()
+  assert [c.args for c in mock_archiver.submit.call_args_list] == [(f, bot) for f in msg.files]
+
+
+def test_admin_files_not_archived():
+  bot = AsyncMock()
+  with patch('src.app.bot.message_handler.AUTO_UPLOAD', True):
+    with patch('src.app.bot.message_handler.archiver') as mock_archiver:
+      files = MessageHandler.files_from_tg(make_photo_message(0, bot, user_id=ADMIN[0]))
+
+  assert files[0].file_id == "photo-0"
+  mock_archiver.submit.assert_not_called()
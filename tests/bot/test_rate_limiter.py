@@ -0,0 +1,92 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from src.app.bot.rate_limiter import RateLimiter, TokenBucket
+
+
+def make_limiter(global_rate=1000.0, chat_rate=1000.0, chat_burst=1, group_rate_per_minute=60000.0, max_retries=2):
+  return RateLimiter(
+    global_rate=global_rate,
+    chat_rate=chat_rate,
+    chat_burst=chat_burst,
+    group_rate_per_minute=group_rate_per_minute,
+    max_retries=max_retries,
+  )
+
+
+def retry_after(seconds):
+  return TelegramRetryAfter(method=MagicMock(), message="Too Many Requests", retry_after=seconds)
+
+
+def test_bucket_reservations_queue_up():
+  bucket = TokenBucket(rate=10, capacity=2)
+  assert bucket.reserve() == 0
+  assert bucket.reserve() == 0
+  assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+  assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_chat_rate_is_enforced_per_chat():
+  limiter = make_limiter(chat_rate=20.0)
+  sent = []
+
+  async def send(chat_id):
+    await limiter.run(chat_id, AsyncMock(side_effect=lambda: sent.append((chat_id, time.monotonic()))))
+
+  started = time.monotonic()
+  await asyncio.gather(*(send(1) for _ in range(3)), send(2))
+
+  times = [t - started for chat, t in sent if chat == 1]
+  assert times[-1] >= 0.09  # 3 sends at 20/s with a burst of 1
+  assert [t - started for chat, t in sent if chat == 2][0] < 0.05
+  assert limiter.stats()["throttled"] == 2
+  assert limiter.backlog == 0
+
+
+@pytest.mark.asyncio
+async def test_groups_get_the_group_limit():
+  limiter = make_limiter(group_rate_per_minute=60 * 20)
+  assert limiter._bucket(-100).rate == 20
+  assert limiter._bucket(5).rate == 1000.0
+
+
+@pytest.mark.asyncio
+async def test_share_splits_global_and_group_limits():
+  limiter = make_limiter(global_rate=30.0, chat_rate=1.0, chat_burst=3, group_rate_per_minute=20.0)
+  limiter._bucket(-100)
+  limiter.share(4)
+
+  assert (limiter._global.rate, limiter._global.capacity) == (7.5, 7.5)
+  group = limiter._bucket(-100)
+  assert (group.rate * 60, group.capacity) == (5.0, 5.0)
+  assert (limiter._bucket(5).rate, limiter._bucket(5).capacity) == (1.0, 3)
+
+
+@pytest.mark.asyncio
+async def test_retry_after_reschedules_the_send():
+  limiter = make_limiter()
+  call = AsyncMock(side_effect=[retry_after(0.05), "ok"])
+
+  started = time.monotonic()
+  assert await limiter.run(1, call) == "ok"
+
+  assert time.monotonic() - started >= 0.04
+  assert call.await_count == 2
+  assert limiter.stats()["retry_after"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+  limiter = make_limiter(max_retries=1)
+  call = AsyncMock(side_effect=retry_after(0))
+
+  with pytest.raises(TelegramRetryAfter):
+    await limiter.run(1, call)
+
+  assert call.await_count == 2
+  assert limiter.backlog == 0
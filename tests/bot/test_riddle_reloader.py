@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from datetime import datetime
+from types import MappingProxyType
+from unittest.mock import AsyncMock, patch
+
+from src.app.bot.riddle_reloader import RiddleReloader
+from src.app.core import Riddle
+from src.app.db.riddle_snapshot import RiddleSnapshot
+from src.app.exceptions import RiddleError
+
+
+def snapshot(answers, version):
+  riddles = {id: Riddle(id=id, messages=[], answer=answer) for id, answer in answers.items()}
+  return RiddleSnapshot(riddles=MappingProxyType(riddles), loaded_at=datetime.now(), version=version)
+
+
+async def wait_idle(reloader):
+  while reloader.running:
+    await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_reload_reports_changed_stages(tmp_path):
+  report = AsyncMock()
+  reloader = RiddleReloader(directory=tmp_path, watch_interval=0, report=report)
+  old, new = snapshot({1: "a", 2: "b"}, 1), snapshot({1: "a", 2: "c", 3: "d"}, 2)
+
+  with patch("src.app.bot.riddle_reloader.RiddleRepo.reload", AsyncMock(return_value=(old, new))):
+    reply = await reloader.request(bot=None)
+    assert reply.text == "Riddle reload started."
+    assert (await reloader.request(bot=None)).text == "Riddle reload is already running."
+    await wait_idle(reloader)
+
+  summary = report.await_args.args[0].text
+  assert "version 2" in summary
+  assert "Changed stages: 2" in summary and "Added stages: 3" in summary
+  assert reloader.stats()["reloads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_reload_is_reported(tmp_path):
+  report = AsyncMock()
+  reloader = RiddleReloader(directory=tmp_path, watch_interval=0, report=report)
+
+  with patch("src.app.bot.riddle_reloader.RiddleRepo.reload", AsyncMock(side_effect=RiddleError("No riddles for stages [3]"))):
+    await reloader.request(bot=None)
+    await wait_idle(reloader)
+
+  assert "riddles are unchanged" in report.await_args.args[0].text
+  assert reloader.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_watch_reloads_on_file_change(tmp_path):
+  (tmp_path / "1").mkdir()
+  (tmp_path / "1" / "map.jpg").write_bytes(b"old")
+  reloader = RiddleReloader(directory=tmp_path, watch_interval=0.01, report=AsyncMock())
+  reload = AsyncMock(return_value=(snapshot({1: "a"}, 1), snapshot({1: "a"}, 2)))
+
+  with patch("src.app.bot.riddle_reloader.RiddleRepo.reload", reload):
+    reloader.watch(bot=None)
+    await asyncio.sleep(0.05)
+    reload.assert_not_called()
+
+    (tmp_path / "1" / "map.jpg").write_bytes(b"new content")
+    for _ in range(100):
+      if reload.await_count:
+        break
+      await asyncio.sleep(0.01)
+    await reloader.close()
+
+  assert reload.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_watch_polls_a_single_file(tmp_path):
+  bundle = tmp_path / "riddles.bundle"
+  bundle.write_bytes(b"old")
+  reloader = RiddleReloader(directory=tmp_path / "riddles", watch_interval=0.01, report=AsyncMock(), watched=bundle)
+  reload = AsyncMock(return_value=(snapshot({1: "a"}, 1), snapshot({1: "a"}, 2)))
+
+  with patch("src.app.bot.riddle_reloader.RIDDLE_BUNDLE", True), \
+      patch("src.app.bot.riddle_reloader.RiddleRepo.reload", reload):
+    reloader.watch(bot=None)
+    await asyncio.sleep(0.05)
+    reload.assert_not_called()
+
+    bundle.write_bytes(b"rebuilt bundle")
+    for _ in range(100):
+      if reload.await_count:
+        break
+      await asyncio.sleep(0.01)
+    await reloader.close()
+
+  assert reload.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_command_is_refused_when_disabled(tmp_path):
+  reloader = RiddleReloader(directory=tmp_path, watch_interval=0, report=AsyncMock())
+  reloader.command_enabled = False
+  reload = AsyncMock()
+
+  with patch("src.app.bot.riddle_reloader.RiddleRepo.reload", reload):
+    reply = await reloader.request(bot=None)
+
+  assert "multi-process" in reply.text
+  assert not reloader.running
+  reload.assert_not_called()
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+
+from src.app.bot.route_pool import RoutePool
+from src.app.core import Message
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_route_result():
+  async def route(msg):
+    return [Message(_text=msg.text.upper())]
+
+  pool = RoutePool(size=2, route=route)
+  result = await pool.submit(Message(_text="hi"))
+
+  assert result[0].text == "HI"
+  assert pool.stats()["routed"] == 1
+  await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_concurrency():
+  running = 0
+  peak = 0
+
+  async def route(msg):
+    nonlocal running, peak
+    running += 1
+    peak = max(peak, running)
+    await asyncio.sleep(0.01)
+    running -= 1
+    return []
+
+  pool = RoutePool(size=2, route=route)
+  await asyncio.gather(*(pool.submit(Message(_text=str(i))) for i in range(6)))
+
+  assert peak == 2
+  stats = pool.stats()
+  assert stats["routed"] == 6
+  assert stats["queue_depth"] == 0
+  assert stats["wait_max_ms"] > 0
+  await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_submit_reraises_route_error():
+  async def route(msg):
+    raise RuntimeError("boom")
+
+  pool = RoutePool(size=1, route=route)
+  with pytest.raises(RuntimeError):
+    await pool.submit(Message(_text="x"))
+
+  assert pool.stats()["failed"] == 1
+  await pool.close()
+
+
+def test_pool_size_must_be_positive():
+  with pytest.raises(ValueError):
+    RoutePool(size=0, route=None)
@@ -1,6 +1,6 @@
 import pytest
 from types import SimpleNamespace
-from unittest.mock import MagicMock, patch, Mock
+from unittest.mock import MagicMock, AsyncMock, patch, Mock
 
 from src.app.bot.router import Router
 from src.app.core import Message, Team
@@ -13,16 +13,18 @@ def reset_registration_state():
   RegistrationService._contexts.clear()
 
 
-def test_admin_routed_info_all(monkeypatch):
+@pytest.mark.asyncio
+async def test_admin_routed_info_all(monkeypatch):
   monkeypatch.setattr("src.app.bot.router.ADMIN", 1)
 
   msg = Message(_user_id=1, _text="/info_all")
-  response = Router.route(msg)
+  response = await Router.route(msg)
 
   assert isinstance(response, Message)
 
 
-def test_admin_routed_info_one(monkeypatch):
+@pytest.mark.asyncio
+async def test_admin_routed_info_one(monkeypatch):
   monkeypatch.setattr("src.app.bot.router.ADMIN", 1)
   
   mock_team = Team(_id=1, _name="Test Team", _cur_member_id=None, _Team__password_hash = "")
@@ -32,12 +34,13 @@ def test_admin_routed_info_one(monkeypatch):
   )
   
   msg = Message(_user_id=1, _text="/info 1")
-  response = Router.route(msg)
+  response = await Router.route(msg)
   
   assert isinstance(response, Message)
 
 
-def test_unregistered_user_starts_registration(monkeypatch):
+@pytest.mark.asyncio
+async def test_unregistered_user_starts_registration(monkeypatch):
   monkeypatch.setattr("src.app.bot.router.ADMIN", -1)
 
   monkeypatch.setattr(
@@ -46,13 +49,14 @@ def test_unregistered_user_starts_registration(monkeypatch):
   )
 
   msg = Message(_user_id=100, _text="hi")
-  response = Router.route(msg)
+  response = await Router.route(msg)
 
   assert isinstance(response, Message)
   assert RegistrationService.is_active(100)
 
 
-def test_registration_flow(monkeypatch):
+@pytest.mark.asyncio
+async def test_registration_flow(monkeypatch):
   monkeypatch.setattr("src.app.bot.router.ADMIN", -1)
   
   def get_member_side_effect(user_id):
@@ -74,13 +78,14 @@ def test_registration_flow(monkeypatch):
   )
   
   msg1 = Message(_user_id=200, _text="start")
-  response1 = Router.route(msg1)
+  response1 = await Router.route(msg1)
   
   assert isinstance(response1, Message)
   assert response1.user_id == 200
 
 
-def test_regular_player_riddle(monkeypatch):
+@pytest.mark.asyncio
+async def test_regular_player_riddle(monkeypatch):
   monkeypatch.setattr("src.app.bot.router.ADMIN", -1)
 
   member = SimpleNamespace(id=1, team_id=10)
@@ -110,12 +115,13 @@ def test_regular_player_riddle(monkeypatch):
   )
 
   msg = Message(_user_id=1, _text="/riddle")
-  response = Router.route(msg)
+  response = await Router.route(msg)
 
   assert response.text == "riddle"
 
 
-def test_regular_player_answer(monkeypatch):
+@pytest.mark.asyncio
+async def test_regular_player_answer(monkeypatch):
   monkeypatch.setattr("src.app.bot.router.ADMIN", -1)
   
   member = SimpleNamespace(id=1, team_id=10)
@@ -145,13 +151,14 @@ def test_regular_player_answer(monkeypatch):
   )
   
   msg = Message(_user_id=1, _text="answer")
-  response = Router.route(msg)
+  response = await Router.route(msg)
   
   assert response.text == "ok"
   assert response.user_id == 1
 
 
-def test_route_admin_scoring_system():
+@pytest.mark.asyncio
+async def test_route_admin_scoring_system():
   with patch('src.app.bot.router.Router._is_admin', return_value=True):
     with patch('src.app.bot.router.AdminService.get_scoring_system') as mock_scoring:
       msg = MagicMock()
@@ -163,26 +170,28 @@ def test_route_admin_scoring_system():
       mock_scoring.return_value = mock_reply
       
       from src.app.bot.router import Router
-      res = Router.route(msg)
+      res = await Router.route(msg)
       
       mock_scoring.assert_called_once()
       assert res == mock_reply
       assert res.user_id == 123
 
-def test_route_admin_unknown_command():
+@pytest.mark.asyncio
+async def test_route_admin_unknown_command():
   with patch('src.app.bot.router.Router._is_admin', return_value=True):
     msg = MagicMock()
     msg.text = "/abrakadabra"
     msg.user_id = 777
     
     from src.app.bot.router import Router
-    res = Router.route(msg)
+    res = await Router.route(msg)
     
     assert "Неизвестная админ-команда" in res.text
     assert res.user_id == 777
 
 
-def test_route_sets_user_id_if_none():
+@pytest.mark.asyncio
+async def test_route_sets_user_id_if_none():
   msg = MagicMock()
   msg.user_id = 999
   msg.text = "hello"
@@ -192,5 +201,47 @@ def test_route_sets_user_id_if_none():
   
   with patch('src.app.bot.router.MemberRepo.get', return_value=MagicMock()):
     with patch('src.app.bot.router.Router._route_player', return_value=mock_reply):
-      result = Router.route(msg)
+      result = await Router.route(msg)
       assert result.user_id == 999
+
+
+@pytest.mark.asyncio
+async def test_ordering_key_player_uses_team(monkeypatch):
+  monkeypatch.setattr("src.app.bot.router.ADMIN", [-1])
+  monkeypatch.setattr(
+    "src.app.bot.router.MemberRepo.get",
+    AsyncMock(return_value=SimpleNamespace(id=5, team_id=10)),
+  )
+
+  key = await Router.ordering_key(Message(_user_id=5, _text="answer"))
+
+  assert key == ("team", 10)
+
+
+@pytest.mark.asyncio
+async def test_ordering_key_broadcasts_share_one_key(monkeypatch):
+  monkeypatch.setattr("src.app.bot.router.ADMIN", [1, 2])
+
+  first = await Router.ordering_key(Message(_user_id=1, _text="/broadcast teams hi"))
+  second = await Router.ordering_key(Message(_user_id=2, _text="/broadcast members hi"))
+
+  assert first == second == ("broadcast",)
+
+
+@pytest.mark.asyncio
+async def test_ordering_key_unregistered_uses_user(monkeypatch):
+  monkeypatch.setattr("src.app.bot.router.ADMIN", [-1])
+  monkeypatch.setattr("src.app.bot.router.MemberRepo.get", AsyncMock(return_value=None))
+
+  key = await Router.ordering_key(Message(_user_id=7, _text="hi"))
+
+  assert key == ("user", 7)
+
+
+@pytest.mark.asyncio
+async def test_ordering_key_admin_verdict_uses_team(monkeypatch):
+  monkeypatch.setattr("src.app.bot.router.ADMIN", [1])
+
+  msg = Message(_user_id=1, _text="", _background_info={"team_id": "3"})
+  assert await Router.ordering_key(msg) == ("team", 3)
+  assert await Router.ordering_key(Message(_user_id=1, _text="/info_all")) == ("user", 1)
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+
+from src.app.bot.send_scheduler import SendScheduler, SendPriority
+from src.app.core import Message
+
+
+def make_message(chat, text):
+  return Message(_text=text, _recipient_id=chat)
+
+
+@pytest.mark.asyncio
+async def test_order_is_kept_within_a_chat():
+  sent = []
+
+  async def send(message, bot):
+    await asyncio.sleep(0.001 * (5 - int(message.text)))
+    sent.append(message.text)
+
+  scheduler = SendScheduler(send=send, workers=4)
+  for i in range(5):
+    scheduler.submit(make_message(1, str(i)), None, SendPriority.REPLY)
+  await scheduler.join()
+
+  assert sent == ["0", "1", "2", "3", "4"]
+  assert scheduler.stats()["sent"] == 5
+  await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_chat_does_not_block_others():
+  slow_started = asyncio.Event()
+  release = asyncio.Event()
+  sent = []
+
+  async def send(message, bot):
+    if message.recipient_id == 1:
+      slow_started.set()
+      await release.wait()
+    sent.append(message.recipient_id)
+
+  scheduler = SendScheduler(send=send, workers=2)
+  scheduler.submit(make_message(1, "video"), None, SendPriority.REPLY)
+  await slow_started.wait()
+  for chat in (2, 3, 4):
+    scheduler.submit(make_message(chat, "text"), None, SendPriority.REPLY)
+  await asyncio.sleep(0.01)
+
+  assert sent == [2, 3, 4]
+  release.set()
+  await scheduler.join()
+  assert sent == [2, 3, 4, 1]
+  await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_chats_go_first():
+  sent = []
+
+  async def send(message, bot):
+    sent.append(message.text)
+
+  scheduler = SendScheduler(send=send, workers=1)
+  scheduler.submit(make_message(1, "bulk"), None, SendPriority.BULK)
+  scheduler.submit(make_message(2, "reply"), None, SendPriority.REPLY)
+  scheduler.submit(make_message(3, "admin"), None, SendPriority.ADMIN)
+  await scheduler.join()
+
+  assert sent == ["admin", "reply", "bulk"]
+  await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_send_is_counted_and_queue_goes_on():
+  sent = []
+
+  async def send(message, bot):
+    if message.text == "bad":
+      raise RuntimeError("telegram is down")
+    sent.append(message.text)
+
+  scheduler = SendScheduler(send=send, workers=1)
+  bad = scheduler.submit(make_message(1, "bad"), None, SendPriority.REPLY)
+  good = scheduler.submit(make_message(1, "good"), None, SendPriority.REPLY)
+  await scheduler.join()
+
+  assert (await bad, await good) == (False, True)
+
+  stats = scheduler.stats()
+  assert sent == ["good"]
+  assert (stats["sent"], stats["failed"], stats["depth"]) == (1, 1, 0)
+  assert stats["depth_le_1"] == 1 and stats["depth_le_10"] == 1
+  assert sum(v for k, v in stats.items() if k.startswith("latency_ms_")) == 2
+  await scheduler.close()
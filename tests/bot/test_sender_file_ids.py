@@ -0,0 +1,108 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.exceptions import TelegramBadRequest
+
+from src.app.bot import sender
+from src.app.bot.rate_limiter import RateLimiter
+from src.app.core import FileExtension, FileType, Message
+from src.app.storage import FileIdCache, RiddleAssetStore
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+  cache = FileIdCache(tmp_path / "file_ids.jsonl")
+  monkeypatch.setattr(sender, "file_ids", cache)
+  monkeypatch.setattr(sender, "limiter", RateLimiter(
+    global_rate=1000, chat_rate=1000, chat_burst=10, group_rate_per_minute=60000, max_retries=0,
+  ))
+  return cache
+
+
+def riddle_file(tmp_path, name):
+  path = tmp_path / name
+  path.write_bytes(name.encode())
+  # outside the memory budget, so uploads are streamed from the path
+  return FileExtension(
+    type=FileType.PHOTO, creator_id=1, filename=name,
+    filedata=RiddleAssetStore(max_bytes=0).get(path), cache_key=f"1/{name}/hash",
+  )
+
+
+def sent_photo(file_id):
+  return SimpleNamespace(photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id=file_id)])
+
+
+def make_message(files):
+  return Message(_text="riddle", _recipient_id=10, _files=files)
+
+
+@pytest.mark.asyncio
+async def test_uploaded_riddle_files_are_remembered(tmp_path, cache):
+  bot = MagicMock()
+  bot.send_media_group = AsyncMock(return_value=[sent_photo("id-a"), sent_photo("id-b")])
+
+  await sender.deliver(make_message([riddle_file(tmp_path, "a.jpg"), riddle_file(tmp_path, "b.jpg")]), bot)
+
+  assert cache.get("1/a.jpg/hash") == "id-a"
+  assert cache.get("1/b.jpg/hash") == "id-b"
+
+
+@pytest.mark.asyncio
+async def test_cached_file_id_is_sent_without_upload(tmp_path, cache):
+  cache.put("1/a.jpg/hash", "id-a")
+  bot = MagicMock()
+  bot.send_media_group = AsyncMock(return_value=[sent_photo("id-a")])
+
+  await sender.deliver(make_message([riddle_file(tmp_path, "a.jpg")]), bot)
+
+  media = bot.send_media_group.await_args.kwargs["media"]
+  assert media[0].media == "id-a"
+  assert cache.stats()["stored"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_file_id_falls_back_to_upload(tmp_path, cache):
+  cache.put("1/a.jpg/hash", "stale")
+  bot = MagicMock()
+  bot.send_media_group = AsyncMock(side_effect=[
+    TelegramBadRequest(method=MagicMock(), message="wrong file identifier"),
+    [sent_photo("fresh")],
+  ])
+
+  await sender.deliver(make_message([riddle_file(tmp_path, "a.jpg")]), bot)
+
+  retry_media = bot.send_media_group.await_args_list[1].kwargs["media"]
+  assert retry_media[0].media.path == tmp_path / "a.jpg"
+  assert cache.get("1/a.jpg/hash") == "fresh"
+  assert cache.stats()["stale"] == 1
+
+
+@pytest.mark.asyncio
+async def test_other_bad_requests_keep_the_file_id(tmp_path, cache):
+  cache.put("1/a.jpg/hash", "id-a")
+  bot = MagicMock()
+  bot.send_media_group = AsyncMock(side_effect=TelegramBadRequest(method=MagicMock(), message="message caption is too long"))
+
+  with pytest.raises(TelegramBadRequest):
+    await sender.deliver(make_message([riddle_file(tmp_path, "a.jpg")]), bot)
+
+  assert bot.send_media_group.await_count == 1
+  assert cache.get("1/a.jpg/hash") == "id-a"
+  assert cache.stats()["stale"] == 0
+
+
+@pytest.mark.asyncio
+async def test_second_send_of_a_loaded_riddle_uses_the_file_id(tmp_path, cache):
+  # the same FileExtension, as a riddle from the snapshot is sent to every team
+  riddle = [riddle_file(tmp_path, "a.jpg")]
+  bot = MagicMock()
+  bot.send_media_group = AsyncMock(return_value=[sent_photo("id-a")])
+
+  await sender.deliver(make_message(riddle), bot)
+  await sender.deliver(make_message(riddle), bot)
+
+  first, second = bot.send_media_group.await_args_list
+  assert first.kwargs["media"][0].media.path == tmp_path / "a.jpg"
+  assert second.kwargs["media"][0].media == "id-a"
@@ -0,0 +1,69 @@
+import io
+import pytest
+from unittest.mock import MagicMock
+
+from aiogram.types import BufferedInputFile, FSInputFile
+
+from src.app.bot.sender import SharedBufferInputFile, _input_file
+from src.app.core import FileExtension, FileType
+from src.app.storage import RiddleAssetStore
+
+
+def make_file(filedata, file_id=None):
+  return FileExtension(type=FileType.VIDEO, creator_id=1, filename="clip.mp4", filedata=filedata, file_id=file_id)
+
+
+async def upload(input_file):
+  return b"".join([bytes(chunk) async for chunk in input_file.read(MagicMock())])
+
+
+def test_file_id_wins():
+  assert _input_file(make_file(io.BytesIO(b"data"), file_id="tg-id")) == "tg-id"
+
+
+@pytest.mark.asyncio
+async def test_files_on_disk_are_streamed_from_path(tmp_path):
+  path = tmp_path / "clip.mp4"
+  path.write_bytes(b"video" * 100)
+
+  with path.open("rb") as handle:
+    input_file = _input_file(make_file(handle))
+    assert isinstance(input_file, FSInputFile)
+    assert await upload(input_file) == b"video" * 100
+
+
+@pytest.mark.asyncio
+async def test_in_memory_data_is_shared_not_copied():
+  data = io.BytesIO(b"x" * 200_000)
+  first = _input_file(make_file(data))
+  second = _input_file(make_file(data))
+
+  assert isinstance(first, SharedBufferInputFile)
+  assert first.buffer.readonly
+  assert await upload(first) == b"x" * 200_000
+
+  # both views look at the buffer of the BytesIO itself
+  data.getbuffer()[0] = ord("y")
+  assert first.buffer[0] == second.buffer[0] == ord("y")
+
+
+def test_other_file_objects_are_read():
+  spool = io.BufferedRandom(io.BytesIO(b"spooled"))
+  assert isinstance(_input_file(make_file(spool)), BufferedInputFile)
+
+
+@pytest.mark.asyncio
+async def test_riddle_assets_are_uploaded_from_their_buffer(tmp_path):
+  path = tmp_path / "clip.mp4"
+  path.write_bytes(b"riddle" * 100)
+  store = RiddleAssetStore(max_bytes=1000)
+
+  asset = store.get(path)
+  first, second = _input_file(make_file(asset)), _input_file(make_file(asset))
+  assert isinstance(first, SharedBufferInputFile)
+  assert first.buffer.obj is second.buffer.obj is asset.data
+  assert await upload(first) == await upload(second) == b"riddle" * 100
+
+  big = tmp_path / "big.mp4"
+  big.write_bytes(b"v" * 1000)
+  assert isinstance(_input_file(make_file(store.get(big))), FSInputFile)
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+
+from src.app.bot.team_scheduler import TeamScheduler
+from src.app.core import Message
+
+
+@pytest.mark.asyncio
+async def test_same_team_routed_in_order():
+  log = []
+
+  async def route(msg):
+    log.append(("start", msg.text))
+    await asyncio.sleep(0.01)
+    log.append(("end", msg.text))
+    return [msg]
+
+  async def key(msg):
+    return "team-1"
+
+  scheduler = TeamScheduler(route=route, key=key, idle_timeout=1)
+  await asyncio.gather(
+    scheduler.submit(Message(_text="a")),
+    scheduler.submit(Message(_text="b")),
+  )
+
+  assert log == [("start", "a"), ("end", "a"), ("start", "b"), ("end", "b")]
+  await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_different_teams_routed_in_parallel():
+  running = 0
+  peak = 0
+
+  async def route(msg):
+    nonlocal running, peak
+    running += 1
+    peak = max(peak, running)
+    await asyncio.sleep(0.01)
+    running -= 1
+    return []
+
+  async def key(msg):
+    return msg.user_id
+
+  scheduler = TeamScheduler(route=route, key=key, idle_timeout=1)
+  await asyncio.gather(*(scheduler.submit(Message(_text="x", _user_id=i)) for i in range(3)))
+
+  assert peak == 3
+  assert scheduler.stats()["mailboxes"] == 3
+  await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_mailbox_collected():
+  async def route(msg):
+    return []
+
+  async def key(msg):
+    return "team-1"
+
+  scheduler = TeamScheduler(route=route, key=key, idle_timeout=0.01)
+  await scheduler.submit(Message(_text="x"))
+  await asyncio.sleep(0.05)
+
+  stats = scheduler.stats()
+  assert stats["mailboxes"] == 0
+  assert stats["collected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_route_error_reaches_submitter():
+  async def route(msg):
+    raise RuntimeError("boom")
+
+  async def key(msg):
+    return "team-1"
+
+  scheduler = TeamScheduler(route=route, key=key, idle_timeout=1)
+  with pytest.raises(RuntimeError):
+    await scheduler.submit(Message(_text="x"))
+
+  # the mailbox keeps working after a failure
+  with pytest.raises(RuntimeError):
+    await scheduler.submit(Message(_text="y"))
+  await scheduler.close()
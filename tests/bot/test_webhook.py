@@ -0,0 +1,175 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher, Router as TgRouter
+from aiogram.types import Message as TgMessage
+
+from src.app.bot import webhook
+from src.app.bot.webhook import build_webhook_app, WEBHOOK_HANDLER_KEY
+
+
+SECRET = "s3cret"
+
+
+def make_update(update_id: int, text: str = "hi") -> dict:
+  return {
+    "update_id": update_id,
+    "message": {
+      "message_id": update_id,
+      "date": 0,
+      "chat": {"id": 10, "type": "private"},
+      "from": {"id": 10, "is_bot": False, "first_name": "Tester"},
+      "text": text,
+    },
+  }
+
+
+class FakeTelegram:
+  """
+  Posts updates to the webhook the same way Telegram does.
+  """
+
+  def __init__(self, client: TestClient, secret: str = SECRET):
+    self._client = client
+    self._secret = secret
+
+  async def send(self, update: dict):
+    return await self._client.post(
+      webhook.WEBHOOK_PATH,
+      json=update,
+      headers={"X-Telegram-Bot-Api-Secret-Token": self._secret},
+    )
+
+
+@pytest.fixture
+def webhook_parts(monkeypatch):
+  monkeypatch.setattr("src.app.bot.webhook.WEBHOOK_SECRET", SECRET)
+  monkeypatch.setattr("src.app.bot.webhook.WEBHOOK_MAX_CONCURRENCY", 2)
+
+  received = []
+  release = asyncio.Event()
+  tg_router = TgRouter()
+
+  @tg_router.message()
+  async def handler(msg: TgMessage) -> None:
+    received.append(msg.text)
+    await release.wait()
+
+  dp = Dispatcher()
+  dp.include_router(tg_router)
+  bot = Bot(token="42:TEST")
+  return dp, bot, received, release
+
+
+@pytest.mark.asyncio
+async def test_webhook_answers_before_processing_finishes(webhook_parts):
+  dp, bot, received, release = webhook_parts
+  app = build_webhook_app(dp, bot)
+
+  async with TestClient(TestServer(app)) as client:
+    telegram = FakeTelegram(client)
+    response = await telegram.send(make_update(1, "answer"))
+    assert response.status == 200
+
+    await asyncio.sleep(0.01)
+    assert received == ["answer"]
+
+    release.set()
+    await app[WEBHOOK_HANDLER_KEY].wait_pending()
+    assert app[WEBHOOK_HANDLER_KEY].stats()["received"] == 1
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_wrong_secret(webhook_parts):
+  dp, bot, received, release = webhook_parts
+  app = build_webhook_app(dp, bot)
+
+  async with TestClient(TestServer(app)) as client:
+    response = await FakeTelegram(client, secret="wrong").send(make_update(1))
+
+    assert response.status == 401
+    assert received == []
+
+
+async def start_webhook(dp, bot, monkeypatch, **kwargs):
+  monkeypatch.setattr("src.app.bot.webhook.WEBHOOK_URL", "https://example.org")
+  monkeypatch.setattr("src.app.bot.webhook.WEBHOOK_HOST", "127.0.0.1")
+  monkeypatch.setattr("src.app.bot.webhook.WEBHOOK_PORT", 0)
+  monkeypatch.setattr(bot, "set_webhook", AsyncMock())
+  apps = []
+  build = webhook.build_webhook_app
+  monkeypatch.setattr("src.app.bot.webhook.build_webhook_app", lambda *args: apps.append(build(*args)) or apps[-1])
+  run = asyncio.create_task(webhook.run_webhook(dp, bot, **kwargs))
+  while not bot.set_webhook.await_count:
+    await asyncio.sleep(0.001)
+  return run, apps[0][WEBHOOK_HANDLER_KEY]
+
+
+def accept(handler, bot, update):
+  # what the handler does once it has answered Telegram for the update
+  task = asyncio.create_task(handler._background_feed_update(bot, update))
+  handler._background_feed_update_tasks.add(task)
+  task.add_done_callback(handler._background_feed_update_tasks.discard)
+  return task
+
+
+@pytest.mark.asyncio
+async def test_run_webhook_processes_accepted_updates_before_closing(webhook_parts, monkeypatch):
+  dp, bot, received, release = webhook_parts
+  stop = asyncio.Event()
+  run, handler = await start_webhook(dp, bot, monkeypatch, stop=stop)
+
+  # accepted and answered, but still waiting for a slot or being processed
+  for i in range(3):
+    accept(handler, bot, make_update(i))
+
+  stop.set()
+  await asyncio.sleep(0.02)
+  assert not run.done()
+
+  release.set()
+  await asyncio.wait_for(run, 1)
+  assert len(received) == 3
+
+
+@pytest.mark.asyncio
+async def test_run_webhook_cancels_updates_after_timeout(webhook_parts, monkeypatch):
+  dp, bot, received, release = webhook_parts
+  stop = asyncio.Event()
+  run, handler = await start_webhook(dp, bot, monkeypatch, stop=stop, pending_timeout=0.02)
+  task = accept(handler, bot, make_update(1))
+
+  stop.set()
+  await asyncio.wait_for(run, 1)
+  assert task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_run_webhook_requires_secret(webhook_parts, monkeypatch):
+  dp, bot, received, release = webhook_parts
+  monkeypatch.setattr("src.app.bot.webhook.WEBHOOK_URL", "https://example.org")
+  monkeypatch.setattr("src.app.bot.webhook.WEBHOOK_SECRET", "")
+
+  with pytest.raises(RuntimeError, match="WEBHOOK_SECRET"):
+    await webhook.run_webhook(dp, bot)
+
+
+@pytest.mark.asyncio
+async def test_webhook_limits_concurrency(webhook_parts):
+  dp, bot, received, release = webhook_parts
+  app = build_webhook_app(dp, bot)
+
+  async with TestClient(TestServer(app)) as client:
+    telegram = FakeTelegram(client)
+    for i in range(4):
+      assert (await telegram.send(make_update(i))).status == 200
+
+    await asyncio.sleep(0.01)
+    stats = app[WEBHOOK_HANDLER_KEY].stats()
+    assert stats["processing"] == 2
+    assert stats["waiting"] == 2
+
+    release.set()
+    await app[WEBHOOK_HANDLER_KEY].wait_pending()
+    assert len(received) == 4
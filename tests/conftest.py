@@ -1,7 +1,17 @@
 import pytest
+import pytest_asyncio
 from datetime import datetime, timezone, timedelta
 
 from src.app.core import Message, Member, Team
+from src.app.db.db_conn import DB
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def dispose_db_engine():
+  # pooled aiosqlite connections are bound to the test's event loop
+  yield
+  await DB.close()
+
 
 @pytest.fixture
 def fixed_time():
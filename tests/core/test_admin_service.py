@@ -1,19 +1,21 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, AsyncMock, patch
 from src.app.core.admin_service import AdminService, Message, TeamNotFound
 
 
-def test_get_team_info_team_not_found():
-  with patch('src.app.core.admin_service.TeamRepo') as mock_team_repo:
+@pytest.mark.asyncio
+async def test_get_team_info_team_not_found():
+  with patch('src.app.core.admin_service.TeamRepo', new_callable=AsyncMock) as mock_team_repo:
     mock_team_repo.get_by_name.return_value = None
     
     with pytest.raises(TeamNotFound) as exc_info:
-      AdminService.get_team_info(team_name="nonexistent")
+      await AdminService.get_team_info(team_name="nonexistent")
     
     assert "not found" in str(exc_info.value)
 
 
-def test_get_team_info_success():
+@pytest.mark.asyncio
+async def test_get_team_info_success():
   mock_team = MagicMock()
   mock_team.id = 5
   mock_team.name = "Test Team"
@@ -26,13 +28,13 @@ def test_get_team_info_success():
   mock_member2 = MagicMock()
   mock_member2.tg_nickname = "@user2"
   
-  with patch('src.app.core.admin_service.TeamRepo') as mock_team_repo:
-    with patch('src.app.core.admin_service.MemberRepo') as mock_member_repo:
+  with patch('src.app.core.admin_service.TeamRepo', new_callable=AsyncMock) as mock_team_repo:
+    with patch('src.app.core.admin_service.MemberRepo', new_callable=AsyncMock) as mock_member_repo:
       mock_team_repo.get_by_name.return_value = mock_team
       mock_member_repo.get_by_team.return_value = [mock_member1, mock_member2]
       
       with patch('src.app.core.admin_service.ADMIN', 123):
-        result = AdminService.get_team_info(team_name="Test Team")
+        result = await AdminService.get_team_info(team_name="Test Team")
         
         assert isinstance(result, Message)
         assert "Test Team" in result.text
@@ -45,29 +47,31 @@ def test_get_team_info_success():
         assert result.recipient_id == 123
 
 
-def test_get_all_teams_info_empty():
-  with patch('src.app.core.admin_service.TeamRepo') as mock_team_repo:
+@pytest.mark.asyncio
+async def test_get_all_teams_info_empty():
+  with patch('src.app.core.admin_service.TeamRepo', new_callable=AsyncMock) as mock_team_repo:
     mock_team_repo.get_all.return_value = []
     
     with patch('src.app.core.admin_service.ADMIN', 123):
-      msg = AdminService.get_all_teams_info()
+      msg = await AdminService.get_all_teams_info()
       
       assert "no teams" in msg.text.lower()
       assert msg.recipient_id == 123
 
 
-def test_get_all_teams_info_success():
+@pytest.mark.asyncio
+async def test_get_all_teams_info_success():
   mock_team = MagicMock()
   mock_team.id = 1
   mock_team.name = "Test Team"
   mock_team.cur_stage = 2
   mock_team.score = 10
   
-  with patch('src.app.core.admin_service.TeamRepo') as mock_team_repo:
+  with patch('src.app.core.admin_service.TeamRepo', new_callable=AsyncMock) as mock_team_repo:
     mock_team_repo.get_all.return_value = [mock_team]
     
     with patch('src.app.core.admin_service.ADMIN', 123):
-      msg = AdminService.get_all_teams_info()
+      msg = await AdminService.get_all_teams_info()
       
       assert "Test Team" in msg.text
       assert "1" in msg.text
@@ -81,3 +85,11 @@ def test_get_scoring_system():
     assert isinstance(msg, Message)
     assert "scoring" in msg.text.lower()
     assert msg.recipient_id == 123
+
+
+def test_get_stats():
+  with patch('src.app.core.admin_service.Metrics.snapshot', return_value={"route_pool": {"queue_depth": 4}}):
+    msg = AdminService.get_stats()
+
+    assert "route_pool" in msg.text
+    assert "queue_depth: 4" in msg.text
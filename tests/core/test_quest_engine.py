@@ -7,27 +7,30 @@ from src.app.db import TeamRepo, RiddleRepo
 
 # ---------- get_riddle ----------
 
-def test_get_riddle_team_not_found():
+@pytest.mark.asyncio
+async def test_get_riddle_team_not_found():
   with patch.object(TeamRepo, 'get', return_value=None):
     with pytest.raises(TeamError) as exc_info:
-      QuestEngine.get_riddle(team_id=999)
+      await QuestEngine.get_riddle(team_id=999)
     
     assert "Team 999 not found" in str(exc_info.value)
 
 
-def test_get_riddle_riddle_not_found():
+@pytest.mark.asyncio
+async def test_get_riddle_riddle_not_found():
   mock_team = MagicMock()
   mock_team.cur_stage = 1
   
   with patch.object(TeamRepo, 'get', return_value=mock_team):
     with patch.object(RiddleRepo, 'get', return_value=None):
       with pytest.raises(RiddleError) as exc_info:
-        QuestEngine.get_riddle(team_id=1)
+        await QuestEngine.get_riddle(team_id=1)
       
       assert "Riddle for stage 1 not found" in str(exc_info.value)
 
 
-def test_get_riddle_success():
+@pytest.mark.asyncio
+async def test_get_riddle_success():
   mock_team = MagicMock()
   mock_team.cur_stage = 1
   
@@ -42,7 +45,7 @@ def test_get_riddle_success():
   with patch.object(TeamRepo, 'get', return_value=mock_team):
     with patch.object(RiddleRepo, 'get', return_value=mock_riddle):
       with patch.object(Message, 'from_riddle', return_value=mock_message):
-        result = QuestEngine.get_riddle(team_id=1)
+        result = await QuestEngine.get_riddle(team_id=1)
         
         assert result == mock_message
         Message.from_riddle.assert_called_once_with(mock_riddle)
@@ -50,18 +53,20 @@ def test_get_riddle_success():
 
 # ---------- check_answer ----------
 
-def test_check_answer_team_not_found():
+@pytest.mark.asyncio
+async def test_check_answer_team_not_found():
   mock_message = MagicMock()
   mock_message.text = "answer"
   
   with patch.object(TeamRepo, 'get', return_value=None):
     with pytest.raises(TeamError) as exc_info:
-      QuestEngine.check_answer(team_id=1, message=mock_message)
+      await QuestEngine.check_answer(team_id=1, message=mock_message)
     
     assert "Team 1 not found" in str(exc_info.value)
 
 
-def test_check_answer_riddle_not_found():
+@pytest.mark.asyncio
+async def test_check_answer_riddle_not_found():
   mock_team = MagicMock()
   mock_team.cur_stage = 1
   
@@ -71,12 +76,13 @@ def test_check_answer_riddle_not_found():
   with patch.object(TeamRepo, 'get', return_value=mock_team):
     with patch.object(RiddleRepo, 'get', return_value=None):
       with pytest.raises(RiddleError) as exc_info:
-        QuestEngine.check_answer(team_id=1, message=mock_message)
+        await QuestEngine.check_answer(team_id=1, message=mock_message)
       
       assert "Riddle for stage 1 not found" in str(exc_info.value)
 
 
-def test_check_answer_exception_in_check():
+@pytest.mark.asyncio
+async def test_check_answer_exception_in_check():
   mock_team = MagicMock()
   mock_team.cur_stage = 1
   
@@ -89,12 +95,13 @@ def test_check_answer_exception_in_check():
   with patch.object(TeamRepo, 'get', return_value=mock_team):
     with patch.object(RiddleRepo, 'get', return_value=mock_riddle):
       with pytest.raises(AnswerError) as exc_info:
-        QuestEngine.check_answer(team_id=1, message=mock_message)
+        await QuestEngine.check_answer(team_id=1, message=mock_message)
       
       assert "Failed to validate answer" in str(exc_info.value)
 
 
-def test_check_answer_correct():
+@pytest.mark.asyncio
+async def test_check_answer_correct():
   mock_team = MagicMock()
   mock_team.cur_stage = 1
   mock_team.next_stage = MagicMock()
@@ -113,7 +120,7 @@ def test_check_answer_correct():
     with patch.object(RiddleRepo, 'get', side_effect=[mock_riddle, mock_new_riddle]):
       with patch.object(Message, 'from_riddle', return_value=mock_reply):
         with patch.object(TeamRepo, 'update'):
-          result = QuestEngine.check_answer(team_id=1, message=mock_message)
+          result = await QuestEngine.check_answer(team_id=1, message=mock_message)
           
           mock_team.next_stage.assert_called_once()
           TeamRepo.update.assert_called_once_with(mock_team, event="correct answer")
@@ -121,7 +128,8 @@ def test_check_answer_correct():
           assert result.recipient_id == mock_message.recipient_id
 
 
-def test_check_answer_incorrect():
+@pytest.mark.asyncio
+async def test_check_answer_incorrect():
   mock_team = MagicMock()
   mock_team.cur_stage = 1
   
@@ -134,7 +142,7 @@ def test_check_answer_incorrect():
   
   with patch.object(TeamRepo, 'get', return_value=mock_team):
     with patch.object(RiddleRepo, 'get', return_value=mock_riddle):
-      result = QuestEngine.check_answer(team_id=1, message=mock_message)
+      result = await QuestEngine.check_answer(team_id=1, message=mock_message)
       
       assert "Неправильно" in result.text
       assert result.recipient_id == mock_message.recipient_id
@@ -1,27 +1,40 @@
 import pytest
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock, AsyncMock, patch
 from sqlalchemy import text
-from src.app.db.db_conn import DB
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.app.db.db_conn import DB, async_url
 
-def test_session_commit():
-  mock_session = MagicMock()
+
+def make_session():
+  session = MagicMock()
+  session.execute = AsyncMock()
+  session.commit = AsyncMock()
+  session.rollback = AsyncMock()
+  session.close = AsyncMock()
+  return session
+
+@pytest.mark.asyncio
+async def test_session_commit():
+  mock_session = make_session()
   with patch('src.app.db.db_conn.SessionFactory', return_value=mock_session):
-    with DB.session() as s:
+    async with DB.session() as s:
       assert s == mock_session
-    mock_session.commit.assert_called_once()
-    mock_session.close.assert_called_once()
+    mock_session.commit.assert_awaited_once()
+    mock_session.close.assert_awaited_once()
 
-def test_session_rollback():
-  mock_session = MagicMock()
+@pytest.mark.asyncio
+async def test_session_rollback():
+  mock_session = make_session()
   with patch('src.app.db.db_conn.SessionFactory', return_value=mock_session):
     with pytest.raises(ValueError):
-      with DB.session() as s:
+      async with DB.session() as s:
         raise ValueError("error")
-    mock_session.rollback.assert_called_once()
-    mock_session.close.assert_called_once()
+    mock_session.rollback.assert_awaited_once()
+    mock_session.close.assert_awaited_once()
 
-def test_select_simple():
-  mock_session = MagicMock()
+@pytest.mark.asyncio
+async def test_select_simple():
+  mock_session = make_session()
   mock_result = MagicMock()
   mock_result_row = MagicMock()
   mock_result_row._mapping = {"id": 1, "name": "test"}
@@ -29,53 +42,96 @@ def test_select_simple():
   mock_session.execute.return_value = mock_result
 
   with patch('src.app.db.db_conn.SessionFactory', return_value=mock_session):
-    res = DB.select(table="teams")
-    
+    res = await DB.select(table="teams")
+
     assert res == [{"id": 1, "name": "test"}]
     args, kwargs = mock_session.execute.call_args
     assert "SELECT * FROM teams" in str(args[0])
     assert args[1] == {}
 
-def test_select_with_where():
-  mock_session = MagicMock()
+@pytest.mark.asyncio
+async def test_select_with_where():
+  mock_session = make_session()
   mock_session.execute.return_value = []
-  
+
   with patch('src.app.db.db_conn.SessionFactory', return_value=mock_session):
-    DB.select(table="teams", where={"id": 5, "active": True})
-    
+    await DB.select(table="teams", where={"id": 5, "active": True})
+
     args, kwargs = mock_session.execute.call_args
     sql = str(args[0])
     params = args[1]
-    
+
     assert "WHERE" in sql
     assert "id = :id" in sql
     assert "active = :active" in sql
     assert params == {"id": 5, "active": True}
 
-def test_insert():
-  mock_session = MagicMock()
+@pytest.mark.asyncio
+async def test_insert():
+  mock_session = make_session()
+  mock_session.execute.return_value = MagicMock()
   mock_session.execute.return_value.scalar_one.return_value = 10
-  
+
   with patch('src.app.db.db_conn.SessionFactory', return_value=mock_session):
-    new_id = DB.insert(table="teams", values={"name": "A"})
-    
+    new_id = await DB.insert(table="teams", values={"name": "A"})
+
     assert new_id == 10
     args, _ = mock_session.execute.call_args
     sql = str(args[0])
     assert "INSERT INTO teams" in sql
     assert "VALUES (:name)" in sql
 
-def test_update():
-  mock_session = MagicMock()
-  
+@pytest.mark.asyncio
+async def test_update():
+  mock_session = make_session()
+
   with patch('src.app.db.db_conn.SessionFactory', return_value=mock_session):
-    DB.update(table="teams", id=5, values={"score": 100})
-    
+    await DB.update(table="teams", id=5, values={"score": 100})
+
     args, _ = mock_session.execute.call_args
     sql = str(args[0])
     params = args[1]
-    
+
     assert "UPDATE teams SET" in sql
     assert "id = :id" in sql
     assert params["id"] == 5
-    assert params["score"] == 100
\ No newline at end of file
+    assert params["score"] == 100
+
+def test_async_url():
+  assert async_url("sqlite:///data/quest.db") == "sqlite+aiosqlite:///data/quest.db"
+  assert async_url("postgresql://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+  assert async_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+@pytest.mark.asyncio
+async def test_roundtrip_with_aiosqlite():
+  engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+  factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+  async with engine.begin() as conn:
+    await conn.execute(text("CREATE TABLE team (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, score INTEGER)"))
+
+  with patch('src.app.db.db_conn.SessionFactory', factory):
+    new_id = await DB.insert(table="team", values={"name": "A", "score": 0})
+    await DB.update(table="team", id=new_id, values={"score": 3})
+    rows = await DB.select(table="team", where={"name": "A"})
+
+  assert rows == [{"id": new_id, "name": "A", "score": 3}]
+  await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_select_page_with_aiosqlite():
+  engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+  factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+  async with engine.begin() as conn:
+    await conn.execute(text("CREATE TABLE member (id INTEGER PRIMARY KEY, name TEXT)"))
+    await conn.execute(text("INSERT INTO member (id, name) VALUES (30, 'c'), (10, 'a'), (20, 'b')"))
+
+  with patch('src.app.db.db_conn.SessionFactory', factory):
+    first = await DB.select_page(table="member", after_id=0, limit=2)
+    second = await DB.select_page(table="member", after_id=first[-1]["id"], limit=2)
+    total = await DB.count(table="member")
+
+  assert [row["id"] for row in first] == [10, 20]
+  assert [row["id"] for row in second] == [30]
+  assert total == 3
+  await engine.dispose()
@@ -1,8 +1,10 @@
 import pytest
 from unittest.mock import MagicMock, patch
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from src.app.db.queries import TeamQuery, MemberQuery, RiddleQuery, Query
 from datetime import datetime, timezone, timedelta
-from src.app.core import Team, Member, Riddle
+from src.app.core import Team, Member, Riddle, FileExtension, FileType
 
 # ----- MOCK -----
 
@@ -17,45 +19,49 @@ def db():
 
 # ----- TEAM QUERY -----
 
-def test_team_get():
+@pytest.mark.asyncio
+async def test_team_get():
   with patch.object(TeamQuery, 'get') as mock_get:
     mock_team = MagicMock()
     mock_team.id = 1
     mock_get.return_value = mock_team
     
-    result = TeamQuery.get(1)
+    result = await TeamQuery.get(1)
     
     mock_get.assert_called_once_with(1)
     assert result == mock_team
 
 
-def test_team_get_none():
+@pytest.mark.asyncio
+async def test_team_get_none():
   with patch.object(TeamQuery, 'get') as mock_get:
     mock_get.return_value = None
     
-    result = TeamQuery.get(999)
+    result = await TeamQuery.get(999)
     
     mock_get.assert_called_once_with(999)
     assert result is None
 
 
-def test_team_get_by_name():
+@pytest.mark.asyncio
+async def test_team_get_by_name():
   with patch.object(TeamQuery, 'get_by_name') as mock_get_by_name:
     mock_team = MagicMock()
     mock_team.id = 42
     mock_get_by_name.return_value = mock_team
     
-    result = TeamQuery.get_by_name("Alpha")
+    result = await TeamQuery.get_by_name("Alpha")
     
     mock_get_by_name.assert_called_once_with("Alpha")
     assert result == mock_team
 
 
-def test_team_get_by_name_none():
+@pytest.mark.asyncio
+async def test_team_get_by_name_none():
   with patch.object(TeamQuery, 'get_by_name') as mock_get_by_name:
     mock_get_by_name.return_value = None
     
-    result = TeamQuery.get_by_name("Unknown")
+    result = await TeamQuery.get_by_name("Unknown")
     
     mock_get_by_name.assert_called_once_with("Unknown")
     assert result is None
@@ -63,23 +69,25 @@ def test_team_get_by_name_none():
 
 # ----- MEMBER QUERY -----
 
-def test_member_get():
+@pytest.mark.asyncio
+async def test_member_get():
   with patch.object(MemberQuery, 'get') as mock_get:
     mock_member = MagicMock()
     mock_member.id = 5
     mock_get.return_value = mock_member
     
-    result = MemberQuery.get(5)
+    result = await MemberQuery.get(5)
     
     mock_get.assert_called_once_with(5)
     assert result == mock_member
 
 
-def test_member_get_none():
+@pytest.mark.asyncio
+async def test_member_get_none():
   with patch.object(MemberQuery, 'get') as mock_get:
     mock_get.return_value = None
     
-    result = MemberQuery.get(404)
+    result = await MemberQuery.get(404)
     
     mock_get.assert_called_once_with(404)
     assert result is None
@@ -102,23 +110,25 @@ def test_member_get_by_team():
 
 # ----- RIDDLE QUERY -----
 
-def test_riddle_get():
+@pytest.mark.asyncio
+async def test_riddle_get():
   with patch.object(RiddleQuery, 'get') as mock_get:
     mock_riddle = MagicMock()
     mock_riddle.id = 1
     mock_get.return_value = mock_riddle
     
-    result = RiddleQuery.get(1)
+    result = await RiddleQuery.get(1)
     
     mock_get.assert_called_once_with(1)
     assert result == mock_riddle
 
 
-def test_riddle_get_none():
+@pytest.mark.asyncio
+async def test_riddle_get_none():
   with patch.object(RiddleQuery, 'get') as mock_get:
     mock_get.return_value = None
     
-    result = RiddleQuery.get(404)
+    result = await RiddleQuery.get(404)
     
     mock_get.assert_called_once_with(404)
     assert result is None
@@ -126,35 +136,40 @@ def test_riddle_get_none():
 
 # TODO: Getting 100% coverage (will sort them later)
 
-def test_query_get_not_found():
+@pytest.mark.asyncio
+async def test_query_get_not_found():
   with patch('src.app.db.queries.DB.select', return_value=[]):
-    assert TeamQuery.get(1) is None
+    assert await TeamQuery.get(1) is None
 
-def test_query_get_found():
+@pytest.mark.asyncio
+async def test_query_get_found():
   mock_row = {
     "id": 1, "name": "T", "password_hash": "h", "start_stage": 1, 
     "cur_stage": 1, "score": 0, "cur_member_id": 5,
     "stage_call_time": datetime.now()
   }
   with patch('src.app.db.queries.DB.select', return_value=[mock_row]):
-    t = TeamQuery.get(1)
+    t = await TeamQuery.get(1)
     assert isinstance(t, Team)
     assert t.id == 1
 
-def test_query_insert():
+@pytest.mark.asyncio
+async def test_query_insert():
   team = Team(_id=None, _name="N", _cur_member_id=0, _Team__password_hash="p")
   with patch('src.app.db.queries.DB.insert', return_value=5) as mock_ins:
-    res = TeamQuery.insert(team)
+    res = await TeamQuery.insert(team)
     assert res == 5
     mock_ins.assert_called_once()
 
-def test_query_update():
+@pytest.mark.asyncio
+async def test_query_update():
   team = Team(_id=1, _name="N", _cur_member_id=0, _Team__password_hash="p")
   with patch('src.app.db.queries.DB.update') as mock_upd:
-    TeamQuery.update(1, team)
+    await TeamQuery.update(1, team)
     mock_upd.assert_called_once()
 
-def test_team_query_get_all_mixed_success_and_fail():
+@pytest.mark.asyncio
+async def test_team_query_get_all_mixed_success_and_fail():
   valid_row = {
     "id": 1, "name": "T", "password_hash": "h", "start_stage": 1, 
     "cur_stage": 1, "score": 0, "cur_member_id": 5,
@@ -163,7 +178,7 @@ def test_team_query_get_all_mixed_success_and_fail():
   invalid_row = {} 
 
   with patch('src.app.db.queries.DB.select', return_value=[valid_row, invalid_row]):
-    teams = TeamQuery.get_all()
+    teams = await TeamQuery.get_all()
     assert len(teams) == 1
     assert teams[0].id == 1
 
@@ -212,9 +227,10 @@ def test_team_query_pack():
   data2 = TeamQuery.pack(team2)
   assert data2["stage_call_time"] == "some_str"
 
-def test_team_query_get_by_name():
+@pytest.mark.asyncio
+async def test_team_query_get_by_name():
   with patch('src.app.db.queries.DB.select', return_value=[]) as mock_sel:
-    TeamQuery.get_by_name("name")
+    await TeamQuery.get_by_name("name")
     args, kwargs = mock_sel.call_args
     assert kwargs["where"] == {"name": "name"}
 
@@ -236,7 +252,8 @@ def test_riddle_query_pack_parse():
   assert r2.question == r.question
 
 
-def test_team_query_get_all_exception_handling():
+@pytest.mark.asyncio
+async def test_team_query_get_all_exception_handling():
   row1 = {"id": 1}
   row2 = {"id": 2}
   
@@ -244,7 +261,7 @@ def test_team_query_get_all_exception_handling():
     with patch.object(TeamQuery, 'parse') as mock_parse:
       mock_parse.side_effect = [Exception("Fail"), MagicMock()]
       
-      teams = TeamQuery.get_all()
+      teams = await TeamQuery.get_all()
       assert len(teams) == 1
 
 
@@ -257,3 +274,33 @@ def test_team_query_parse_datetime_obj():
   }
   team = TeamQuery.parse(data)
   assert team.stage_call_time == dt
+
+
+@pytest.mark.asyncio
+async def test_riddle_query_get_many_uses_three_queries():
+  engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+  async with engine.begin() as conn:
+    await conn.execute(text("CREATE TABLE riddle (id INTEGER PRIMARY KEY, answer TEXT, type TEXT)"))
+    await conn.execute(text("CREATE TABLE riddle_message (id INTEGER PRIMARY KEY, riddle_id INTEGER, text TEXT)"))
+    await conn.execute(text("CREATE TABLE riddle_file (id INTEGER PRIMARY KEY, message_id INTEGER, filename TEXT)"))
+    await conn.execute(text("INSERT INTO riddle VALUES (1, 'a', 'db'), (2, 'b', 'db')"))
+    await conn.execute(text("INSERT INTO riddle_message VALUES (10, 1, 'first'), (11, 1, 'second'), (20, 2, 'third')"))
+    await conn.execute(text("INSERT INTO riddle_file (message_id, filename) VALUES (10, 'x.jpg'), (10, 'y.jpg'), (20, 'z.jpg')"))
+
+  queries = []
+  event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+  def download(riddle_id, filename):
+    return FileExtension(type=FileType.PHOTO, creator_id=0, filename=f"{riddle_id}/{filename}")
+
+  with patch("src.app.db.db_conn.SessionFactory", async_sessionmaker(bind=engine, expire_on_commit=False)), \
+       patch("src.app.storage.download_riddle_file", download):
+    riddles = await RiddleQuery.get_many()
+
+  assert len(queries) == 3
+  first, second = sorted(riddles, key=lambda r: r.id)
+  assert [m.text for m in first.messages] == ["first", "second"]
+  assert [f.filename for f in first.messages[0].files] == ["1/x.jpg", "1/y.jpg"]
+  assert first.messages[1].files == []
+  assert [f.filename for m in second.messages for f in m.files] == ["2/z.jpg"]
+  await engine.dispose()
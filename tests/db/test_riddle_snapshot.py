@@ -0,0 +1,95 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from src.app.core import Riddle, Message, FileExtension, FileType
+from src.app.db import RiddleRepo
+from src.app.db.riddle_snapshot import RiddleSnapshot
+from src.app.exceptions import RiddleError
+
+
+def make_riddle(id):
+  return Riddle(id=id, messages=[Message(_text=f"riddle {id}")], answer=str(id))
+
+
+@pytest.fixture
+def riddles_in_db():
+  riddles = [make_riddle(id) for id in (1, 2, 3)]
+  with patch("src.app.db.riddle_snapshot.RiddleQuery.get_many", AsyncMock(return_value=riddles)) as get_many:
+    yield get_many
+
+
+@pytest.mark.asyncio
+async def test_snapshot_loads_all_stages(riddles_in_db):
+  snapshot = await RiddleSnapshot.load(stage_count=3)
+
+  assert len(snapshot) == 3
+  assert snapshot.get(2).answer == "2"
+  assert snapshot.get(4) is None
+  with pytest.raises(TypeError):
+    snapshot.riddles[4] = make_riddle(4)
+
+
+@pytest.mark.asyncio
+async def test_missing_stage_fails_fast(riddles_in_db):
+  with pytest.raises(RiddleError, match=r"\[4, 5\]"):
+    await RiddleSnapshot.load(stage_count=5)
+
+
+@pytest.mark.asyncio
+async def test_repo_serves_snapshot_without_db(riddles_in_db, monkeypatch):
+  monkeypatch.setattr("src.app.db.repos.STAGE_COUNT", 3)
+  monkeypatch.setattr(RiddleRepo, "snapshot", None)
+  await RiddleRepo.preload()
+  riddles_in_db.reset_mock()
+
+  riddle = await RiddleRepo.get(3)
+
+  assert riddle.answer == "3"
+  riddles_in_db.assert_not_called()
+
+
+def test_message_copies_do_not_touch_the_riddle():
+  riddle = make_riddle(1)
+  copies = riddle.message_copies()
+  copies[0].recipient_id = 42
+
+  assert riddle.messages[0].recipient_id is None
+  assert copies[0].text == "riddle 1"
+
+
+@pytest.mark.asyncio
+async def test_reload_swaps_snapshot_and_diffs(riddles_in_db, monkeypatch):
+  monkeypatch.setattr("src.app.db.repos.STAGE_COUNT", 3)
+  monkeypatch.setattr(RiddleRepo, "snapshot", None)
+  def with_map(sha256):
+    photo = FileExtension(type=FileType.PHOTO, creator_id=1, filename="map.jpg", filedata=SimpleNamespace(sha256=sha256))
+    return Riddle(id=3, messages=[Message(_text="riddle 3", _files=[photo])], answer="3")
+
+  riddles_in_db.return_value = [make_riddle(1), make_riddle(2), with_map("aaa")]
+  old = await RiddleRepo.preload()
+  riddles_in_db.return_value = [
+    make_riddle(1),
+    Riddle(id=2, messages=[Message(_text="riddle 2")], answer="new answer"),
+    with_map("bbb"),
+    make_riddle(4),
+  ]
+
+  previous, new = await RiddleRepo.reload()
+
+  assert previous is old and RiddleRepo.snapshot is new
+  assert new.version == 2
+  assert old.get(2).answer == "2"  # riddles already handed out keep their version
+  assert old.diff(new) == {"added": [4], "removed": [], "changed": [2, 3]}
+
+
+@pytest.mark.asyncio
+async def test_failed_reload_keeps_snapshot(riddles_in_db, monkeypatch):
+  monkeypatch.setattr("src.app.db.repos.STAGE_COUNT", 3)
+  monkeypatch.setattr(RiddleRepo, "snapshot", None)
+  old = await RiddleRepo.preload()
+  riddles_in_db.return_value = [make_riddle(1)]
+
+  with pytest.raises(RiddleError):
+    await RiddleRepo.reload()
+  assert RiddleRepo.snapshot is old
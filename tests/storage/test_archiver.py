@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from src.app.core import FileExtension, FileType
+from src.app.storage import Archiver
+
+
+def make_archiver(store, workers=2, retries=2):
+  return Archiver(workers=workers, retries=retries, retry_delay=0.001, spool_max_memory=16, store=store)
+
+
+class FakeBot:
+  async def download(self, file_id, destination):
+    destination.write(file_id.encode() * 10)
+    destination.seek(0)
+
+
+@pytest.mark.asyncio
+async def test_referenced_files_downloaded_and_stored():
+  stored = {}
+
+  async def store(file):
+    stored[file.filename] = file.filedata.read()
+
+  archiver = make_archiver(store)
+  for i in range(3):
+    archiver.submit(
+      FileExtension(type=FileType.PHOTO, creator_id=5, filename=f"{i}.jpg", file_id=f"id{i}"),
+      FakeBot(),
+    )
+  assert archiver.stats()["queue_depth"] == 3
+
+  await archiver.join()
+
+  assert stored == {f"{i}.jpg": f"id{i}".encode() * 10 for i in range(3)}
+  stats = archiver.stats()
+  assert stats["archived"] == 3
+  assert stats["queue_depth"] == 0
+  assert stats["lag_max_ms"] >= stats["lag_avg_ms"] > 0
+  await archiver.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_store_is_retried():
+  store = AsyncMock(side_effect=[OSError("disk"), None])
+  archiver = make_archiver(store)
+  archiver.submit(FileExtension(type=FileType.PHOTO, creator_id=5, filename="a.jpg", filedata=object()))
+
+  await archiver.join()
+
+  assert store.await_count == 2
+  stats = archiver.stats()
+  assert (stats["archived"], stats["retried"], stats["failed"]) == (1, 1, 0)
+  await archiver.close()
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_retries():
+  store = AsyncMock(side_effect=OSError("disk"))
+  archiver = make_archiver(store, retries=1)
+  archiver.submit(FileExtension(type=FileType.PHOTO, creator_id=5, filename="a.jpg", filedata=object()))
+
+  await asyncio.wait_for(archiver.join(), 1)
+
+  assert store.await_count == 2
+  assert archiver.stats()["failed"] == 1
+  await archiver.close()
@@ -0,0 +1,115 @@
+import asyncio
+import io
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from src.app.core import FileExtension, FileType
+from src.app.exceptions import StorageError
+from src.app.storage import BlobStore, upload_file, download_team_file
+from src.app.storage import blobs, paths
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+  monkeypatch.setattr(paths, "ROOT", tmp_path)
+  monkeypatch.setattr(paths, "TEAMS_DIR", tmp_path / "teams")
+  monkeypatch.setattr(blobs, "BLOBS_DIR", tmp_path / "blobs")
+  monkeypatch.setattr("src.app.storage.download.ROOT", tmp_path)
+  for counter in ("_written", "_deduplicated", "_bytes_written", "_bytes_saved"):
+    monkeypatch.setattr(BlobStore, counter, 0)
+  return tmp_path
+
+
+def make_file(filename, data, creator_id=7):
+  return FileExtension(type=FileType.PHOTO, creator_id=creator_id, filename=filename, filedata=io.BytesIO(data))
+
+
+@pytest.mark.asyncio
+async def test_identical_content_is_stored_once(storage):
+  first = await BlobStore.store(io.BytesIO(b"photo" * 1000))
+  second = await BlobStore.store(io.BytesIO(b"photo" * 1000))
+
+  assert first[0] == second[0]
+  assert (first[2], second[2]) == (True, False)
+  assert BlobStore.blob_path(first[0]).read_bytes() == b"photo" * 1000
+  assert len(list((storage / "blobs").rglob("*"))) == 2  # the fan-out directory and the blob
+  assert BlobStore.stats() == {"written": 1, "deduplicated": 1, "bytes_written": 5000, "bytes_saved": 5000}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_stores_are_all_counted(storage):
+  await asyncio.gather(*(BlobStore.store(io.BytesIO(b"%d" % i * 1000)) for i in range(40)))
+
+  stats = BlobStore.stats()
+  assert stats["written"] == 40
+  assert stats["bytes_written"] == sum(len(b"%d" % i * 1000) for i in range(40))
+
+
+@pytest.mark.asyncio
+async def test_store_rewinds_data(storage):
+  data = io.BytesIO(b"abc")
+  data.read()
+  await BlobStore.store(data)
+  assert data.read() == b"abc"
+
+
+class Pipe(io.RawIOBase):
+  def __init__(self, data):
+    self._data = io.BytesIO(data)
+
+  def readable(self):
+    return True
+
+  def seekable(self):
+    return False
+
+  def read(self, size=-1):
+    return self._data.read(size)
+
+
+@pytest.mark.asyncio
+async def test_store_reads_non_seekable_data_once(storage):
+  first = await BlobStore.store(Pipe(b"stream" * 100))
+  second = await BlobStore.store(Pipe(b"stream" * 100))
+
+  assert first[:2] == second[:2] == (first[0], 600)
+  assert (first[2], second[2]) == (True, False)
+  assert BlobStore.blob_path(first[0]).read_bytes() == b"stream" * 100
+  assert not list((storage / "blobs").glob(".*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_upload_writes_manifest_and_download_resolves_it(storage):
+  team = SimpleNamespace(id=3, name="Team", cur_member_id=7)
+  with patch("src.app.db.TeamRepo.get_by_member", AsyncMock(return_value=team)):
+    first = await upload_file(make_file("a.jpg", b"same"))
+    second = await upload_file(make_file("b.jpg", b"same"))
+    await upload_file(make_file("a.jpg", b"newer"))
+
+  assert first == second
+  manifest = BlobStore.manifest("Team")
+  assert set(manifest) == {"a.jpg", "b.jpg"}
+  assert manifest["b.jpg"]["size"] == 4
+
+  loaded = download_team_file(team, "a.jpg")
+  try:
+    assert loaded.filedata.read() == b"newer"
+    assert loaded.type == FileType.PHOTO
+  finally:
+    loaded.filedata.close()
+
+
+def test_download_falls_back_to_team_folder(storage):
+  team = SimpleNamespace(id=3, name="Old", cur_member_id=7)
+  (storage / "teams" / "Old").mkdir(parents=True)
+  (storage / "teams" / "Old" / "legacy.txt").write_bytes(b"legacy")
+
+  loaded = download_team_file(team, "legacy.txt")
+  try:
+    assert loaded.filedata.read() == b"legacy"
+  finally:
+    loaded.filedata.close()
+
+  with pytest.raises(StorageError):
+    download_team_file(team, "missing.txt")
@@ -0,0 +1,53 @@
+
+from src.app.core import FileType
+from src.app.storage import FileIdCache, RiddleAssetStore, download_riddle_file
+from src.app.storage import download
+
+
+def test_file_ids_persist_across_instances(tmp_path):
+  cache = FileIdCache(tmp_path / "file_ids.jsonl")
+  cache.put("1/a.jpg/abc", "id-1")
+  cache.put("1/b.jpg/def", "id-2")
+  cache.invalidate("1/b.jpg/def")
+
+  reloaded = FileIdCache(tmp_path / "file_ids.jsonl")
+  assert reloaded.get("1/a.jpg/abc") == "id-1"
+  assert reloaded.get("1/b.jpg/def") is None
+  assert reloaded.stats() == {"cached": 1, "hits": 1, "misses": 1, "stored": 0, "stale": 0}
+
+
+def test_invalidate_keeps_a_newer_file_id(tmp_path):
+  cache = FileIdCache(tmp_path / "file_ids.jsonl")
+  cache.put("1/a.jpg/abc", "fresh")
+
+  cache.invalidate("1/a.jpg/abc", "stale")
+  assert cache.get("1/a.jpg/abc") == "fresh"
+
+  cache.invalidate("1/a.jpg/abc", "fresh")
+  assert cache.get("1/a.jpg/abc") is None
+
+
+def test_riddle_file_is_keyed_by_content(tmp_path, monkeypatch):
+  riddles = tmp_path / "riddles"
+  (riddles / "4").mkdir(parents=True)
+  (riddles / "4" / "map.jpg").write_bytes(b"map")
+  cache = FileIdCache(tmp_path / "file_ids.jsonl")
+  monkeypatch.setattr(download, "ADMIN", [1])
+  monkeypatch.setattr(download, "ROOT", tmp_path)
+  monkeypatch.setattr(download, "RIDDLES_DIR", riddles)
+  monkeypatch.setattr(download, "file_ids", cache)
+  monkeypatch.setattr(download, "riddle_assets", RiddleAssetStore(max_bytes=1024))
+
+  first = download_riddle_file(4, "map.jpg")
+  assert first.file_id is None
+  assert first.type == FileType.PHOTO
+  assert first.filedata.in_memory
+
+  assert first.cache_key == f"4/map.jpg/{first.filedata.sha256}"
+
+  cache.put(first.cache_key, "tg-id")
+  second = download_riddle_file(4, "map.jpg")
+  # the id is looked up when sending, a loaded riddle never carries it
+  assert second.file_id is None
+  assert second.cache_key == first.cache_key
+  assert second.filedata is first.filedata  # read once, shared by both
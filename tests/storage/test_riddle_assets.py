@@ -0,0 +1,86 @@
+import hashlib
+import os
+
+import pytest
+
+from src.app.storage import RiddleAssetStore
+
+
+def test_assets_are_loaded_once_and_shared(tmp_path):
+  path = tmp_path / "map.jpg"
+  path.write_bytes(b"map")
+  store = RiddleAssetStore(max_bytes=1024)
+
+  asset = store.get(path)
+  assert store.get(path) is asset
+  assert asset.sha256 == hashlib.sha256(b"map").hexdigest()
+  assert asset.view().readonly and bytes(asset.view()) == b"map"
+
+  # every reader has its own position
+  first, second = asset.open(), asset.open()
+  assert first.read(1) == b"m"
+  assert second.read() == b"map"
+
+  stats = store.stats()
+  assert (stats["in_memory"], stats["bytes"], stats["hits"], stats["loads"]) == (1, 3, 1, 1)
+
+
+def test_changed_file_is_loaded_again(tmp_path):
+  path = tmp_path / "a.jpg"
+  path.write_bytes(b"first")
+  store = RiddleAssetStore(max_bytes=1024)
+  first = store.get(path)
+
+  path.write_bytes(b"second, longer")
+  os.utime(path, ns=(first.mtime_ns + 1_000_000, first.mtime_ns + 1_000_000))
+  second = store.get(path)
+  assert second.sha256 != first.sha256
+  assert second.data == b"second, longer"
+  assert store.stats()["bytes"] == len(b"second, longer")
+
+
+def test_files_beyond_budget_stay_on_disk(tmp_path):
+  small, big = tmp_path / "small.jpg", tmp_path / "big.mp4"
+  small.write_bytes(b"s" * 60)
+  big.write_bytes(b"b" * 60)
+  store = RiddleAssetStore(max_bytes=100)
+
+  assert store.get(small).in_memory
+  asset = store.get(big)
+  assert not asset.in_memory
+  assert asset.sha256 == hashlib.sha256(b"b" * 60).hexdigest()
+  with asset.open() as f:
+    assert f.read() == b"b" * 60
+  with pytest.raises(ValueError):
+    asset.view()
+
+  stats = store.stats()
+  assert (stats["in_memory"], stats["on_disk"], stats["bytes"]) == (1, 1, 60)
+
+
+def test_files_are_read_outside_the_lock(tmp_path, monkeypatch):
+  path = tmp_path / "a.jpg"
+  path.write_bytes(b"a")
+  store = RiddleAssetStore(max_bytes=1024)
+  load = store._load
+
+  def checked_load(*args):
+    assert not store._lock.locked()
+    return load(*args)
+
+  monkeypatch.setattr(store, "_load", checked_load)
+  assert store.get(path).data == b"a"
+
+
+def test_load_dir_forgets_removed_files(tmp_path):
+  kept, removed = tmp_path / "1" / "kept.jpg", tmp_path / "1" / "removed.jpg"
+  kept.parent.mkdir()
+  kept.write_bytes(b"k" * 10)
+  removed.write_bytes(b"r" * 20)
+  store = RiddleAssetStore(max_bytes=1024)
+  assert store.load_dir(tmp_path) == 2
+
+  removed.unlink()
+  assert store.load_dir(tmp_path) == 1
+  stats = store.stats()
+  assert (stats["in_memory"], stats["bytes"]) == (1, 10)
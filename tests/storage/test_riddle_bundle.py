@@ -0,0 +1,86 @@
+import pytest
+
+from src.app.core import Riddle, Message, FileType
+from src.app.db.riddle_snapshot import RiddleSnapshot
+from src.app.exceptions import StorageError
+from src.app.storage import FileIdCache, RiddleAssetStore, RiddleBundle, download_riddle_file
+from src.app.storage import download, riddle_bundle
+
+
+@pytest.fixture
+def riddles(tmp_path, monkeypatch):
+  riddles_dir = tmp_path / "riddles"
+  for riddle_id, files in {1: {"map.jpg": b"map"}, 2: {"clip.mp4": b"video" * 100, "same.jpg": b"map"}}.items():
+    (riddles_dir / str(riddle_id)).mkdir(parents=True)
+    for name, content in files.items():
+      (riddles_dir / str(riddle_id) / name).write_bytes(content)
+  cache = FileIdCache(tmp_path / "file_ids.jsonl")
+  monkeypatch.setattr(download, "ADMIN", [1])
+  monkeypatch.setattr(riddle_bundle, "ADMIN", [1])
+  monkeypatch.setattr(download, "ROOT", tmp_path)
+  monkeypatch.setattr(download, "RIDDLES_DIR", riddles_dir)
+  monkeypatch.setattr(download, "file_ids", cache)
+  monkeypatch.setattr(download, "riddle_assets", RiddleAssetStore(max_bytes=1024 * 1024))
+  monkeypatch.setattr(riddle_bundle, "file_ids", cache)
+
+  return [
+    Riddle(id=1, messages=[Message(_text="Первая", _files=[download_riddle_file(1, "map.jpg")])], answer="один"),
+    Riddle(id=2, messages=[
+      Message(_text="Вторая"),
+      Message(_text="", _files=[download_riddle_file(2, "clip.mp4"), download_riddle_file(2, "same.jpg")]),
+    ], answer="два"),
+  ]
+
+
+def test_bundle_round_trip(tmp_path, riddles):
+  path = tmp_path / "riddles.bundle"
+  stats = RiddleBundle.write(path, riddles)
+  # the same content in two riddles is stored once
+  assert stats == {"riddles": 2, "files": 2, "bytes": 3 + 500}
+
+  bundle = RiddleBundle.open(path)
+  assert bundle.verify() == 2
+  loaded = {riddle.id: riddle for riddle in bundle.riddles()}
+  assert loaded[1].answer == "один"
+  assert [m.text for m in loaded[2].messages] == ["Вторая", ""]
+
+  clip, same = loaded[2].messages[1].files
+  assert clip.type == FileType.VIDEO
+  assert clip.filedata.view().readonly
+  assert bytes(clip.filedata.view()) == b"video" * 100
+  assert bytes(same.filedata.view()) == b"map"
+  # file_ids cached for the files in RIDDLES_DIR are found for the bundled ones
+  assert clip.cache_key == riddles[1].messages[1].files[0].cache_key
+
+
+@pytest.mark.asyncio
+async def test_snapshot_loads_from_bundle(tmp_path, riddles):
+  path = tmp_path / "riddles.bundle"
+  RiddleBundle.write(path, riddles)
+
+  snapshot = await RiddleSnapshot.load(stage_count=2, bundle=path)
+  assert snapshot.get(1).messages[0].files[0].filename == "map.jpg"
+
+
+def test_corruption_is_detected(tmp_path, riddles):
+  path = tmp_path / "riddles.bundle"
+  RiddleBundle.write(path, riddles)
+  content = bytearray(path.read_bytes())
+
+  content[-1] ^= 0xFF
+  path.write_bytes(content)
+  with pytest.raises(StorageError, match="clip.mp4"):
+    RiddleBundle.open(path).verify()
+
+  path.write_bytes(content[:-10])
+  with pytest.raises(StorageError, match="truncated"):
+    RiddleBundle.open(path)
+
+  content[riddle_bundle.HEADER.size + 5] ^= 0xFF
+  path.write_bytes(content)
+  with pytest.raises(StorageError, match="Index"):
+    RiddleBundle.open(path)
+
+  path.write_bytes(b"not a bundle at all, not a bundle at all, not a bundle")
+  with pytest.raises(StorageError, match="not a riddle bundle"):
+    RiddleBundle.open(path)
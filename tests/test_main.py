@@ -1,7 +1,9 @@
+import asyncio
 import pytest
 import runpy
 from unittest.mock import patch, AsyncMock, MagicMock
-from src.main import setup_logging, main
+from src.main import setup_logging, main, Lifecycle
+from src.app.bot.handlers import run_in_background
 
 def test_setup_logging():
   with patch('src.main.dictConfig') as mock_config:
@@ -18,14 +20,71 @@ async def test_main():
         
         mock_dp = AsyncMock()
         mock_dp.include_router = MagicMock()
+        mock_dp.update = MagicMock()
         mock_dp_cls.return_value = mock_dp
         
-        await main()
+        with patch('src.main.DB.close', new_callable=AsyncMock) as mock_close, \
+             patch('src.main.RiddleRepo.preload', new_callable=AsyncMock) as mock_preload:
+          await main()
         
         mock_setup.assert_called_once()
+        mock_preload.assert_awaited_once()
         mock_bot_cls.assert_called_once()
         mock_dp.include_router.assert_called_once()
-        mock_dp.start_polling.assert_called_once_with(mock_bot)
+        mock_dp.start_polling.assert_called_once_with(mock_bot, handle_signals=False, close_bot_session=False)
+        mock_bot.session.close.assert_awaited_once()
+        mock_close.assert_awaited_once()
+
+def make_polling_dp():
+  # start_polling blocks until stop_polling is called, like the real one
+  dp = MagicMock()
+  stopped = asyncio.Event()
+
+  async def start_polling(*args, **kwargs):
+    await stopped.wait()
+
+  async def stop_polling():
+    stopped.set()
+
+  dp.start_polling = start_polling
+  dp.stop_polling = stop_polling
+  return dp
+
+@pytest.mark.asyncio
+async def test_lifecycle_waits_for_background_sends():
+  done = []
+
+  async def slow_send():
+    await asyncio.sleep(0.05)
+    done.append(True)
+
+  lifecycle = Lifecycle(make_polling_dp(), AsyncMock(), deadline=5)
+  with patch('src.main.DB.close', new_callable=AsyncMock) as mock_close:
+    with patch('src.main.collector.flush_all', new_callable=AsyncMock) as mock_flush:
+      run = asyncio.create_task(lifecycle.run())
+      await asyncio.sleep(0)
+      run_in_background(slow_send())
+      lifecycle.stop()
+      await run
+
+  assert done == [True]
+  mock_flush.assert_awaited_once()
+  mock_close.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_lifecycle_cancels_tasks_after_deadline():
+  async def stuck_send():
+    await asyncio.sleep(10)
+
+  lifecycle = Lifecycle(make_polling_dp(), AsyncMock(), deadline=0.05)
+  with patch('src.main.DB.close', new_callable=AsyncMock):
+    run = asyncio.create_task(lifecycle.run())
+    await asyncio.sleep(0)
+    task = run_in_background(stuck_send())
+    lifecycle.stop()
+    await asyncio.wait_for(run, 2)
+
+  assert task.cancelled()
 
 def test_main_execution_via_runpy():
   with patch('asyncio.run') as mock_asyncio_run:
@@ -0,0 +1,104 @@
+import asyncio
+import os
+from functools import partial
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.supervisor import Supervisor, shard_index, update_shard_key
+
+
+def acking_worker(index, inbox, outbox):
+  while (item := inbox.get()) is not None:
+    outbox.put(item[0])
+
+
+def crashing_worker(marker, index, inbox, outbox):
+  # crashes once on an update marked with "crash", works normally after the restart
+  while (item := inbox.get()) is not None:
+    seq, update = item
+    if update.get("crash") and not os.path.exists(marker):
+      open(marker, "w").close()
+      os._exit(1)
+    outbox.put(seq)
+
+
+async def wait_for(condition, timeout=30.0):
+  # spawned workers re-import the application, which takes a few seconds on a slow machine
+  deadline = asyncio.get_running_loop().time() + timeout
+  while not condition():
+    if asyncio.get_running_loop().time() > deadline:
+      raise AssertionError("condition not met in time")
+    await asyncio.sleep(0.02)
+
+
+def test_shard_index_is_stable_and_in_range():
+  key = ("team", 42)
+  assert shard_index(key, 4) == shard_index(("team", 42), 4)
+  assert all(0 <= shard_index(("team", i), 3) < 3 for i in range(50))
+  assert len({shard_index(("team", i), 4) for i in range(50)}) == 4
+
+
+@pytest.mark.asyncio
+async def test_supervisor_collects_acks():
+  supervisor = Supervisor(workers=2, target=acking_worker, watch_interval=0.05)
+  supervisor.start()
+  for i in range(10):
+    supervisor.dispatch(("team", i), {"update_id": i})
+
+  await wait_for(lambda: all(s["unacked"] == 0 for s in supervisor.stats().values()))
+  await supervisor.close(timeout=2)
+
+
+@pytest.mark.asyncio
+async def test_supervisor_restarts_crashed_worker_and_replays(tmp_path):
+  worker = partial(crashing_worker, str(tmp_path / "crashed"))
+  supervisor = Supervisor(workers=1, target=worker, watch_interval=0.05)
+  supervisor.start()
+  supervisor.dispatch(("team", 1), {"update_id": 1, "crash": True})
+  supervisor.dispatch(("team", 1), {"update_id": 2})
+
+  await wait_for(lambda: supervisor.stats()["worker_0"]["unacked"] == 0)
+  assert supervisor.stats()["worker_0"]["restarts"] == 1
+  await supervisor.close(timeout=2)
+
+
+def test_supervisor_needs_workers():
+  with pytest.raises(ValueError):
+    Supervisor(workers=0)
+
+
+@pytest.mark.asyncio
+async def test_update_shard_key_uses_router_key():
+  update = MagicMock()
+  update.callback_query = None
+  update.message.from_user.id = 5
+  update.message.reply_to_message = None
+  update.message.text = "answer"
+
+  with patch("src.supervisor.Router.ordering_key", AsyncMock(return_value=("team", 3))) as mock_key:
+    assert await update_shard_key(update) == ("team", 3)
+    assert mock_key.await_args.args[0].user_id == 5
+
+
+@pytest.mark.asyncio
+async def test_update_is_acked_after_its_replies_are_sent():
+  from src.app.bot import sender
+  from src.app.core import Message
+  from src.supervisor import _process_update
+
+  sent = asyncio.get_running_loop().create_future()
+
+  async def feed_raw_update(bot, update):
+    await sender.send_messages(Message(_text="reply", _recipient_id=5), bot)
+
+  dp = MagicMock()
+  dp.feed_raw_update = feed_raw_update
+  outbox = MagicMock()
+  with patch.object(sender.send_scheduler, "submit", return_value=sent):
+    task = asyncio.create_task(_process_update(dp, None, 7, {}, outbox))
+    await asyncio.sleep(0.01)
+    outbox.put.assert_not_called()
+
+    sent.set_result(True)
+    await task
+  outbox.put.assert_called_once_with(7)
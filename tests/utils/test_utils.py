@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from datetime import datetime, timezone, timedelta
 
-from src.app.utils import Utils, Timer
+from src.app.utils import Utils, Timer, Metrics, Histogram
 
 # --- NOW ---
 
@@ -85,3 +85,32 @@ def test_generate_properties_exclude():
   assert t.value == 1
   assert not hasattr(t, "secret")
 
+
+
+# --- METRICS ---
+
+def test_metrics_snapshot_collects_providers():
+  Metrics.register("test_component", lambda: {"depth": 3})
+  try:
+    assert Metrics.snapshot()["test_component"] == {"depth": 3}
+  finally:
+    Metrics.unregister("test_component")
+  assert "test_component" not in Metrics.snapshot()
+
+
+def test_metrics_snapshot_skips_broken_provider():
+  def broken():
+    raise RuntimeError("broken")
+
+  Metrics.register("broken_component", broken)
+  try:
+    assert "broken_component" not in Metrics.snapshot()
+  finally:
+    Metrics.unregister("broken_component")
+
+
+def test_histogram_buckets():
+  hist = Histogram("latency_ms", [100, 10])
+  for value in (5, 10, 11, 500):
+    hist.observe(value)
+  assert hist.as_dict() == {"latency_ms_le_10": 2, "latency_ms_le_100": 1, "latency_ms_inf": 1}